@@ -17,6 +17,7 @@
 """Instance Metadata information."""
 
 import base64
+import hashlib
 import os
 import posixpath
 
@@ -105,6 +106,21 @@ class InvalidMetadataPath(Exception):
     pass
 
 
+class MetadataDocument(object):
+    """A rendered metadata response.
+
+    The ETag is a hash of the body, so it only changes when the document
+    served for a path does.
+    """
+
+    def __init__(self, body, content_type):
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()
+
+
 class InstanceMetadata(object):
     """Instance metadata."""
 
@@ -196,6 +212,9 @@ class InstanceMetadata(object):
 
         self.route_configuration = None
 
+        # Rendered documents, by path, see lookup_document()
+        self._documents = {}
+
         # NOTE(mikal): the decision to not pass extra_md here like we
         # do to the StaticJSON driver is deliberate. extra_md will
         # contain the admin password for the instance, and we shouldn't
@@ -572,6 +591,29 @@ class InstanceMetadata(object):
 
         return data
 
+    def lookup_document(self, path):
+        """Returns the MetadataDocument served for path.
+
+        Documents are rendered on first use and kept with this object, so
+        they live as long as the cached metadata they were built from.
+        Callable handlers, like the password one, are returned as they
+        are since their response depends on the request.
+        """
+        # NOTE: Objects cached before the documents were kept with them
+        # don't have _documents.
+        documents = getattr(self, '_documents', None)
+        if documents is None:
+            documents = self._documents = {}
+        document = documents.get(path)
+        if document is None:
+            data = self.lookup(path)
+            if callable(data):
+                return data
+            document = MetadataDocument(ec2_md_print(data),
+                                        self.get_mimetype())
+            documents[path] = document
+        return document
+
     def metadata_for_config_drive(self):
         """Yields (path, value) tuples for metadata elements."""
         # EC2 style metadata
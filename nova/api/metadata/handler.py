@@ -109,20 +109,19 @@ class MetadataRequestHandler(wsgi.Application):
             raise webob.exc.HTTPNotFound()
 
         try:
-            data = meta_data.lookup(req.path_info)
+            document = meta_data.lookup_document(req.path_info)
         except base.InvalidMetadataPath:
             raise webob.exc.HTTPNotFound()
 
-        if callable(data):
-            return data(req, meta_data)
+        if callable(document):
+            return document(req, meta_data)
 
-        resp = base.ec2_md_print(data)
-        if isinstance(resp, six.text_type):
-            req.response.text = resp
-        else:
-            req.response.body = resp
-
-        req.response.content_type = meta_data.get_mimetype()
+        req.response.body = document.body
+        req.response.content_type = document.content_type
+        # Guests polling for changes get a 304 Not Modified, without a
+        # body, while the document is unchanged.
+        req.response.etag = document.etag
+        req.response.conditional_response = True
         return req.response
 
     def _handle_remote_ip_request(self, req):
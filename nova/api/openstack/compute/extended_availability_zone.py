@@ -25,12 +25,11 @@ PREFIX = "OS-EXT-AZ"
 
 
 class ExtendedAZController(wsgi.Controller):
-    def _extend_server(self, context, server, instance):
+    def _extend_server(self, server, az):
         # NOTE(mriedem): The OS-EXT-AZ prefix should not be used for new
         # attributes after v2.1. They are only in v2.1 for backward compat
         # with v2.0.
         key = "%s:availability_zone" % PREFIX
-        az = avail_zone.get_instance_availability_zone(context, instance)
         server[key] = az or ''
 
     @wsgi.extends
@@ -39,16 +38,21 @@ class ExtendedAZController(wsgi.Controller):
         if context.can(eaz_policies.BASE_POLICY_NAME, fatal=False):
             server = resp_obj.obj['server']
             db_instance = req.get_db_instance(server['id'])
-            self._extend_server(context, server, db_instance)
+            az = avail_zone.get_instance_availability_zone(context,
+                                                           db_instance)
+            self._extend_server(server, az)
 
     @wsgi.extends
     def detail(self, req, resp_obj):
         context = req.environ['nova.context']
         if context.can(eaz_policies.BASE_POLICY_NAME, fatal=False):
             servers = list(resp_obj.obj['servers'])
+            db_instances = [req.get_db_instance(server['id'])
+                            for server in servers]
+            azs = avail_zone.get_instance_availability_zones(context,
+                                                             db_instances)
             for server in servers:
-                db_instance = req.get_db_instance(server['id'])
-                self._extend_server(context, server, db_instance)
+                self._extend_server(server, azs.get(server['id']))
 
 
 class ExtendedAvailabilityZone(extensions.V21APIExtensionBase):
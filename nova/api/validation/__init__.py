@@ -32,12 +32,23 @@ def schema(request_body_schema, min_version=None, max_version=None):
 
     """
 
+    min_ver = api_version.APIVersionRequest(min_version)
+    max_ver = api_version.APIVersionRequest(max_version)
+    # The validators are created on first use, once the extensions added
+    # their properties to the schema, and then kept. Keyed by legacy_v2.
+    schema_validators = {}
+
+    def _get_validator(legacy_v2):
+        schema_validator = schema_validators.get(legacy_v2)
+        if schema_validator is None:
+            schema_validator = validators._SchemaValidator(
+                request_body_schema, legacy_v2)
+            schema_validators[legacy_v2] = schema_validator
+        return schema_validator
+
     def add_validator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            min_ver = api_version.APIVersionRequest(min_version)
-            max_ver = api_version.APIVersionRequest(max_version)
-
             # The request object is always the second argument.
             # However numerous unittests pass in the request object
             # via kwargs instead so we handle that as well.
@@ -58,17 +69,13 @@ def schema(request_body_schema, min_version=None, max_version=None):
                 #  legacy_v2 | 2.0                | work
                 #  legacy_v2 | 2.1+               | don't
                 if min_version is None or min_version == '2.0':
-                    schema_validator = validators._SchemaValidator(
-                        request_body_schema, legacy_v2)
-                    schema_validator.validate(kwargs['body'])
+                    _get_validator(legacy_v2).validate(kwargs['body'])
             elif ver.matches(min_ver, max_ver):
                 # Only validate against the schema if it lies within
                 # the version range specified. Note that if both min
                 # and max are not specified the validator will always
                 # be run.
-                schema_validator = validators._SchemaValidator(
-                    request_body_schema, legacy_v2)
-                schema_validator.validate(kwargs['body'])
+                _get_validator(legacy_v2).validate(kwargs['body'])
 
             return func(*args, **kwargs)
         return wrapper
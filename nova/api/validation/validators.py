@@ -240,21 +240,32 @@ class _SchemaValidator(object):
     """
     validator = None
     validator_org = jsonschema.Draft4Validator
+    # Extended validator classes by (class, relax_additional_properties).
+    # Extending a validator creates a class, so this is only done once.
+    _validator_classes = {}
 
     def __init__(self, schema, relax_additional_properties=False):
-        validators = {
-            'minimum': self._validate_minimum,
-            'maximum': self._validate_maximum,
-        }
-        if relax_additional_properties:
-            validators[
-                'additionalProperties'] = _soft_validate_additional_properties
-
-        validator_cls = jsonschema.validators.extend(self.validator_org,
-                                                     validators)
+        validator_cls = self._get_validator_class(relax_additional_properties)
         format_checker = FormatChecker()
         self.validator = validator_cls(schema, format_checker=format_checker)
 
+    @classmethod
+    def _get_validator_class(cls, relax_additional_properties):
+        key = (cls, relax_additional_properties)
+        validator_cls = cls._validator_classes.get(key)
+        if validator_cls is None:
+            validators = {
+                'minimum': cls._validate_minimum,
+                'maximum': cls._validate_maximum,
+            }
+            if relax_additional_properties:
+                validators['additionalProperties'] = (
+                    _soft_validate_additional_properties)
+            validator_cls = jsonschema.validators.extend(cls.validator_org,
+                                                         validators)
+            cls._validator_classes[key] = validator_cls
+        return validator_cls
+
     def validate(self, *args, **kwargs):
         try:
             self.validator.validate(*args, **kwargs)
@@ -278,7 +289,8 @@ class _SchemaValidator(object):
             detail = six.text_type(ex)
             raise exception.ValidationError(detail=detail)
 
-    def _number_from_str(self, instance):
+    @staticmethod
+    def _number_from_str(instance):
         try:
             value = int(instance)
         except (ValueError, TypeError):
@@ -288,16 +300,18 @@ class _SchemaValidator(object):
                 return None
         return value
 
-    def _validate_minimum(self, validator, minimum, instance, schema):
-        instance = self._number_from_str(instance)
+    @classmethod
+    def _validate_minimum(cls, validator, minimum, instance, schema):
+        instance = cls._number_from_str(instance)
         if instance is None:
             return
-        return self.validator_org.VALIDATORS['minimum'](validator, minimum,
-                                                        instance, schema)
+        return cls.validator_org.VALIDATORS['minimum'](validator, minimum,
+                                                       instance, schema)
 
-    def _validate_maximum(self, validator, maximum, instance, schema):
-        instance = self._number_from_str(instance)
+    @classmethod
+    def _validate_maximum(cls, validator, maximum, instance, schema):
+        instance = cls._number_from_str(instance)
         if instance is None:
             return
-        return self.validator_org.VALIDATORS['maximum'](validator, maximum,
-                                                        instance, schema)
+        return cls.validator_org.VALIDATORS['maximum'](validator, maximum,
+                                                       instance, schema)
@@ -96,6 +96,21 @@ def get_host_availability_zone(context, host):
     return az
 
 
+def get_host_availability_zones(context, hosts):
+    """Return the availability zones of several hosts, keyed by host."""
+    hosts = set(hosts)
+    aggregates = objects.AggregateList.get_by_metadata_key(
+        context, 'availability_zone', hosts=hosts)
+    azs = {}
+    for aggregate in aggregates:
+        for host in aggregate.hosts:
+            if host in hosts:
+                azs.setdefault(host, aggregate.metadata['availability_zone'])
+    for host in hosts:
+        azs.setdefault(host, CONF.default_availability_zone)
+    return azs
+
+
 def update_host_availability_zone_cache(context, host, availability_zone=None):
     if not availability_zone:
         availability_zone = get_host_availability_zone(context, host)
@@ -186,3 +201,52 @@ def get_instance_availability_zone(context, instance):
         az = get_host_availability_zone(elevated, host)
         cache.set(cache_key, az)
     return az
+
+
+def get_instance_availability_zones(context, instances):
+    """Return the availability zones of a list of instances.
+
+    This looks up the availability zones of the hosts of all the instances at
+    once, the ones missing from the cache with a single aggregate query.
+
+    :returns: a dict of availability zones keyed by instance uuid
+    """
+    azs = {}
+    hosts = set()
+    for instance in instances:
+        if instance.get('host'):
+            hosts.add(instance['host'])
+        else:
+            # Likely hasn't reached a viable compute node yet so give back
+            # the desired availability_zone in the instance record if the
+            # boot request specified one.
+            azs[instance['uuid']] = instance.get('availability_zone')
+    hosts = list(hosts)
+
+    cache = _get_cache()
+    host_azs = {}
+    if hosts:
+        cached_azs = cache.get_multi([_make_cache_key(host)
+                                      for host in hosts])
+        host_azs = dict(zip(hosts, cached_azs))
+    # NOTE(sbauza): When the cache does not match the instance AZ, it is
+    # wrong and the AZ of the host is fetched again, see
+    # get_instance_availability_zone().
+    missing_hosts = set(host for host, az in host_azs.items() if not az)
+    for instance in instances:
+        az_inst = instance.get('availability_zone')
+        host = instance.get('host')
+        if host and az_inst is not None and host_azs[host] != az_inst:
+            missing_hosts.add(host)
+
+    if missing_hosts:
+        fetched_azs = get_host_availability_zones(context.elevated(),
+                                                  missing_hosts)
+        cache.set_multi(dict((_make_cache_key(host), az)
+                             for host, az in fetched_azs.items()))
+        host_azs.update(fetched_azs)
+
+    for instance in instances:
+        if instance.get('host'):
+            azs[instance['uuid']] = host_azs[instance['host']]
+    return azs
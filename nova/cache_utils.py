@@ -126,5 +126,8 @@ class CacheClient(object):
         return [None if value is cache.NO_VALUE else value for value in
                 values]
 
+    def set_multi(self, mapping):
+        return self.region.set_multi(mapping)
+
     def delete_multi(self, keys):
         return self.region.delete_multi(keys)
@@ -190,20 +190,55 @@ def _diff_dict(orig, new):
     return result
 
 
+class _LazyAttribute(object):
+    """Instance attribute set by calling factory on first access.
+
+    The API controllers each create their own compute API, and most of them
+    only use a few of its client APIs, so these are only created when used.
+    As this is a non-data descriptor, setting the attribute works as for any
+    other instance attribute.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = self.factory()
+        setattr(obj, self.name, value)
+        return value
+
+
 class API(base.Base):
     """API for interacting with the compute manager."""
 
+    image_api = _LazyAttribute('image_api', lambda: image.API())
+    network_api = _LazyAttribute('network_api', lambda: network.API())
+    volume_api = _LazyAttribute('volume_api', lambda: cinder.API())
+    security_group_api = _LazyAttribute(
+        'security_group_api',
+        lambda: openstack_driver.get_openstack_security_group_driver())
+    consoleauth_rpcapi = _LazyAttribute(
+        'consoleauth_rpcapi', lambda: consoleauth_rpcapi.ConsoleAuthAPI())
+    compute_rpcapi = _LazyAttribute('compute_rpcapi',
+                                    lambda: compute_rpcapi.ComputeAPI())
+    compute_task_api = _LazyAttribute('compute_task_api',
+                                      lambda: conductor.ComputeTaskAPI())
+    servicegroup_api = _LazyAttribute('servicegroup_api',
+                                      lambda: servicegroup.API())
+
     def __init__(self, image_api=None, network_api=None, volume_api=None,
                  security_group_api=None, **kwargs):
-        self.image_api = image_api or image.API()
-        self.network_api = network_api or network.API()
-        self.volume_api = volume_api or cinder.API()
-        self.security_group_api = (security_group_api or
-            openstack_driver.get_openstack_security_group_driver())
-        self.consoleauth_rpcapi = consoleauth_rpcapi.ConsoleAuthAPI()
-        self.compute_rpcapi = compute_rpcapi.ComputeAPI()
-        self.compute_task_api = conductor.ComputeTaskAPI()
-        self.servicegroup_api = servicegroup.API()
+        if image_api:
+            self.image_api = image_api
+        if network_api:
+            self.network_api = network_api
+        if volume_api:
+            self.volume_api = volume_api
+        if security_group_api:
+            self.security_group_api = security_group_api
         self.notifier = rpc.get_notifier('compute', CONF.host)
         if CONF.ephemeral_storage_encryption.enabled:
             self.key_manager = keymgr.API()
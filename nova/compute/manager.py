@@ -110,6 +110,11 @@ wrap_exception = functools.partial(exception_wrapper.wrap_exception,
                                    get_notifier=get_notifier,
                                    binary='nova-compute')
 
+# Instance attributes needed by the compute.instance.exists notifications of
+# the instance usage audit.
+_INSTANCE_USAGE_AUDIT_ATTRS = ['system_metadata', 'info_cache', 'metadata',
+                               'flavor']
+
 
 @utils.expects_func_args('migration')
 def errors_out_migration(function):
@@ -5900,14 +5905,20 @@ class ComputeManager(manager.Manager):
                                self.host):
             return
 
+        if CONF.instance_usage_audit_batch_size:
+            # Only list the instances here, what the notifications need is
+            # loaded batch by batch while sending them.
+            expected_attrs = []
+        else:
+            expected_attrs = _INSTANCE_USAGE_AUDIT_ATTRS
         instances = objects.InstanceList.get_active_by_window_joined(
             context, begin, end, host=self.host,
-            expected_attrs=['system_metadata', 'info_cache', 'metadata',
-                            'flavor'],
+            expected_attrs=expected_attrs,
             use_slave=True)
         num_instances = len(instances)
         errors = 0
         successes = 0
+        purged = 0
         LOG.info(_LI("Running instance usage audit for"
                      " host %(host)s from %(begin_time)s to "
                      "%(end_time)s. %(number_instances)s"
@@ -5925,7 +5936,16 @@ class ComputeManager(manager.Manager):
         task_log.task_items = num_instances
         task_log.message = 'Instance usage audit started...'
         task_log.begin_task()
-        for instance in instances:
+        for instance_uuid, instance in self._get_instance_usage_audit_instances(
+                context, instances):
+            if instance is None:
+                LOG.warning(_LW('Instance %(uuid)s was listed for the usage '
+                                'audit on host %(host)s but could not be '
+                                'loaded, skipping it.'),
+                            {'uuid': instance_uuid, 'host': self.host})
+                purged += 1
+                errors += 1
+                continue
             try:
                 compute_utils.notify_usage_exists(
                     self.notifier, context, instance,
@@ -5941,8 +5961,43 @@ class ComputeManager(manager.Manager):
         task_log.message = (
             'Instance usage audit ran for host %s, %s instances in %s seconds.'
             % (self.host, num_instances, time.time() - start_time))
+        if purged:
+            task_log.message += (
+                ' %s instances were purged before being audited.' % purged)
         task_log.end_task()
 
+    def _get_instance_usage_audit_instances(self, context, instances):
+        """Yields the (uuid, instance) of the audited instances, with the
+        attributes needed by the compute.instance.exists notifications.
+
+        With CONF.instance_usage_audit_batch_size set, the instances were
+        listed without these attributes, so they are loaded again batch by
+        batch, keeping only one batch in memory at a time. The instance is
+        None when it was purged since it was listed.
+        """
+        batch_size = CONF.instance_usage_audit_batch_size
+        if not batch_size:
+            for instance in instances:
+                yield instance.uuid, instance
+            return
+
+        instance_uuids = [instance.uuid for instance in instances]
+        for start in range(0, len(instance_uuids), batch_size):
+            batch_uuids = instance_uuids[start:start + batch_size]
+            LOG.debug("Loading instances %(start)d to %(end)d of %(total)d "
+                      "for the instance usage audit",
+                      {'start': start + 1,
+                       'end': start + len(batch_uuids),
+                       'total': len(instance_uuids)})
+            batch = objects.InstanceList.get_by_filters(
+                context, {'uuid': batch_uuids},
+                expected_attrs=_INSTANCE_USAGE_AUDIT_ATTRS, use_slave=True)
+            for instance in batch:
+                yield instance.uuid, instance
+            missing = set(batch_uuids) - set(inst.uuid for inst in batch)
+            for instance_uuid in sorted(missing):
+                yield instance_uuid, None
+
     @periodic_task.periodic_task(spacing=CONF.bandwidth_poll_interval)
     def _poll_bandwidth_usage(self, context):
 
@@ -5982,6 +6037,18 @@ class ComputeManager(manager.Manager):
                 self._bw_usage_supported = False
                 return
 
+            # Read the usages of all the VIFs at once, for the current audit
+            # period and, for the VIFs without usage in it yet, for the
+            # previous one.
+            usages = self._get_bw_usages_by_mac(
+                context, set(bw_ctr['uuid'] for bw_ctr in bw_counters),
+                start_time)
+            prev_usages = self._get_bw_usages_by_mac(
+                context, set(bw_ctr['uuid'] for bw_ctr in bw_counters
+                             if (bw_ctr['uuid'], bw_ctr['mac_address'])
+                             not in usages),
+                prev_time)
+
             refreshed = timeutils.utcnow()
             for bw_ctr in bw_counters:
                 # Allow switching of greenthreads between queries.
@@ -5990,19 +6057,15 @@ class ComputeManager(manager.Manager):
                 bw_out = 0
                 last_ctr_in = None
                 last_ctr_out = None
-                usage = objects.BandwidthUsage.get_by_instance_uuid_and_mac(
-                    context, bw_ctr['uuid'], bw_ctr['mac_address'],
-                    start_period=start_time, use_slave=True)
+                key = (bw_ctr['uuid'], bw_ctr['mac_address'])
+                usage = usages.get(key)
                 if usage:
                     bw_in = usage.bw_in
                     bw_out = usage.bw_out
                     last_ctr_in = usage.last_ctr_in
                     last_ctr_out = usage.last_ctr_out
                 else:
-                    usage = (objects.BandwidthUsage.
-                             get_by_instance_uuid_and_mac(
-                        context, bw_ctr['uuid'], bw_ctr['mac_address'],
-                        start_period=prev_time, use_slave=True))
+                    usage = prev_usages.get(key)
                     if usage:
                         last_ctr_in = usage.last_ctr_in
                         last_ctr_out = usage.last_ctr_out
@@ -6032,14 +6095,31 @@ class ComputeManager(manager.Manager):
                                               last_refreshed=refreshed,
                                               update_cells=update_cells)
 
+    @staticmethod
+    def _get_bw_usages_by_mac(context, instance_uuids, start_period):
+        """Return the bandwidth usages of instances for an audit period,
+        keyed by (instance uuid, mac address).
+        """
+        if not instance_uuids:
+            return {}
+        usages = objects.BandwidthUsageList.get_by_uuids(
+            context, sorted(instance_uuids), start_period=start_period,
+            use_slave=True)
+        return {(usage.instance_uuid, usage.mac): usage for usage in usages}
+
     def _get_host_volume_bdms(self, context, use_slave=False):
         """Return all block device mappings on a compute host."""
         compute_host_bdms = []
         instances = objects.InstanceList.get_by_host(context, self.host,
             use_slave=use_slave)
+        if not instances:
+            return compute_host_bdms
+        bdms_by_instance = (
+            objects.BlockDeviceMappingList.bdms_by_instance_uuid(
+                context, [instance.uuid for instance in instances],
+                use_slave=use_slave))
         for instance in instances:
-            bdms = objects.BlockDeviceMappingList.get_by_instance_uuid(
-                    context, instance.uuid, use_slave=use_slave)
+            bdms = bdms_by_instance.get(instance.uuid, [])
             instance_bdms = [bdm for bdm in bdms if bdm.is_volume]
             compute_host_bdms.append(dict(instance=instance,
                                           instance_bdms=instance_bdms))
@@ -6399,8 +6479,16 @@ class ComputeManager(manager.Manager):
         compute_nodes_in_db = self._get_compute_nodes_in_db(context,
                                                             use_slave=True)
         nodenames = set(self.driver.get_available_nodes())
-        for nodename in nodenames:
-            self.update_available_resource_for_node(context, nodename)
+        if CONF.max_concurrent_resource_updates == 1 or len(nodenames) < 2:
+            for nodename in nodenames:
+                self.update_available_resource_for_node(context, nodename)
+        else:
+            pool = eventlet.GreenPool(
+                CONF.max_concurrent_resource_updates or len(nodenames))
+            for nodename in nodenames:
+                pool.spawn_n(self.update_available_resource_for_node,
+                             context, nodename)
+            pool.waitall()
 
         self._resource_tracker_dict = {
             k: v for k, v in self._resource_tracker_dict.items()
@@ -81,6 +81,9 @@ class ResourceTracker(object):
         self.stats = importutils.import_object(CONF.compute_stats_class)
         self.tracked_instances = {}
         self.tracked_migrations = {}
+        # Bumped by the operations changing the instances or migrations
+        # accounted on this node, see update_available_resource().
+        self.usage_generation = 0
         monitor_handler = monitors.MonitorHandler(self)
         self.monitors = monitor_handler.monitors
         self.old_resources = objects.ComputeNode()
@@ -123,6 +126,8 @@ class ResourceTracker(object):
                             "until resources have been claimed."),
                         instance=instance)
 
+        self.usage_generation += 1
+
         # get the overhead required to build this instance:
         overhead = self.driver.estimate_instance_overhead(instance)
         LOG.debug("Memory overhead for %(flavor)d MB instance; %(overhead)d "
@@ -198,6 +203,7 @@ class ResourceTracker(object):
         resources after the compute operation is finished.
         """
         image_meta = image_meta or {}
+        self.usage_generation += 1
         if migration:
             self._claim_existing_migration(migration)
         else:
@@ -333,6 +339,7 @@ class ResourceTracker(object):
     @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
     def abort_instance_claim(self, context, instance):
         """Remove usage from the given instance."""
+        self.usage_generation += 1
         self._update_usage_from_instance(context, instance, is_removed=True)
 
         instance.clear_numa_topology()
@@ -344,6 +351,7 @@ class ResourceTracker(object):
     def drop_move_claim(self, context, instance, instance_type=None,
                         prefix='new_'):
         """Remove usage for an incoming/outgoing migration."""
+        self.usage_generation += 1
         if instance['uuid'] in self.tracked_migrations:
             migration, itype = self.tracked_migrations.pop(instance['uuid'])
 
@@ -384,6 +392,7 @@ class ResourceTracker(object):
         # don't update usage for this instance unless it submitted a resource
         # claim first:
         if uuid in self.tracked_instances:
+            self.usage_generation += 1
             self._update_usage_from_instance(context, instance)
             self._update(context.elevated())
 
@@ -512,7 +521,44 @@ class ResourceTracker(object):
 
         self._report_hypervisor_resource_view(resources)
 
-        self._update_available_resource(context, resources)
+        if self.disabled:
+            # The compute node is not initialised yet. Nothing is gathered
+            # until it is, as there is nothing to audit if the tracker stays
+            # disabled.
+            self._update_available_resource(context, resources)
+            return
+
+        # NOTE: The instances, migrations, per instance usage and metrics
+        # are gathered before taking COMPUTE_RESOURCE_SEMAPHORE, so that
+        # claims do not queue behind these database queries and driver
+        # calls. The generation tells whether a claim or usage update ran
+        # in the meantime, in which case the instances and migrations are
+        # listed again while holding the semaphore.
+        self._update_available_resource(context, resources,
+                                        self._gather_audit_data(context))
+
+    def _gather_audit_data(self, context):
+        """Returns the usage generation, the instances and migrations, the
+        per instance usage and the metrics the audit is based on.
+        """
+        generation = self.usage_generation
+        instances, migrations = self._get_instances_and_migrations(context)
+        usage = self.driver.get_per_instance_usage()
+        metrics = self._get_host_metrics(context, self.nodename)
+        return generation, instances, migrations, usage, metrics
+
+    def _get_instances_and_migrations(self, context):
+        """Returns the instances and the in-progress migrations of the node.
+        """
+        instances = objects.InstanceList.get_by_host_and_node(
+            context, self.host, self.nodename,
+            expected_attrs=['system_metadata',
+                            'numa_topology',
+                            'flavor', 'migration_context'])
+        migrations = objects.MigrationList.get_in_progress_by_host_and_node(
+                context, self.host, self.nodename)
+        self._pair_instances_to_migrations(migrations, instances)
+        return instances, migrations
 
     def _pair_instances_to_migrations(self, migrations, instances):
         instance_by_uuid = {inst.uuid: inst for inst in instances}
@@ -529,7 +575,8 @@ class ResourceTracker(object):
                           {'uuid': migration.instance_uuid})
 
     @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
-    def _update_available_resource(self, context, resources):
+    def _update_available_resource(self, context, resources,
+                                   audit_data=None):
 
         # initialise the compute node object, creating it
         # if it does not already exist.
@@ -540,26 +587,25 @@ class ResourceTracker(object):
         if self.disabled:
             return
 
-        # Grab all instances assigned to this node:
-        instances = objects.InstanceList.get_by_host_and_node(
-            context, self.host, self.nodename,
-            expected_attrs=['system_metadata',
-                            'numa_topology',
-                            'flavor', 'migration_context'])
+        if audit_data is None:
+            audit_data = self._gather_audit_data(context)
+        generation, instances, migrations, usage, metrics = audit_data
+        if generation != self.usage_generation:
+            # Instances or migrations were claimed or dropped since they
+            # were listed, their usage would be lost with the stale lists.
+            LOG.debug("Resources were claimed on node %(node)s during the "
+                      "audit, listing its instances and migrations again",
+                      {'node': self.nodename})
+            instances, migrations = self._get_instances_and_migrations(
+                context)
 
         # Now calculate usage based on instance utilization:
         self._update_usage_from_instances(context, instances)
-
-        # Grab all in-progress migrations:
-        migrations = objects.MigrationList.get_in_progress_by_host_and_node(
-                context, self.host, self.nodename)
-
-        self._pair_instances_to_migrations(migrations, instances)
         self._update_usage_from_migrations(context, migrations)
 
         # Detect and account for orphaned instances that may exist on the
         # hypervisor, but are not in the DB:
-        orphans = self._find_orphaned_instances()
+        orphans = self._find_orphaned_instances(usage)
         self._update_usage_from_orphans(orphans)
 
         # NOTE(yjiang5): Because pci device tracker status is not cleared in
@@ -572,7 +618,6 @@ class ResourceTracker(object):
 
         self._report_final_resource_view()
 
-        metrics = self._get_host_metrics(context, self.nodename)
         # TODO(pmurray): metrics should not be a json string in ComputeNode,
         # but it is. This should be changed in ComputeNode
         self.compute_node.metrics = jsonutils.dumps(metrics)
@@ -895,7 +940,7 @@ class ResourceTracker(object):
         self.compute_node.free_ram_mb = max(0, self.compute_node.free_ram_mb)
         self.compute_node.free_disk_gb = max(0, self.compute_node.free_disk_gb)
 
-    def _find_orphaned_instances(self):
+    def _find_orphaned_instances(self, usage):
         """Given the set of instances and migrations already account for
         by resource tracker, sanity check the hypervisor to determine
         if there are any "orphaned" instances left hanging around.
@@ -903,12 +948,13 @@ class ResourceTracker(object):
         Orphans could be consuming memory and should be accounted for in
         usage calculations to guard against potential out of memory
         errors.
+
+        :param usage: the per instance usage reported by the virt driver
         """
         uuids1 = frozenset(self.tracked_instances.keys())
         uuids2 = frozenset(self.tracked_migrations.keys())
         uuids = uuids1 | uuids2
 
-        usage = self.driver.get_per_instance_usage()
         vuuids = frozenset(usage.keys())
 
         orphan_uuids = vuuids - uuids
@@ -217,6 +217,14 @@ compute_manager_opts = [
                 default=False,
                 help="Generate periodic compute.instance.exists"
                      " notifications"),
+    cfg.IntOpt('instance_usage_audit_batch_size',
+               default=0,
+               min=0,
+               help="Number of instances whose metadata, network info and "
+                    "flavor are loaded at once to generate the periodic "
+                    "compute.instance.exists notifications. With 0, they "
+                    "are loaded for all the instances of the audit period "
+                    "at once."),
     cfg.IntOpt('live_migration_retry_count',
                default=30,
                help="Number of 1 second retries needed in live_migration"),
@@ -238,6 +246,14 @@ compute_manager_opts = [
                     'is not recommended that you change this unless you are '
                     'very sure that doing so is safe and stable in your '
                     'environment.'),
+    cfg.IntOpt('max_concurrent_resource_updates',
+               default=1,
+               min=0,
+               help='Maximum number of compute nodes whose resources are '
+                    'updated concurrently by the update_available_resource '
+                    'periodic task. This is only useful with drivers that '
+                    'manage several nodes, like the ironic driver. Set to 0 '
+                    'to update all the nodes at once.'),
     cfg.IntOpt('block_device_allocate_retries',
                default=60,
                help='Number of times to retry block device '
@@ -99,6 +99,25 @@ Related options:
 * To use configuration drive with Hyper-V, you must set the qemu_img_cmd
   value in the hyperv configuration section to the full path to an qemu-img
   command installation.
+"""),
+    cfg.StrOpt('config_drive_iso9660_writer',
+        default='mkisofs',
+        choices=('mkisofs', 'builtin'),
+        help="""
+Tool used to write ISO 9660 configuration drives
+
+Possible values:
+
+* mkisofs: The metadata files are written to a temporary directory, which is
+  then turned into an ISO 9660 image by the 'mkisofs_cmd' program.
+* builtin: The ISO 9660 image, with Joliet extensions, is written directly
+  from the metadata in memory by nova, without any temporary file or
+  external program. Guests see the same files, but the image does not carry
+  Rock Ridge extensions.
+
+Related options:
+
+* This option is only used when config_drive_format is 'iso9660'.
 """),
 ]
 
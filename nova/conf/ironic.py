@@ -94,6 +94,30 @@ The number of seconds to wait before retrying the request.
 Related options:
 
 * api_max_retries
+"""),
+    cfg.IntOpt(
+        'node_cache_max_age',
+        default=0,
+        min=0,
+        help="""
+Maximum age, in seconds, of the node list cached by the driver for it to be
+used to report the power state of instances.
+
+The node list is refreshed every time the resources of the compute service
+are updated. When this is set, power state queries, like the ones of the
+power state sync periodic task, are answered from that list instead of
+with one Ironic API request per instance. Nodes which the driver itself
+changed since the list was fetched are still looked up in Ironic.
+
+Possible values:
+
+* 0 - Default, always ask Ironic for the node of the instance
+* Positive integer - Maximum age of the cached node list, which should be
+  at least the interval of the update_available_resource periodic task
+
+Related options:
+
+* update_resources_interval
 """),
 ]
 
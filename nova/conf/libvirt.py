@@ -288,6 +288,30 @@ libvirt version is 1.3.3.
 * Related options:
     None
 
+"""),
+    cfg.IntOpt('domain_cache_ttl',
+               default=0,
+               min=0,
+               help="""
+Maximum age, in seconds, of the in-memory cache of libvirt domains kept by
+the compute host.
+
+When enabled, domain handles and their running state are kept current from
+libvirt lifecycle events, so listing and looking up guests does not need a
+round trip to libvirtd each time. The whole cache is reconciled against
+libvirtd with a bulk listing once it is older than this value.
+
+* Possible values:
+    0 disables the cache. Any positive integer is the number of seconds
+    after which the cache is reconciled.
+
+* Services that use this:
+
+    ``nova-compute``
+
+* Related options:
+    None. The cache is only used if the libvirt connection supports
+    lifecycle events and bulk domain listing.
 """),
 ]
 
@@ -311,6 +335,17 @@ libvirt_imagebackend_opts = [
     cfg.StrOpt('images_rbd_ceph_conf',
                default='',  # default determined by librados
                help='Path to the ceph configuration file to use'),
+    cfg.BoolOpt('images_rbd_persistent_connections',
+                default=False,
+                help="""
+Keep the RADOS cluster connections used for rbd image operations open.
+
+By default a new connection to the ceph cluster is made, including the
+monitor handshake, for every rbd operation such as checking whether an image
+exists, getting its size or cloning it. If this is enabled, the connections
+and the RADOS pool I/O contexts opened on them are kept and reused by the
+next operations made by this service.
+"""),
     cfg.StrOpt('hw_disk_discard',
                choices=('ignore', 'unmap'),
                help='Discard option for nova managed disks. Need'
@@ -528,6 +528,19 @@ Possible values:
 
     The full path to the configuration file, or an empty string if there is no
     custom dnsmasq configuration file.
+"""),
+    cfg.BoolOpt("dnsmasq_coalesce_updates",
+            default=False,
+            help="""
+When this option is set to True, the dnsmasq host and option files of a
+network are written atomically, and only when their content changed, and
+dnsmasq is only reloaded when one of them changed. Updates requested while
+another one is running for the same network are coalesced into a single one,
+which reloads dnsmasq once for all of them.
+
+Related options:
+
+    dnsmasq_config_file
 """),
     cfg.StrOpt("linuxnet_interface_driver",
             default="nova.network.linux_net.LinuxBridgeInterfaceDriver",
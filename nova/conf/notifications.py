@@ -40,6 +40,41 @@ Possible values:
 * None - no notifications
 * "vm_state" - notifications on VM state changes
 * "vm_and_task_state" - notifications on VM and task state changes
+"""),
+
+    cfg.IntOpt(
+        'instance_update_notification_workers',
+        default=0,
+        min=0,
+        help="""
+Number of greenthreads building and sending the compute.instance.update
+notifications in the background.
+
+With 0, the notifications are built and sent by the code changing the instance,
+which waits for them. Otherwise, that code takes a full copy of the instance
+and queues the notification. The notifications of an instance are still sent
+in the order it changed, by one greenthread at a time.
+
+Related options:
+
+* notify_on_state_change
+* instance_update_notification_max_pending
+"""),
+
+    cfg.IntOpt(
+        'instance_update_notification_max_pending',
+        default=1000,
+        min=1,
+        help="""
+Maximum number of compute.instance.update notifications queued for the
+background greenthreads.
+
+When the queue is full, new notifications are dropped: they are logged with a
+warning and never sent, so consumers miss those instance changes.
+
+Related options:
+
+* instance_update_notification_workers
 """),
 
     cfg.BoolOpt(
@@ -760,6 +760,83 @@ soft_anti_affinity_weight_opt = cfg.FloatOpt(
                       'the opposite, which is soft-affinity.')
 
 
+host_state_snapshot_path_opt = cfg.StrOpt(
+        "scheduler_host_state_snapshot_path",
+        help="""
+Path of a file through which scheduler processes share their view of the
+compute hosts.
+
+When set, the scheduler process configured as the writer periodically dumps
+the compute nodes, services and instances it would use to build its host
+states into this file, and all other scheduler processes on the same host
+read their host states from it instead of querying the database on each
+request. A tmpfs location such as /dev/shm is recommended. Readers fall back
+to the database if the file is missing or out of date.
+
+Readers place instances using compute node resources which can be as old as
+``scheduler_host_state_snapshot_max_age``. Resources claimed in the meantime,
+by other schedulers or by earlier requests to the same scheduler, are not
+seen, so more scheduling attempts may land on hosts which turn out to be full
+and be retried.
+
+* Related options:
+
+    ``scheduler_host_state_snapshot_writer``
+    ``scheduler_host_state_snapshot_max_age``
+    ``scheduler_driver_task_period``, which is how often the writer refreshes
+    the file.
+""")
+
+host_state_snapshot_writer_opt = cfg.BoolOpt(
+        "scheduler_host_state_snapshot_writer",
+        default=False,
+        help="""
+Whether this scheduler process writes the host state snapshot. Exactly one
+scheduler process sharing a ``scheduler_host_state_snapshot_path`` should
+enable this.
+
+* Related options:
+
+    ``scheduler_host_state_snapshot_path``
+""")
+
+host_state_snapshot_max_age_opt = cfg.IntOpt(
+        "scheduler_host_state_snapshot_max_age",
+        min=1,
+        help="""
+Maximum age, in seconds, of a host state snapshot for it to be used by a
+reader. Older snapshots are ignored and the database is queried instead.
+Defaults to ``scheduler_driver_task_period``, which is how often the writer
+refreshes the snapshot.
+
+The larger this is, the older the resource usage readers may schedule with,
+and the more likely they are to pick hosts which were filled since, see
+``scheduler_host_state_snapshot_path``.
+
+* Related options:
+
+    ``scheduler_host_state_snapshot_path``
+    ``scheduler_driver_task_period``
+""")
+
+compact_instance_info_opt = cfg.BoolOpt("scheduler_compact_instance_info",
+        default=False,
+        help="""
+Keep a compact record of the instances on each host instead of the Instance
+objects.
+
+The scheduler keeps the instances of every host in memory for the filters and
+weighers which look at them. When this option is enabled, only the UUID and
+the instance_type_id of each instance are kept, which is all the in-tree
+filters and weighers use, reducing the memory used by the scheduler on large
+deployments. Out of tree filters or weighers reading other instance fields
+from HostState.instances will not work with this option enabled.
+
+* Related options:
+
+    ``scheduler_tracks_instance_changes``
+""")
+
 default_opts = [host_subset_size_opt,
                bm_default_filter_opt,
                use_bm_filters_opt,
@@ -785,6 +862,10 @@ default_opts = [host_subset_size_opt,
                scheduler_max_att_opt,
                soft_affinity_weight_opt,
                soft_anti_affinity_weight_opt,
+               host_state_snapshot_path_opt,
+               host_state_snapshot_writer_opt,
+               host_state_snapshot_max_age_opt,
+               compact_instance_info_opt,
               ]
 
 
@@ -127,7 +127,18 @@ vimutil_opts = [
                     'maximum. The server may still limit the count '
                     'to something less than the configured value. '
                     'Any remaining objects may be retrieved with '
-                    'additional requests.')
+                    'additional requests.'),
+    cfg.IntOpt('vm_cache_max_age',
+               default=0,
+               min=0,
+               help='Maximum age, in seconds, of the local copy of the '
+                    'power state, names and instance UUIDs of the virtual '
+                    'machines of vCenter. When set, these are kept up to '
+                    'date with a property collector and looked up locally, '
+                    'instead of being queried from vCenter for each use. '
+                    'The copy is always brought up to date after the driver '
+                    'runs a task, and vCenter is queried when updating it '
+                    'fails. 0 disables the local copy.')
 ]
 
 vmops_opts = [
@@ -129,6 +129,10 @@ class RequestContext(context.RequestContext):
         self.mq_connection = None
 
         self.user_auth_plugin = user_auth_plugin
+        # The policy results memoized by nova.policy.authorize() for this
+        # request, and the policy rules they were computed with.
+        self._policy_results = {}
+        self._policy_rules = None
         if self.is_admin is None:
             self.is_admin = policy.check_is_admin(self)
 
@@ -224,6 +228,9 @@ class RequestContext(context.RequestContext):
         # without changes
         context.roles = copy.deepcopy(self.roles)
         context.is_admin = True
+        # The credentials changed, don't share the memoized policy results
+        context._policy_results = {}
+        context._policy_rules = None
 
         if 'admin' not in context.roles:
             context.roles.append('admin')
@@ -945,6 +945,9 @@ def release_dhcp(dev, address, mac_address):
 
 
 def update_dhcp(context, dev, network_ref):
+    if CONF.dnsmasq_coalesce_updates:
+        _request_dnsmasq_update(context, dev, network_ref)
+        return
     conffile = _dhcp_file(dev, 'conf')
     host = None
     if network_ref['multi_host']:
@@ -957,6 +960,9 @@ def update_dhcp(context, dev, network_ref):
 
 
 def update_dns(context, dev, network_ref):
+    if CONF.dnsmasq_coalesce_updates:
+        _request_dnsmasq_update(context, dev, network_ref)
+        return
     hostsfile = _dhcp_file(dev, 'hosts')
     host = None
     if network_ref['multi_host']:
@@ -992,12 +998,89 @@ def restart_dhcp(context, dev, network_ref, fixedips):
     signal causing it to reload, otherwise spawn a new instance.
 
     """
-    conffile = _dhcp_file(dev, 'conf')
-
     optsfile = _dhcp_file(dev, 'opts')
     write_to_file(optsfile, get_dhcp_opts(context, network_ref, fixedips))
     os.chmod(optsfile, 0o644)
 
+    _start_or_reload_dnsmasq(dev, network_ref)
+
+
+# Number of dnsmasq updates requested so far, by device
+_dnsmasq_update_requests = {}
+# Number of requested dnsmasq updates covered by the last update, by device
+_dnsmasq_update_done = {}
+# Content last written to the dnsmasq files, by path
+_dnsmasq_files = {}
+
+
+def _request_dnsmasq_update(context, dev, network_ref):
+    """Updates the dnsmasq files of a network and reloads dnsmasq.
+
+    The request is numbered before waiting for the dnsmasq_start lock, so an
+    update reading the fixed IPs after that can tell it covers this request,
+    which is then skipped.
+    """
+    request = _dnsmasq_update_requests.get(dev, 0) + 1
+    _dnsmasq_update_requests[dev] = request
+    _update_dnsmasq(context, dev, network_ref, request)
+
+
+@utils.synchronized('dnsmasq_start')
+def _update_dnsmasq(context, dev, network_ref, request):
+    if _dnsmasq_update_done.get(dev, 0) >= request:
+        LOG.debug('dnsmasq update %(request)d for %(dev)s was coalesced '
+                  'into a later one', {'request': request, 'dev': dev})
+        return
+    covered = _dnsmasq_update_requests[dev]
+
+    host = None
+    if network_ref['multi_host']:
+        host = CONF.host
+    fixedips = objects.FixedIPList.get_by_network(context,
+                                                  network_ref,
+                                                  host=host)
+    conffile = _dhcp_file(dev, 'conf')
+    files = {conffile: get_dhcp_hosts(context, network_ref, fixedips),
+             _dhcp_file(dev, 'opts'): get_dhcp_opts(context, network_ref,
+                                                   fixedips)}
+    if network_ref['multi_host']:
+        files[_dhcp_file(dev, 'hosts')] = get_dns_hosts(context, network_ref)
+    changed = False
+    for path, data in files.items():
+        changed |= _write_dnsmasq_file(path, data)
+
+    pid = _dnsmasq_pid_for(dev)
+    if (changed or not pid or
+            not is_pid_cmdline_correct(pid, conffile.split('/')[-1])):
+        try:
+            _start_or_reload_dnsmasq(dev, network_ref)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                # Make sure the next update reloads dnsmasq
+                for path in files:
+                    _dnsmasq_files.pop(path, None)
+    _dnsmasq_update_done[dev] = covered
+
+
+def _write_dnsmasq_file(path, data):
+    """Atomically replaces a dnsmasq file, unless it already has the data.
+
+    Returns whether the file was written.
+    """
+    if _dnsmasq_files.get(path) == data and os.path.exists(path):
+        return False
+    tmp_path = '%s.tmp' % path
+    write_to_file(tmp_path, data)
+    # Make sure dnsmasq can actually read it (it setuid()s to "nobody")
+    os.chmod(tmp_path, 0o644)
+    os.rename(tmp_path, path)
+    _dnsmasq_files[path] = data
+    return True
+
+
+def _start_or_reload_dnsmasq(dev, network_ref):
+    conffile = _dhcp_file(dev, 'conf')
+
     _add_dhcp_mangle_rule(dev)
 
     # Make sure dnsmasq can actually read it (it setuid()s to "nobody")
@@ -1247,12 +1330,13 @@ def _create_veth_pair(dev1_name, dev2_name, mtu=None):
     for dev in [dev1_name, dev2_name]:
         delete_net_dev(dev)
 
-    utils.execute('ip', 'link', 'add', dev1_name, 'type', 'veth', 'peer',
-                  'name', dev2_name, run_as_root=True)
+    cmds = [['ip', 'link', 'add', dev1_name, 'type', 'veth', 'peer',
+             'name', dev2_name]]
+    for dev in [dev1_name, dev2_name]:
+        cmds.append(['ip', 'link', 'set', dev, 'up'])
+        cmds.append(['ip', 'link', 'set', dev, 'promisc', 'on'])
+    utils.execute_batch(cmds, run_as_root=True)
     for dev in [dev1_name, dev2_name]:
-        utils.execute('ip', 'link', 'set', dev, 'up', run_as_root=True)
-        utils.execute('ip', 'link', 'set', dev, 'promisc', 'on',
-                      run_as_root=True)
         _set_device_mtu(dev, mtu)
 
 
@@ -18,6 +18,7 @@
 the system.
 """
 
+import collections
 import datetime
 
 from oslo_context import context as common_context
@@ -30,6 +31,7 @@ import nova.conf
 import nova.context
 from nova import exception
 from nova.i18n import _LE
+from nova.i18n import _LW
 from nova.image import glance
 from nova import network
 from nova.network import model as network_model
@@ -130,20 +132,12 @@ def send_update(context, old_instance, new_instance, service="compute",
                 new_vm_state, old_task_state, new_task_state, service, host)
 
     else:
-        try:
-            old_display_name = None
-            if new_instance["display_name"] != old_instance["display_name"]:
-                old_display_name = old_instance["display_name"]
-            _send_instance_update_notification(context, new_instance,
-                    service=service, host=host,
-                    old_display_name=old_display_name)
-        except exception.InstanceNotFound:
-            LOG.debug('Failed to send instance update notification. The '
-                      'instance could not be found and was most likely '
-                      'deleted.', instance=new_instance)
-        except Exception:
-            LOG.exception(_LE("Failed to send state update notification"),
-                    instance=new_instance)
+        old_display_name = None
+        if new_instance["display_name"] != old_instance["display_name"]:
+            old_display_name = old_instance["display_name"]
+        _queue_instance_update_notification(context, new_instance,
+                service=service, host=host,
+                old_display_name=old_display_name)
 
 
 def send_update_with_states(context, instance, old_vm_state, new_vm_state,
@@ -175,18 +169,95 @@ def send_update_with_states(context, instance, old_vm_state, new_vm_state,
 
     if fire_update:
         # send either a state change or a regular notification
+        _queue_instance_update_notification(context, instance,
+                old_vm_state=old_vm_state, old_task_state=old_task_state,
+                new_vm_state=new_vm_state, new_task_state=new_task_state,
+                service=service, host=host)
+
+
+def _try_send_instance_update_notification(context, instance, **kwargs):
+    try:
+        _send_instance_update_notification(context, instance, **kwargs)
+    except exception.InstanceNotFound:
+        LOG.debug('Failed to send instance update notification. The '
+                  'instance could not be found and was most likely '
+                  'deleted.', instance=instance)
+    except Exception:
+        LOG.exception(_LE("Failed to send state update notification"),
+                instance=instance)
+
+
+class _InstanceUpdateNotificationQueue(object):
+    """Queue of the compute.instance.update notifications to send in the
+    background, see CONF.instance_update_notification_workers.
+
+    The notifications of an instance are queued together and sent in order
+    by a single greenthread at a time, so that consumers get them in the
+    order the instance changed. Greenthreads are only spawned while
+    notifications are queued, each one sends them until the queue is empty.
+    """
+
+    def __init__(self):
+        # {instance uuid: deque of (context, instance, kwargs)}
+        self._pending = {}
+        # The instance uuids of _pending not taken by a greenthread yet
+        self._ready = collections.deque()
+        self._count = 0
+        self._workers = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, context, instance, kwargs):
+        if self._count >= CONF.instance_update_notification_max_pending:
+            self.dropped += 1
+            LOG.warning(_LW('Too many instance update notifications are '
+                            'queued, dropping this one. %d were dropped '
+                            'so far.'), self.dropped, instance=instance)
+            return
+        # NOTE: The caller can change the instance once this returns, so the
+        # notification is built from a copy. obj_clone() is a deepcopy of
+        # the instance and its loaded fields, which is not free, but costs
+        # less than building the payload.
+        if isinstance(instance, obj_base.NovaObject):
+            instance = instance.obj_clone()
+        uuid = instance['uuid']
+        pending = self._pending.get(uuid)
+        if pending is None:
+            pending = self._pending[uuid] = collections.deque()
+            self._ready.append(uuid)
+        pending.append((context, instance, kwargs))
+        self._count += 1
+        if (self._ready and
+                self._workers < CONF.instance_update_notification_workers):
+            self._workers += 1
+            utils.spawn_n(self._send_pending)
+
+    def _send_pending(self):
         try:
-            _send_instance_update_notification(context, instance,
-                    old_vm_state=old_vm_state, old_task_state=old_task_state,
-                    new_vm_state=new_vm_state, new_task_state=new_task_state,
-                    service=service, host=host)
-        except exception.InstanceNotFound:
-            LOG.debug('Failed to send instance update notification. The '
-                      'instance could not be found and was most likely '
-                      'deleted.', instance=instance)
-        except Exception:
-            LOG.exception(_LE("Failed to send state update notification"),
-                    instance=instance)
+            while self._ready:
+                uuid = self._ready.popleft()
+                pending = self._pending[uuid]
+                # Notifications queued for this instance while sending are
+                # appended to pending, and sent by this greenthread only.
+                while pending:
+                    context, instance, kwargs = pending.popleft()
+                    self._count -= 1
+                    _try_send_instance_update_notification(context, instance,
+                                                           **kwargs)
+                    self.sent += 1
+                del self._pending[uuid]
+        finally:
+            self._workers -= 1
+
+
+_INSTANCE_UPDATE_NOTIFICATIONS = _InstanceUpdateNotificationQueue()
+
+
+def _queue_instance_update_notification(context, instance, **kwargs):
+    if CONF.instance_update_notification_workers:
+        _INSTANCE_UPDATE_NOTIFICATIONS.put(context, instance, kwargs)
+    else:
+        _try_send_instance_update_notification(context, instance, **kwargs)
 
 
 def _compute_states_payload(instance, old_vm_state=None,
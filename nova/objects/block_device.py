@@ -325,8 +325,9 @@ class BlockDeviceMappingList(base.ObjectListBase, base.NovaObject):
         )
 
     @classmethod
-    def bdms_by_instance_uuid(cls, context, instance_uuids):
-        bdms = cls.get_by_instance_uuids(context, instance_uuids)
+    def bdms_by_instance_uuid(cls, context, instance_uuids, use_slave=False):
+        bdms = cls.get_by_instance_uuids(context, instance_uuids,
+                                         use_slave=use_slave)
         return base.obj_make_dict_of_lists(
                 context, cls, bdms, 'instance_uuid')
 
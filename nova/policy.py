@@ -19,6 +19,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_policy import policy
 from oslo_utils import excutils
+import six
 
 from nova import exception
 from nova.i18n import _LE
@@ -28,6 +29,9 @@ from nova import policies
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 _ENFORCER = None
+# The types of target values for which policy results can be memoized.
+_MEMOIZED_TARGET_TYPES = six.string_types + six.integer_types + (
+    bool, float, type(None))
 
 
 def reset():
@@ -101,24 +105,73 @@ def authorize(context, action, target, do_raise=True, exc=None):
            do_raise is False.
     """
     init()
-    credentials = context.to_dict()
     if not exc:
         exc = exception.PolicyNotAuthorized
+    results, key = _get_memoized_results(context, action, target)
+    if key in results:
+        result = results[key]
+        if not result and do_raise:
+            raise exc(action=action)
+        return result
+    credentials = context.to_dict()
     try:
         result = _ENFORCER.authorize(action, target, credentials,
                                      do_raise=do_raise, exc=exc, action=action)
     except policy.PolicyNotRegistered:
         with excutils.save_and_reraise_exception():
             LOG.exception(_LE('Policy not registered'))
-    except Exception:
+    except Exception as e:
+        if key is not None and isinstance(e, exc):
+            _memoize_result(context, results, key, False)
         credentials.pop('auth_token', None)
         with excutils.save_and_reraise_exception():
             LOG.debug('Policy check for %(action)s failed with credentials '
                       '%(credentials)s',
                       {'action': action, 'credentials': credentials})
+    if key is not None:
+        _memoize_result(context, results, key, result)
     return result
 
 
+def _get_memoized_results(context, action, target):
+    """Returns the policy results memoized by a context and the key to use.
+
+    The results are kept on the request context, so they only live as long
+    as the request, and are dropped when the rules are set or reloaded from
+    the policy file. The key is None when the target can't be used as a
+    key, in which case nothing should be memoized.
+
+    The key only holds the user, project, admin flag and roles of the
+    context, not all the credentials the rules are checked against. The
+    other attributes of a context must not be changed once it was used for
+    a policy check; elevated() returns a context with its own results.
+    """
+    results = getattr(context, '_policy_results', None)
+    if not isinstance(results, dict) or not isinstance(target, dict):
+        return {}, None
+    if not all(isinstance(value, _MEMOIZED_TARGET_TYPES)
+               for value in target.values()):
+        return results, None
+    key = (action, frozenset(target.items()), context.user_id,
+           context.project_id, context.is_admin, tuple(context.roles))
+    if key in results:
+        # Enforcing a rule starts with this too, it reloads the rules if the
+        # policy file changed. Only needed here for a memoized result, the
+        # enforcer does it otherwise.
+        _ENFORCER.load_rules()
+        if context._policy_rules is not _ENFORCER.rules:
+            results.clear()
+    return results, key
+
+
+def _memoize_result(context, results, key, result):
+    # The enforcer loaded the rules the result was computed with.
+    if context._policy_rules is not _ENFORCER.rules:
+        results.clear()
+        context._policy_rules = _ENFORCER.rules
+    results[key] = result
+
+
 def check_is_admin(context):
     """Whether or not roles contains 'admin' role according to policy setting.
 
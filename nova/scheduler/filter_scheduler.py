@@ -117,15 +117,15 @@ class FilterScheduler(driver.Scheduler):
 
             LOG.debug("Filtered %(hosts)s", {'hosts': hosts})
 
+            # Only the scheduler_host_subset_size heaviest hosts are
+            # candidates, so there is no need to sort all of them.
+            scheduler_host_subset_size = max(1,
+                                             CONF.scheduler_host_subset_size)
             weighed_hosts = self.host_manager.get_weighed_hosts(hosts,
-                    spec_obj)
+                    spec_obj, limit=scheduler_host_subset_size)
 
             LOG.debug("Weighed %(hosts)s", {'hosts': weighed_hosts})
 
-            scheduler_host_subset_size = max(1,
-                                             CONF.scheduler_host_subset_size)
-            if scheduler_host_subset_size < len(weighed_hosts):
-                weighed_hosts = weighed_hosts[0:scheduler_host_subset_size]
             chosen_host = random.choice(weighed_hosts)
 
             LOG.debug("Selected host: %(host)s", {'host': chosen_host})
@@ -24,13 +24,22 @@ from nova.scheduler.filters import utils
 LOG = logging.getLogger(__name__)
 
 
+def _get_group_hosts(view, spec_obj):
+    """Returns the hosts of the instance group of a request."""
+    if view.group_hosts is None:
+        # The hosts of the group are loaded on first use
+        return spec_obj.instance_group.hosts
+    return view.group_hosts
+
+
 class DifferentHostFilter(filters.BaseHostFilter):
     """Schedule the instance on a different host from a set of instances."""
     # The hosts the instances are running on doesn't change within a request
     run_filter_once_per_request = True
 
     def host_passes(self, host_state, spec_obj):
-        affinity_uuids = spec_obj.get_scheduler_hint('different_host')
+        hints = utils.get_request_view(spec_obj).scheduler_hints
+        affinity_uuids = hints.get('different_host')
         if affinity_uuids:
             overlap = utils.instance_uuids_overlap(host_state, affinity_uuids)
             return not overlap
@@ -46,7 +55,8 @@ class SameHostFilter(filters.BaseHostFilter):
     run_filter_once_per_request = True
 
     def host_passes(self, host_state, spec_obj):
-        affinity_uuids = spec_obj.get_scheduler_hint('same_host')
+        hints = utils.get_request_view(spec_obj).scheduler_hints
+        affinity_uuids = hints.get('same_host')
         if affinity_uuids:
             overlap = utils.instance_uuids_overlap(host_state, affinity_uuids)
             return overlap
@@ -60,8 +70,9 @@ class SimpleCIDRAffinityFilter(filters.BaseHostFilter):
     run_filter_once_per_request = True
 
     def host_passes(self, host_state, spec_obj):
-        affinity_cidr = spec_obj.get_scheduler_hint('cidr', '/24')
-        affinity_host_addr = spec_obj.get_scheduler_hint('build_near_host_ip')
+        hints = utils.get_request_view(spec_obj).scheduler_hints
+        affinity_cidr = hints.get('cidr', '/24')
+        affinity_host_addr = hints.get('build_near_host_ip')
         host_ip = host_state.host_ip
         if affinity_host_addr:
             affinity_net = netaddr.IPNetwork(str.join('', (affinity_host_addr,
@@ -78,19 +89,17 @@ class _GroupAntiAffinityFilter(filters.BaseHostFilter):
     hosts.
     """
     def host_passes(self, host_state, spec_obj):
+        view = utils.get_request_view(spec_obj)
         # Only invoke the filter if 'anti-affinity' is configured
-        policies = (spec_obj.instance_group.policies
-                    if spec_obj.instance_group else [])
-        if self.policy_name not in policies:
+        if self.policy_name not in view.group_policies:
             return True
         # NOTE(hanrong): Move operations like resize can check the same source
         # compute node where the instance is. That case, AntiAffinityFilter
         # must not return the source as a non-possible destination.
-        if spec_obj.instance_uuid in host_state.instances.keys():
+        if view.instance_uuid in host_state.instances.keys():
             return True
 
-        group_hosts = (spec_obj.instance_group.hosts
-                       if spec_obj.instance_group else [])
+        group_hosts = _get_group_hosts(view, spec_obj)
         LOG.debug("Group anti affinity: check if %(host)s not "
                   "in %(configured)s", {'host': host_state.host,
                                         'configured': group_hosts})
@@ -111,14 +120,12 @@ class _GroupAffinityFilter(filters.BaseHostFilter):
     """Schedule the instance on to host from a set of group hosts.
     """
     def host_passes(self, host_state, spec_obj):
+        view = utils.get_request_view(spec_obj)
         # Only invoke the filter if 'affinity' is configured
-        policies = (spec_obj.instance_group.policies
-                    if spec_obj.instance_group else [])
-        if self.policy_name not in policies:
+        if self.policy_name not in view.group_policies:
             return True
 
-        group_hosts = (spec_obj.instance_group.hosts
-                       if spec_obj.instance_group else [])
+        group_hosts = _get_group_hosts(view, spec_obj)
         LOG.debug("Group affinity: check if %(host)s in "
                   "%(configured)s", {'host': host_state.host,
                                      'configured': group_hosts})
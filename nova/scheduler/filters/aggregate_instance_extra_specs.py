@@ -33,30 +33,42 @@ class AggregateInstanceExtraSpecsFilter(filters.BaseHostFilter):
     # Aggregate data and instance type does not change within a request
     run_filter_once_per_request = True
 
+    @staticmethod
+    def _compile_extra_specs(extra_specs):
+        """Parse the aggregate scoped extra specs once per request.
+
+        :returns: a list of (key, req, matcher) tuples
+        """
+        compiled = []
+        for key, req in six.iteritems(extra_specs):
+            # Either not scope format, or aggregate_instance_extra_specs scope
+            scope = key.split(':', 1)
+            if len(scope) > 1:
+                if scope[0] != _SCOPE:
+                    continue
+                else:
+                    del scope[0]
+            compiled.append((scope[0], req, extra_specs_ops.get_matcher(req)))
+        return compiled
+
     def host_passes(self, host_state, spec_obj):
         """Return a list of hosts that can create instance_type
 
         Check that the extra specs associated with the instance type match
         the metadata provided by aggregates.  If not present return False.
         """
-        instance_type = spec_obj.flavor
+        extra_specs = utils.get_request_view(spec_obj).extra_specs
         # If 'extra_specs' is not present or extra_specs are empty then we
         # need not proceed further
-        if (not instance_type.obj_attr_is_set('extra_specs')
-                or not instance_type.extra_specs):
+        if not extra_specs:
             return True
 
+        compiled = utils.get_compiled_for_request(
+            spec_obj, 'aggregate_instance_extra_specs', extra_specs,
+            self._compile_extra_specs)
         metadata = utils.aggregate_metadata_get_by_host(host_state)
 
-        for key, req in six.iteritems(instance_type.extra_specs):
-            # Either not scope format, or aggregate_instance_extra_specs scope
-            scope = key.split(':', 1)
-            if len(scope) > 1:
-                if scope[0] != _SCOPE:
-                    continue
-                else:
-                    del scope[0]
-            key = scope[0]
+        for key, req, matcher in compiled:
             aggregate_vals = metadata.get(key, None)
             if not aggregate_vals:
                 LOG.debug("%(host_state)s fails instance_type extra_specs "
@@ -64,7 +76,7 @@ class AggregateInstanceExtraSpecsFilter(filters.BaseHostFilter):
                     {'host_state': host_state, 'key': key})
                 return False
             for aggregate_val in aggregate_vals:
-                if extra_specs_ops.match(aggregate_val, req):
+                if matcher(aggregate_val):
                     break
             else:
                 LOG.debug("%(host_state)s fails instance_type extra_specs "
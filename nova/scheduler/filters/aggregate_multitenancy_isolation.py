@@ -38,10 +38,9 @@ class AggregateMultiTenancyIsolation(filters.BaseHostFilter):
         """
         tenant_id = spec_obj.project_id
 
-        metadata = utils.aggregate_metadata_get_by_host(host_state,
-                                                        key="filter_tenant_id")
+        metadata = utils.aggregate_metadata_get_by_host(host_state)
 
-        if metadata != {}:
+        if "filter_tenant_id" in metadata:
             configured_tenant_ids = metadata.get("filter_tenant_id")
             if configured_tenant_ids:
                 if tenant_id not in configured_tenant_ids:
@@ -41,8 +41,7 @@ class AvailabilityZoneFilter(filters.BaseHostFilter):
         if not availability_zone:
             return True
 
-        metadata = utils.aggregate_metadata_get_by_host(
-                host_state, key='availability_zone')
+        metadata = utils.aggregate_metadata_get_by_host(host_state)
 
         if 'availability_zone' in metadata:
             hosts_passes = availability_zone in metadata['availability_zone']
@@ -19,6 +19,7 @@ import six
 
 from nova.scheduler import filters
 from nova.scheduler.filters import extra_specs_ops
+from nova.scheduler.filters import utils
 
 
 LOG = logging.getLogger(__name__)
@@ -64,14 +65,14 @@ class ComputeCapabilitiesFilter(filters.BaseHostFilter):
                 return None
         return cap
 
-    def _satisfies_extra_specs(self, host_state, instance_type):
-        """Check that the host_state provided by the compute service
-        satisfies the extra specs associated with the instance type.
-        """
-        if 'extra_specs' not in instance_type:
-            return True
+    @staticmethod
+    def _compile_extra_specs(extra_specs):
+        """Parse the capabilities scoped extra specs once per request.
 
-        for key, req in six.iteritems(instance_type.extra_specs):
+        :returns: a list of (scope, req, matcher) tuples
+        """
+        compiled = []
+        for key, req in six.iteritems(extra_specs):
             # Either not scope format, or in capabilities scope
             scope = key.split(':')
             if len(scope) > 1:
@@ -79,12 +80,27 @@ class ComputeCapabilitiesFilter(filters.BaseHostFilter):
                     continue
                 else:
                     del scope[0]
+            compiled.append((scope, req, extra_specs_ops.get_matcher(req)))
+        return compiled
+
+    def _satisfies_extra_specs(self, host_state, spec_obj):
+        """Check that the host_state provided by the compute service
+        satisfies the extra specs associated with the instance type.
+        """
+        extra_specs = utils.get_request_view(spec_obj).extra_specs
+        if not extra_specs:
+            return True
+
+        compiled = utils.get_compiled_for_request(
+            spec_obj, 'compute_capabilities', extra_specs,
+            self._compile_extra_specs)
 
+        for scope, req, matcher in compiled:
             cap = self._get_capabilities(host_state, scope)
             if cap is None:
                 return False
 
-            if not extra_specs_ops.match(str(cap), req):
+            if not matcher(str(cap)):
                 LOG.debug("%(host_state)s fails extra_spec requirements. "
                           "'%(req)s' does not match '%(cap)s'",
                           {'host_state': host_state, 'req': req,
@@ -94,9 +110,7 @@ class ComputeCapabilitiesFilter(filters.BaseHostFilter):
 
     def host_passes(self, host_state, spec_obj):
         """Return a list of hosts that can create instance_type."""
-        instance_type = spec_obj.flavor
-        if not self._satisfies_extra_specs(host_state,
-                instance_type):
+        if not self._satisfies_extra_specs(host_state, spec_obj):
             LOG.debug("%(host_state)s fails instance_type extra_specs "
                       "requirements", {'host_state': host_state})
             return False
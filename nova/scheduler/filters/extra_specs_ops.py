@@ -35,7 +35,12 @@ op_methods = {'=': lambda x, y: float(x) >= float(y),
                's>=': operator.ge}
 
 
-def match(value, req):
+def get_matcher(req):
+    """Parse an extra spec requirement once.
+
+    Returns a callable taking the value to test, which behaves exactly
+    like match(value, req) without parsing req again on every call.
+    """
     words = req.split()
 
     op = method = None
@@ -44,24 +49,22 @@ def match(value, req):
         method = op_methods.get(op)
 
     if op != '<or>' and not method:
-        return value == req
-
-    if value is None:
-        return False
+        return lambda value: value == req
 
     if op == '<or>':  # Ex: <or> v1 <or> v2 <or> v3
-        while True:
-            if words.pop(0) == value:
-                return True
-            if not words:
-                break
-            words.pop(0)  # remove a keyword <or>
-            if not words:
-                break
-        return False
+        # Every other word is a keyword <or>
+        choices = words[::2]
+        return lambda value: value is not None and value in choices
 
-    if words:
-        if op == '<all-in>':  # requires a list not a string
-            return method(value, words)
-        return method(value, words[0])
-    return False
+    if not words:
+        return lambda value: False
+
+    if op == '<all-in>':  # requires a list not a string
+        operand = words
+    else:
+        operand = words[0]
+    return lambda value: value is not None and method(value, operand)
+
+
+def match(value, req):
+    return get_matcher(req)(value)
@@ -23,6 +23,7 @@ from nova.compute import arch
 from nova.compute import hv_type
 from nova.compute import vm_mode
 from nova.scheduler import filters
+from nova.scheduler.filters import utils
 
 
 LOG = logging.getLogger(__name__)
@@ -101,7 +102,7 @@ class ImagePropertiesFilter(filters.BaseHostFilter):
         Returns True for compute nodes that satisfy image properties
         contained in the request_spec.
         """
-        image_props = spec_obj.image.properties if spec_obj.image else {}
+        image_props = utils.get_request_view(spec_obj).image_props
 
         if not self._instance_supported(host_state, image_props,
                                         host_state.hypervisor_version):
@@ -20,6 +20,7 @@ from oslo_serialization import jsonutils
 import six
 
 from nova.scheduler import filters
+from nova.scheduler.filters import utils
 
 
 class JsonFilter(filters.BaseHostFilter):
@@ -94,50 +95,78 @@ class JsonFilter(filters.BaseHostFilter):
         HostState class.  If $variable is a dictionary, you may
         use: $variable.dictkey
         """
+        return self._compile_string(string)(host_state)
+
+    def _process_filter(self, query, host_state):
+        """Recursively parse the query structure."""
+        return self._compile_filter(query)(host_state)
+
+    def _compile_string(self, string):
+        """Returns a callable looking up a string argument for a host,
+        see _parse_string().
+        """
         if not string:
-            return None
+            return lambda host_state: None
         if not string.startswith("$"):
-            return string
+            return lambda host_state: string
 
         path = string[1:].split(".")
-        obj = getattr(host_state, path[0], None)
-        if obj is None:
-            return None
-        for item in path[1:]:
-            obj = obj.get(item, None)
+        attr = path[0]
+        keys = path[1:]
+
+        def lookup(host_state):
+            obj = getattr(host_state, attr, None)
             if obj is None:
                 return None
-        return obj
-
-    def _process_filter(self, query, host_state):
-        """Recursively parse the query structure."""
+            for item in keys:
+                obj = obj.get(item, None)
+                if obj is None:
+                    return None
+            return obj
+        return lookup
+
+    def _compile_filter(self, query):
+        """Compile the query structure into a callable taking a host
+        state, so that the query is only walked once per request.
+        """
         if not query:
-            return True
-        cmd = query[0]
-        method = self.commands[cmd]
-        cooked_args = []
+            return lambda host_state: True
+        method = self.commands[query[0]]
+        getters = []
         for arg in query[1:]:
             if isinstance(arg, list):
-                arg = self._process_filter(arg, host_state)
+                getters.append(self._compile_filter(arg))
             elif isinstance(arg, six.string_types):
-                arg = self._parse_string(arg, host_state)
-            if arg is not None:
-                cooked_args.append(arg)
-        result = method(self, cooked_args)
-        return result
+                getters.append(self._compile_string(arg))
+            elif arg is not None:
+                getters.append(lambda host_state, arg=arg: arg)
+
+        def evaluate(host_state):
+            cooked_args = []
+            for getter in getters:
+                arg = getter(host_state)
+                if arg is not None:
+                    cooked_args.append(arg)
+            return method(self, cooked_args)
+        return evaluate
+
+    def _compile_query(self, query):
+        return self._compile_filter(jsonutils.loads(query))
 
     def host_passes(self, host_state, spec_obj):
         """Return a list of hosts that can fulfill the requirements
         specified in the query.
         """
-        query = spec_obj.get_scheduler_hint('query')
+        query = utils.get_request_view(spec_obj).scheduler_hints.get('query')
         if not query:
             return True
 
         # NOTE(comstud): Not checking capabilities or service for
         # enabled/disabled so that a provided json filter can decide
 
-        result = self._process_filter(jsonutils.loads(query), host_state)
+        compiled = utils.get_compiled_for_request(
+            spec_obj, 'json_filter_query', query, self._compile_query)
+        result = compiled(host_state)
         if isinstance(result, list):
             # If any succeeded, include the host
             result = any(result)
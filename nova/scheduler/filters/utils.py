@@ -15,6 +15,8 @@
 """Bench of utility methods used by filters."""
 
 import collections
+import contextlib
+import copy
 
 from oslo_log import log as logging
 import six
@@ -23,9 +25,27 @@ from nova.i18n import _LI
 
 LOG = logging.getLogger(__name__)
 
+# Flattened view of a RequestSpec, with what the filters read from it.
+# 'extra_specs', 'image_props' and 'scheduler_hints' are dicts, which must not
+# be modified, of the flavor extra specs, of the image properties which are
+# set and of the scheduler hints as returned by
+# RequestSpec.get_scheduler_hint(). 'group_policies' is a tuple and
+# 'group_hosts' a frozenset, or None if the hosts of the group are not loaded.
+RequestView = collections.namedtuple('RequestView',
+                                     ['instance_uuid', 'extra_specs',
+                                      'image_props', 'scheduler_hints',
+                                      'group_policies', 'group_hosts'])
+
 
 def aggregate_values_from_key(host_state, key_name):
-    """Returns a set of values based on a metadata key for a specific host."""
+    """Returns a set of values based on a metadata key for a specific host.
+
+    The set must not be changed, it is shared when the host state has an
+    aggregates view.
+    """
+    view = getattr(host_state, 'aggregates_view', None)
+    if view is not None:
+        return view.values.get(key_name, frozenset())
     aggrlist = host_state.aggregates
     return {aggr.metadata[key_name]
               for aggr in aggrlist
@@ -36,8 +56,20 @@ def aggregate_values_from_key(host_state, key_name):
 def aggregate_metadata_get_by_host(host_state, key=None):
     """Returns a dict of all metadata based on a metadata key for a specific
     host. If the key is not provided, returns a dict of all metadata.
+
+    The dict and its sets must not be changed. Without a key, they are the
+    read-only ones of the aggregates view of the host state if it has one.
+    """
+    view = getattr(host_state, 'aggregates_view', None)
+    if view is not None and key is None:
+        return view.metadata
+    return merge_aggregate_metadata(host_state.aggregates, key=key)
+
+
+def merge_aggregate_metadata(aggrlist, key=None):
+    """Returns a dict of sets of all metadata values of the given aggregates,
+    restricted to the aggregates having the key if one is provided.
     """
-    aggrlist = host_state.aggregates
     metadata = collections.defaultdict(set)
     for aggr in aggrlist:
         if key is None or key in aggr.metadata:
@@ -46,6 +78,79 @@ def aggregate_metadata_get_by_host(host_state, key=None):
     return metadata
 
 
+def get_compiled_for_request(spec_obj, name, source, compile_func):
+    """Returns compile_func(source), compiled only once per request.
+
+    The compiled form is cached on the RequestSpec under the given name, so
+    that filters can parse scheduler hints or extra specs once per request
+    instead of once per host. It is compiled again if the source changed
+    since it was cached.
+    """
+    cache = getattr(spec_obj, '_compiled_filter_cache', None)
+    if cache is None:
+        cache = {}
+        setattr(spec_obj, '_compiled_filter_cache', cache)
+    cached = cache.get(name)
+    if cached is not None and cached[0] == source:
+        return cached[1]
+    compiled = compile_func(source)
+    cache[name] = (copy.copy(source), compiled)
+    return compiled
+
+
+def build_request_view(spec_obj):
+    """Returns a RequestView of a RequestSpec."""
+    def _get(obj, name):
+        return getattr(obj, name) if obj.obj_attr_is_set(name) else None
+
+    flavor = _get(spec_obj, 'flavor')
+    extra_specs = _get(flavor, 'extra_specs') if flavor else None
+    image = _get(spec_obj, 'image')
+    image_props = {}
+    if image and image.obj_attr_is_set('properties'):
+        props = image.properties
+        image_props = {name: getattr(props, name) for name in props.fields
+                       if props.obj_attr_is_set(name)}
+    scheduler_hints = {}
+    for name, value in six.iteritems(_get(spec_obj, 'scheduler_hints') or {}):
+        if isinstance(value, list) and len(value) == 1:
+            value = value[0]
+        scheduler_hints[name] = value
+    group = _get(spec_obj, 'instance_group')
+    group_policies = tuple(group.policies) if group else ()
+    group_hosts = None
+    if group and group.obj_attr_is_set('hosts'):
+        group_hosts = frozenset(group.hosts or [])
+    return RequestView(_get(spec_obj, 'instance_uuid'),
+                       dict(extra_specs or {}), image_props, scheduler_hints,
+                       group_policies, group_hosts)
+
+
+def get_request_view(spec_obj):
+    """Returns a RequestView of a RequestSpec.
+
+    Within request_view(), this is the view built when entering it, else
+    the view is built on each call.
+    """
+    view = getattr(spec_obj, '_filter_request_view', None)
+    if view is None:
+        view = build_request_view(spec_obj)
+    return view
+
+
+@contextlib.contextmanager
+def request_view(spec_obj):
+    """Builds the RequestView of a RequestSpec once, while filtering hosts.
+
+    The RequestSpec must not be modified within this.
+    """
+    spec_obj._filter_request_view = build_request_view(spec_obj)
+    try:
+        yield
+    finally:
+        del spec_obj._filter_request_view
+
+
 def validate_num_values(vals, default=None, cast_to=int, based_on=min):
     """Returns a correctly casted value based on a set of values.
 
@@ -38,6 +38,8 @@ from nova.i18n import _LI, _LW
 from nova import objects
 from nova.pci import stats as pci_stats
 from nova.scheduler import filters
+from nova.scheduler.filters import utils as filters_utils
+from nova.scheduler import host_state_snapshot
 from nova.scheduler import weights
 from nova import utils
 from nova.virt import hardware
@@ -48,6 +50,30 @@ CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 HOST_INSTANCE_SEMAPHORE = "host_instance"
 
+# Precomputed view of the aggregates a host belongs to. 'metadata' is the
+# merged aggregate metadata of the host as returned by
+# filters.utils.aggregate_metadata_get_by_host() and 'values' maps each
+# metadata key to the set of its unsplit values, as returned by
+# filters.utils.aggregate_values_from_key(). Both are read-only mappings of
+# frozensets.
+HostAggregatesView = collections.namedtuple('HostAggregatesView',
+                                            ['aggregates', 'metadata',
+                                             'values'])
+
+# Record of an instance kept in HostState.instances instead of the Instance
+# object when CONF.scheduler_compact_instance_info is set, with the fields
+# used by the in-tree filters and weighers.
+HostInstance = collections.namedtuple('HostInstance',
+                                      ['uuid', 'instance_type_id'])
+
+
+def compact_instance(instance):
+    """Returns what HostState.instances keeps of an instance."""
+    if (not CONF.scheduler_compact_instance_info or
+            isinstance(instance, HostInstance)):
+        return instance
+    return HostInstance(instance.uuid, instance.instance_type_id)
+
 
 class ReadOnlyDict(IterableUserDict):
     """A read-only dict."""
@@ -106,6 +132,19 @@ class HostState(object):
     previously used and lock down access.
     """
 
+    # There is one HostState per compute node, which adds up with large
+    # numbers of (ironic) nodes, so do not give each of them a __dict__.
+    __slots__ = ('host', 'nodename', '_lock_name',
+                 'total_usable_ram_mb', 'total_usable_disk_gb',
+                 'disk_mb_used', 'free_ram_mb', 'free_disk_mb',
+                 'vcpus_total', 'vcpus_used', 'pci_stats', 'numa_topology',
+                 'num_instances', 'num_io_ops', 'host_ip', 'hypervisor_type',
+                 'hypervisor_version', 'hypervisor_hostname', 'cpu_info',
+                 'supported_instances', 'limits', 'metrics', 'aggregates',
+                 'aggregates_view', 'instances', 'ram_allocation_ratio',
+                 'cpu_allocation_ratio', 'disk_allocation_ratio', 'updated',
+                 'service', 'stats', '__weakref__')
+
     def __init__(self, host, node):
         self.host = host
         self.nodename = node
@@ -143,6 +182,8 @@ class HostState(object):
 
         # List of aggregates the host belongs to
         self.aggregates = []
+        # HostAggregatesView of the aggregates, if precomputed
+        self.aggregates_view = None
 
         # Instances on this host
         self.instances = {}
@@ -155,11 +196,12 @@ class HostState(object):
         self.updated = None
 
     def update(self, compute=None, service=None, aggregates=None,
-            inst_dict=None):
+            inst_dict=None, aggregates_view=None):
         """Update all information about a host."""
 
         @utils.synchronized(self._lock_name)
-        def _locked_update(self, compute, service, aggregates, inst_dict):
+        def _locked_update(self, compute, service, aggregates, inst_dict,
+                           aggregates_view):
             # Scheduler API is inherently multi-threaded as every incoming RPC
             # message will be dispatched in it's own green thread. So the
             # shared host state should be updated in a consistent way to make
@@ -170,14 +212,20 @@ class HostState(object):
             if aggregates is not None:
                 LOG.debug("Update host state with aggregates: %s", aggregates)
                 self.aggregates = aggregates
+                self.aggregates_view = aggregates_view
             if service is not None:
                 LOG.debug("Update host state with service dict: %s", service)
-                self.service = ReadOnlyDict(service)
+                # The nodes of a host can share the same read-only service
+                # dict, see HostManager.get_all_host_states().
+                if not isinstance(service, ReadOnlyDict):
+                    service = ReadOnlyDict(service)
+                self.service = service
             if inst_dict is not None:
                 LOG.debug("Update host state with instances: %s", inst_dict)
                 self.instances = inst_dict
 
-        return _locked_update(self, compute, service, aggregates, inst_dict)
+        return _locked_update(self, compute, service, aggregates, inst_dict,
+                              aggregates_view)
 
     def _update_from_compute_node(self, compute):
         """Update information about a host from a ComputeNode object."""
@@ -343,7 +391,18 @@ class HostManager(object):
         # Dict of set of aggregate IDs keyed by the name of the host belonging
         # to those aggregates
         self.host_aggregates_map = collections.defaultdict(set)
+        # Dict of HostAggregatesView keyed by host name, computed on demand
+        # and dropped whenever the aggregates of the host change
+        self._host_aggregates_views = {}
         self._init_aggregates()
+        self._host_state_snapshot_reader = None
+        if (CONF.scheduler_host_state_snapshot_path and
+                not CONF.scheduler_host_state_snapshot_writer):
+            self._host_state_snapshot_reader = (
+                host_state_snapshot.HostStateSnapshotReader(
+                    CONF.scheduler_host_state_snapshot_path,
+                    CONF.scheduler_host_state_snapshot_max_age or
+                    CONF.scheduler_driver_task_period))
         self.tracks_instance_changes = CONF.scheduler_tracks_instance_changes
         # Dict of instances and status, keyed by host
         self._instance_info = {}
@@ -360,6 +419,7 @@ class HostManager(object):
             self.aggs_by_id[agg.id] = agg
             for host in agg.hosts:
                 self.host_aggregates_map[host].add(agg.id)
+        self._host_aggregates_views = {}
 
     def update_aggregates(self, aggregates):
         """Updates internal HostManager information about aggregates."""
@@ -373,12 +433,15 @@ class HostManager(object):
         self.aggs_by_id[aggregate.id] = aggregate
         for host in aggregate.hosts:
             self.host_aggregates_map[host].add(aggregate.id)
+        changed_hosts = set(aggregate.hosts)
         # Refreshing the mapping dict to remove all hosts that are no longer
         # part of the aggregate
         for host in self.host_aggregates_map:
             if (aggregate.id in self.host_aggregates_map[host]
                     and host not in aggregate.hosts):
                 self.host_aggregates_map[host].remove(aggregate.id)
+                changed_hosts.add(host)
+        self._invalidate_aggregates_views(changed_hosts)
 
     def delete_aggregate(self, aggregate):
         """Deletes internal HostManager information about a specific aggregate.
@@ -388,6 +451,33 @@ class HostManager(object):
         for host in aggregate.hosts:
             if aggregate.id in self.host_aggregates_map[host]:
                 self.host_aggregates_map[host].remove(aggregate.id)
+        self._invalidate_aggregates_views(aggregate.hosts)
+
+    def _invalidate_aggregates_views(self, hosts):
+        for host in hosts:
+            self._host_aggregates_views.pop(host, None)
+
+    def _get_aggregates_view(self, host):
+        """Returns the HostAggregatesView of a host."""
+        view = self._host_aggregates_views.get(host)
+        if view is None:
+            aggregates = [self.aggs_by_id[agg_id] for agg_id in
+                          self.host_aggregates_map[host]]
+            values = collections.defaultdict(set)
+            for agg in aggregates:
+                for key, value in agg.metadata.items():
+                    values[key].add(value)
+            # The view is shared by all the filters and requests, so it is
+            # made of read-only mappings and frozensets.
+            metadata = filters_utils.merge_aggregate_metadata(aggregates)
+            view = HostAggregatesView(
+                aggregates=aggregates,
+                metadata=ReadOnlyDict({key: frozenset(value) for key, value
+                                       in metadata.items()}),
+                values=ReadOnlyDict({key: frozenset(value) for key, value
+                                     in values.items()}))
+            self._host_aggregates_views[host] = view
+        return view
 
     def _init_instance_info(self):
         """Creates the initial view of instances for all hosts.
@@ -427,7 +517,8 @@ class HostManager(object):
                         self._instance_info[host] = {"instances": {},
                                                      "updated": False}
                     inst_dict = self._instance_info[host]
-                    inst_dict["instances"][instance.uuid] = instance
+                    inst_dict["instances"][instance.uuid] = compact_instance(
+                        instance)
                 # Call sleep() to cooperatively yield
                 time.sleep(0)
             LOG.debug("END:_async_init_instance_info")
@@ -553,26 +644,66 @@ class HostManager(object):
                     return []
             hosts = six.itervalues(name_to_cls_map)
 
-        return self.filter_handler.get_filtered_objects(self.default_filters,
-                hosts, spec_obj, index)
+        # The request does not change while filtering the hosts, so the
+        # filters can use a view of it built once instead of reading the
+        # RequestSpec for every host.
+        with filters_utils.request_view(spec_obj):
+            return self.filter_handler.get_filtered_objects(
+                self.default_filters, hosts, spec_obj, index)
 
-    def get_weighed_hosts(self, hosts, spec_obj):
-        """Weigh the hosts."""
+    def get_weighed_hosts(self, hosts, spec_obj, limit=None):
+        """Weigh the hosts, returning only the limit heaviest if set."""
         return self.weight_handler.get_weighed_objects(self.weighers,
-                hosts, spec_obj)
-
-    def get_all_host_states(self, context):
-        """Returns a list of HostStates that represents all the hosts
-        the HostManager knows about. Also, each of the consumable resources
-        in HostState are pre-populated and adjusted based on data in the db.
-        """
+                hosts, spec_obj, limit=limit)
 
+    @staticmethod
+    def _get_computes_and_services(context):
         service_refs = {service.host: service
                         for service in objects.ServiceList.get_by_binary(
                             context, 'nova-compute', include_disabled=True)}
         # Get resource usage across the available compute nodes:
         compute_nodes = objects.ComputeNodeList.get_all(context)
+        return compute_nodes, service_refs
+
+    def _load_host_state_snapshot(self):
+        if self._host_state_snapshot_reader is None:
+            return None
+        return self._host_state_snapshot_reader.load()
+
+    def write_host_state_snapshot(self, context):
+        """Writes the host state snapshot read by the other scheduler
+        processes, see CONF.scheduler_host_state_snapshot_path.
+        """
+        compute_nodes, service_refs = self._get_computes_and_services(context)
+        instances = {}
+        for compute in compute_nodes:
+            if compute.host in service_refs and compute.host not in instances:
+                instances[compute.host] = self._get_instance_info(context,
+                                                                  compute)
+        host_state_snapshot.write_snapshot(
+            CONF.scheduler_host_state_snapshot_path, compute_nodes,
+            list(service_refs.values()), instances)
+        LOG.debug("Wrote host state snapshot with %d compute nodes",
+                  len(compute_nodes))
+
+    def get_all_host_states(self, context):
+        """Returns a list of HostStates that represents all the hosts
+        the HostManager knows about. Also, each of the consumable resources
+        in HostState are pre-populated and adjusted based on data in the db,
+        or in the host state snapshot shared by another scheduler process.
+        """
+
+        snapshot = self._load_host_state_snapshot()
+        if snapshot is not None:
+            compute_nodes = snapshot.compute_nodes
+            service_refs = {service.host: service
+                            for service in snapshot.services}
+        else:
+            compute_nodes, service_refs = self._get_computes_and_services(
+                context)
         seen_nodes = set()
+        # One read-only service dict per host, shared by all its nodes
+        service_dicts = {}
         for compute in compute_nodes:
             service = service_refs.get(compute.host)
 
@@ -581,6 +712,10 @@ class HostManager(object):
                     "No compute service record found for host %(host)s"),
                     {'host': compute.host})
                 continue
+            service_dict = service_dicts.get(compute.host)
+            if service_dict is None:
+                service_dict = service_dicts[compute.host] = ReadOnlyDict(
+                    dict(service))
             host = compute.host
             node = compute.hypervisor_hostname
             state_key = (host, node)
@@ -591,10 +726,13 @@ class HostManager(object):
             # We force to update the aggregates info each time a new request
             # comes in, because some changes on the aggregates could have been
             # happening after setting this field for the first time
+            aggregates_view = self._get_aggregates_view(host)
             host_state.update(compute,
-                              dict(service),
-                              self._get_aggregates_info(host),
-                              self._get_instance_info(context, compute))
+                              service_dict,
+                              aggregates_view.aggregates,
+                              self._get_instance_info(context, compute,
+                                                      snapshot=snapshot),
+                              aggregates_view=aggregates_view)
 
             seen_nodes.add(state_key)
 
@@ -609,10 +747,9 @@ class HostManager(object):
         return six.itervalues(self.host_state_map)
 
     def _get_aggregates_info(self, host):
-        return [self.aggs_by_id[agg_id] for agg_id in
-                self.host_aggregates_map[host]]
+        return self._get_aggregates_view(host).aggregates
 
-    def _get_instance_info(self, context, compute):
+    def _get_instance_info(self, context, compute, snapshot=None):
         """Gets the host instance info from the compute host.
 
         Some older compute nodes may not be sending instance change updates to
@@ -620,16 +757,19 @@ class HostManager(object):
         reasons. In either of these cases, there will either be no information
         for the host, or the 'updated' value for that host dict will be False.
         In those cases, we need to grab the current InstanceList instead of
-        relying on the version in _instance_info.
+        relying on the version in _instance_info, either from the host state
+        snapshot if one is given or from the database.
         """
         host_name = compute.host
         host_info = self._instance_info.get(host_name)
         if host_info and host_info.get("updated"):
             inst_dict = host_info["instances"]
+        elif snapshot is not None and host_name in snapshot.instances:
+            inst_dict = snapshot.instances[host_name]
         else:
             # Host is running old version, or updates aren't flowing.
             inst_list = objects.InstanceList.get_by_host(context, host_name)
-            inst_dict = {instance.uuid: instance
+            inst_dict = {instance.uuid: compact_instance(instance)
                          for instance in inst_list.objects}
         return inst_dict
 
@@ -638,7 +778,8 @@ class HostManager(object):
         _instance_info dict.
         """
         instances = objects.InstanceList.get_by_host(context, host_name)
-        inst_dict = {instance.uuid: instance for instance in instances}
+        inst_dict = {instance.uuid: compact_instance(instance)
+                     for instance in instances}
         host_info = self._instance_info[host_name] = {}
         host_info["instances"] = inst_dict
         host_info["updated"] = False
@@ -656,15 +797,16 @@ class HostManager(object):
             inst_dict = host_info.get("instances")
             for instance in instance_info.objects:
                 # Overwrite the entry (if any) with the new info.
-                inst_dict[instance.uuid] = instance
+                inst_dict[instance.uuid] = compact_instance(instance)
             host_info["updated"] = True
         else:
             instances = instance_info.objects
             if len(instances) > 1:
                 # This is a host sending its full instance list, so use it.
                 host_info = self._instance_info[host_name] = {}
-                host_info["instances"] = {instance.uuid: instance
-                                          for instance in instances}
+                host_info["instances"] = {
+                    instance.uuid: compact_instance(instance)
+                    for instance in instances}
                 host_info["updated"] = True
             else:
                 self._recreate_instance_info(context, host_name)
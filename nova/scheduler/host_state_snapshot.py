@@ -0,0 +1,171 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Host state snapshot shared between scheduler processes.
+
+One scheduler process, the writer, periodically dumps the compute nodes,
+services and instances it would use to build its host states into a
+single file. The other scheduler processes read that file and use it
+instead of querying the database on each request. The file is
+replaced atomically, so readers always see a complete snapshot.
+"""
+
+import collections
+import os
+import tempfile
+import time
+
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+
+from nova.i18n import _LW
+from nova import objects
+from nova.objects import base as obj_base
+
+
+LOG = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the snapshot changes, so readers never try
+# to load a snapshot written by an incompatible writer.
+SNAPSHOT_MAGIC = b'NOVA-HOST-STATE-SNAPSHOT-1\n'
+
+HostStateSnapshot = collections.namedtuple(
+    'HostStateSnapshot',
+    ['created_at', 'compute_nodes', 'services', 'instances'])
+
+
+def _instance_to_primitive(instance):
+    if not isinstance(instance, obj_base.NovaObject):
+        # A compact record of the instance, only share what it has.
+        instance = objects.Instance(uuid=instance.uuid,
+                                    instance_type_id=instance.instance_type_id)
+    return instance.obj_to_primitive()
+
+
+def write_snapshot(path, compute_nodes, services, instances):
+    """Atomically write a host state snapshot.
+
+    :param path: path of the snapshot file
+    :param compute_nodes: list of ComputeNode objects
+    :param services: list of nova-compute Service objects
+    :param instances: dict of {host: {instance uuid: Instance}}, the
+                      instances can also be host_manager.HostInstance
+                      records
+    """
+    data = {
+        'created_at': time.time(),
+        'compute_nodes': [cn.obj_to_primitive() for cn in compute_nodes],
+        'services': [svc.obj_to_primitive() for svc in services],
+        'instances': {host: [_instance_to_primitive(inst)
+                             for inst in inst_dict.values()]
+                      for host, inst_dict in instances.items()},
+    }
+    body = jsonutils.dump_as_bytes(data)
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.host-state-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(body)
+        os.chmod(tmp_path, 0o644)
+        # NOTE: rename() is atomic, readers which already opened the
+        # previous snapshot keep reading it until they reload.
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _obj_from_primitive(primitive):
+    return obj_base.NovaObject.obj_from_primitive(primitive)
+
+
+class HostStateSnapshotReader(object):
+    """Loads the host state snapshot written by another scheduler process.
+
+    The snapshot is only decoded again when the file was replaced since the
+    last load.
+    """
+
+    def __init__(self, path, max_age):
+        self.path = path
+        self.max_age = max_age
+        self._file_id = None
+        self._snapshot = None
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        if content[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            LOG.warning(_LW("Ignoring host state snapshot %s with an "
+                            "unknown format"), self.path)
+            return None
+        data = jsonutils.loads(content[len(SNAPSHOT_MAGIC):])
+
+        instances = {}
+        for host, inst_prims in data['instances'].items():
+            inst_dict = {}
+            for prim in inst_prims:
+                inst = _obj_from_primitive(prim)
+                inst_dict[inst.uuid] = inst
+            instances[host] = inst_dict
+        return HostStateSnapshot(
+            created_at=data['created_at'],
+            compute_nodes=objects.ComputeNodeList(objects=[
+                _obj_from_primitive(prim)
+                for prim in data['compute_nodes']]),
+            services=[_obj_from_primitive(prim)
+                      for prim in data['services']],
+            instances=instances)
+
+    def load(self):
+        """Returns the current HostStateSnapshot.
+
+        Returns None if there is no usable snapshot, either because it does
+        not exist, cannot be decoded or is older than max_age seconds, in
+        which case callers should fall back to the database.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            LOG.warning(_LW("Host state snapshot %s is not available"),
+                        self.path)
+            return None
+
+        file_id = (st.st_ino, st.st_mtime, st.st_size)
+        if file_id != self._file_id:
+            try:
+                self._snapshot = self._read()
+            # NOTE: Any failure to decode the snapshot, including objects
+            # written by a newer writer during an upgrade, makes the callers
+            # fall back to the database instead of failing the request.
+            except Exception as e:
+                LOG.warning(_LW("Could not load host state snapshot "
+                                "%(path)s: %(error)s"),
+                            {'path': self.path, 'error': e})
+                self._snapshot = None
+            self._file_id = file_id
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if time.time() - snapshot.created_at > self.max_age:
+            LOG.warning(_LW("Host state snapshot %s is out of date, is its "
+                            "writer running?"), self.path)
+            return None
+        return snapshot
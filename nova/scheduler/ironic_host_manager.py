@@ -34,6 +34,8 @@ class IronicNodeState(host_manager.HostState):
     previously used and lock down access.
     """
 
+    __slots__ = ()
+
     def _update_from_compute_node(self, compute):
         """Update information about a host from a ComputeNode object."""
         self.vcpus_total = compute.vcpus
@@ -92,6 +94,6 @@ class IronicHostManager(host_manager.HostManager):
         """Ironic hosts should not pass instance info."""
         pass
 
-    def _get_instance_info(self, context, compute):
+    def _get_instance_info(self, context, compute, snapshot=None):
         """Ironic hosts should not pass instance info."""
         return {}
@@ -85,6 +85,14 @@ class SchedulerManager(manager.Manager):
     def _run_periodic_tasks(self, context):
         self.driver.run_periodic_tasks(context)
 
+    @periodic_task.periodic_task(spacing=CONF.scheduler_driver_task_period,
+                                 run_immediately=True)
+    def _write_host_state_snapshot(self, context):
+        if not (CONF.scheduler_host_state_snapshot_path and
+                CONF.scheduler_host_state_snapshot_writer):
+            return
+        self.driver.host_manager.write_host_state_snapshot(context)
+
     @messaging.expected_exceptions(exception.NoValidHost)
     def select_destinations(self, ctxt,
                             request_spec=None, filter_properties=None,
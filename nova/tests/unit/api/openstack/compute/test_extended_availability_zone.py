@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from oslo_serialization import jsonutils
 import webob
 
@@ -71,6 +72,10 @@ def fake_get_no_host_availability_zone(context, host):
     return None
 
 
+def fake_get_host_availability_zones(context, hosts):
+    return dict((host, host) for host in hosts)
+
+
 class ExtendedAvailabilityZoneTestV21(test.TestCase):
     content_type = 'application/json'
     prefix = 'OS-EXT-AZ:'
@@ -84,6 +89,8 @@ class ExtendedAvailabilityZoneTestV21(test.TestCase):
         self.stubs.Set(compute.api.API, 'get_all', fake_compute_get_all)
         self.stubs.Set(availability_zones, 'get_host_availability_zone',
                        fake_get_host_availability_zone)
+        self.stubs.Set(availability_zones, 'get_host_availability_zones',
+                       fake_get_host_availability_zones)
         return_server = fakes.fake_instance_get()
         self.stub_out('nova.db.instance_get_by_uuid', return_server)
 
@@ -139,6 +146,16 @@ class ExtendedAvailabilityZoneTestV21(test.TestCase):
         for i, server in enumerate(self._get_servers(res.body)):
             self.assertAvailabilityZone(server, 'all-host')
 
+    def test_detail_looks_up_hosts_once(self):
+        with mock.patch.object(availability_zones,
+                               'get_host_availability_zones',
+                               side_effect=fake_get_host_availability_zones
+                               ) as mock_get_azs:
+            res = self._make_request(self.base_url + 'detail')
+
+        self.assertEqual(res.status_int, 200)
+        mock_get_azs.assert_called_once_with(mock.ANY, set(['all-host']))
+
     def test_no_instance_passthrough_404(self):
 
         def fake_compute_get(*args, **kwargs):
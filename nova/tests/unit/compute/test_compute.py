@@ -664,25 +664,29 @@ class ComputeVolumeTestCase(BaseTestCase):
 
     @mock.patch.object(objects.InstanceList, 'get_by_host')
     @mock.patch.object(objects.BlockDeviceMappingList,
-                       'get_by_instance_uuid')
+                       'bdms_by_instance_uuid')
     def test_get_host_volume_bdms(self, mock_get_by_inst, mock_get_by_host):
         fake_instance = mock.Mock(uuid=uuids.volume_instance)
-        mock_get_by_host.return_value = [fake_instance]
+        other_instance = mock.Mock(uuid=uuids.other_instance)
+        mock_get_by_host.return_value = [fake_instance, other_instance]
 
         volume_bdm = mock.Mock(id=1, is_volume=True)
         not_volume_bdm = mock.Mock(id=2, is_volume=False)
-        mock_get_by_inst.return_value = [volume_bdm, not_volume_bdm]
+        mock_get_by_inst.return_value = {
+            uuids.volume_instance: [volume_bdm, not_volume_bdm]}
 
         expected_host_bdms = [{'instance': fake_instance,
-                               'instance_bdms': [volume_bdm]}]
+                               'instance_bdms': [volume_bdm]},
+                              {'instance': other_instance,
+                               'instance_bdms': []}]
 
         got_host_bdms = self.compute._get_host_volume_bdms('fake-context')
         mock_get_by_host.assert_called_once_with('fake-context',
                                                  self.compute.host,
                                                  use_slave=False)
-        mock_get_by_inst.assert_called_once_with('fake-context',
-                                                 uuids.volume_instance,
-                                                 use_slave=False)
+        mock_get_by_inst.assert_called_once_with(
+            'fake-context', [uuids.volume_instance, uuids.other_instance],
+            use_slave=False)
         self.assertEqual(expected_host_bdms, got_host_bdms)
 
     @mock.patch.object(utils, 'last_completed_audit_period')
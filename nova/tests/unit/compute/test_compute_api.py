@@ -3871,6 +3871,20 @@ class ComputeAPIUnitTestCase(_ComputeAPIUnitTestMixIn, test.NoDBTestCase):
         self.assertRaises(exception.CannotResizeToSameFlavor,
                           self._test_resize, same_flavor=True)
 
+    @mock.patch.object(compute_rpcapi, 'ComputeAPI')
+    def test_client_apis_created_on_use(self, mock_rpcapi):
+        volume_api = mock.sentinel.volume_api
+        api = compute_api.API(volume_api=volume_api)
+        self.assertFalse(mock_rpcapi.called)
+
+        self.assertIs(mock_rpcapi.return_value, api.compute_rpcapi)
+        self.assertIs(mock_rpcapi.return_value, api.compute_rpcapi)
+        mock_rpcapi.assert_called_once_with()
+        self.assertIs(volume_api, api.volume_api)
+
+        api.compute_rpcapi = mock.sentinel.compute_rpcapi
+        self.assertIs(mock.sentinel.compute_rpcapi, api.compute_rpcapi)
+
 
 class ComputeAPIAPICellUnitTestCase(_ComputeAPIUnitTestMixIn,
                                     test.NoDBTestCase):
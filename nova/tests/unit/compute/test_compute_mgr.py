@@ -252,6 +252,27 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
             else:
                 self.assertFalse(db_node.destroy.called)
 
+    @mock.patch.object(manager.ComputeManager,
+                       'update_available_resource_for_node')
+    @mock.patch.object(fake_driver.FakeDriver, 'get_available_nodes')
+    @mock.patch.object(manager.ComputeManager, '_get_compute_nodes_in_db')
+    def test_update_available_resource_concurrently(self, get_db_nodes,
+                                                    get_avail_nodes,
+                                                    update_for_node):
+        self.flags(max_concurrent_resource_updates=2)
+        avail_nodes = set(['node1', 'node2', 'node3'])
+        get_db_nodes.return_value = []
+        get_avail_nodes.return_value = avail_nodes
+
+        with mock.patch.object(manager.eventlet, 'GreenPool',
+                               wraps=manager.eventlet.GreenPool) as mock_pool:
+            self.compute.update_available_resource(self.context)
+
+        mock_pool.assert_called_once_with(2)
+        self.assertEqual(
+            sorted([mock.call(self.context, node) for node in avail_nodes]),
+            sorted(update_for_node.call_args_list))
+
     @mock.patch('nova.compute.utils.notify_about_instance_action')
     def test_delete_instance_without_info_cache(self, mock_notify):
         instance = fake_instance.fake_instance_obj(
@@ -1478,6 +1499,80 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
             self.assertTrue(mock_begin.called)
             self.assertTrue(mock_end.called)
 
+    @mock.patch.object(objects.TaskLog, 'end_task')
+    @mock.patch.object(objects.TaskLog, 'begin_task')
+    @mock.patch.object(objects.TaskLog, 'get', return_value=None)
+    @mock.patch.object(compute_utils, 'notify_usage_exists')
+    @mock.patch.object(objects.InstanceList, 'get_by_filters')
+    @mock.patch.object(objects.InstanceList, 'get_active_by_window_joined')
+    def test_instance_usage_audit_batches(self, mock_get_active,
+                                          mock_get_by_filters, mock_notify,
+                                          mock_get, mock_begin, mock_end):
+        instances = [objects.Instance(uuid=uuid) for uuid in
+                     (uuids.instance1, uuids.instance2, uuids.instance3)]
+        mock_get_active.return_value = instances
+        mock_get_by_filters.side_effect = [instances[:2], instances[2:]]
+        self.flags(instance_usage_audit=True,
+                   instance_usage_audit_batch_size=2)
+
+        self.compute._instance_usage_audit(self.context)
+
+        mock_get_active.assert_called_once_with(
+            self.context, mock.ANY, mock.ANY, host=self.compute.host,
+            expected_attrs=[], use_slave=True)
+        expected_attrs = ['system_metadata', 'info_cache', 'metadata',
+                          'flavor']
+        mock_get_by_filters.assert_has_calls([
+            mock.call(self.context,
+                      {'uuid': [uuids.instance1, uuids.instance2]},
+                      expected_attrs=expected_attrs, use_slave=True),
+            mock.call(self.context, {'uuid': [uuids.instance3]},
+                      expected_attrs=expected_attrs, use_slave=True)])
+        mock_notify.assert_has_calls([
+            mock.call(self.compute.notifier, self.context, instance,
+                      ignore_missing_network_data=False)
+            for instance in instances])
+        self.assertEqual(3, mock_notify.call_count)
+        self.assertTrue(mock_begin.called)
+        mock_end.assert_called_once_with()
+
+    @mock.patch.object(manager.LOG, 'warning')
+    @mock.patch.object(objects.TaskLog, 'end_task', autospec=True)
+    @mock.patch.object(objects.TaskLog, 'begin_task')
+    @mock.patch.object(objects.TaskLog, 'get', return_value=None)
+    @mock.patch.object(compute_utils, 'notify_usage_exists')
+    @mock.patch.object(objects.InstanceList, 'get_by_filters')
+    @mock.patch.object(objects.InstanceList, 'get_active_by_window_joined')
+    def test_instance_usage_audit_batches_purged(self, mock_get_active,
+                                                 mock_get_by_filters,
+                                                 mock_notify, mock_get,
+                                                 mock_begin, mock_end,
+                                                 mock_warning):
+        instances = [objects.Instance(uuid=uuid) for uuid in
+                     (uuids.instance1, uuids.instance2)]
+        mock_get_active.return_value = instances
+        # The second instance was purged before being loaded again
+        mock_get_by_filters.return_value = instances[:1]
+        self.flags(instance_usage_audit=True,
+                   instance_usage_audit_batch_size=2)
+
+        self.compute._instance_usage_audit(self.context)
+
+        mock_notify.assert_called_once_with(
+            self.compute.notifier, self.context, instances[0],
+            ignore_missing_network_data=False)
+        self.assertEqual(1, mock_warning.call_count)
+        self.assertEqual(uuids.instance2,
+                         mock_warning.call_args[0][1]['uuid'])
+        # The purged instance is counted in the task log
+        task_log = mock_end.call_args[0][0]
+        self.assertEqual(1, task_log.errors)
+        self.assertIn('1 instances were purged', task_log.message)
+
+    def test_instance_usage_audit_is_periodic_task(self):
+        self.assertIn('_instance_usage_audit',
+                      [name for name, _task in self.compute._periodic_tasks])
+
     @mock.patch.object(objects.InstanceList, 'get_by_host')
     def test_sync_power_states(self, mock_get):
         instance = mock.Mock()
@@ -2998,19 +3093,21 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
             return_value=(0, 0))
     @mock.patch.object(time, 'time', side_effect=[10, 20, 21])
     @mock.patch.object(objects.InstanceList, 'get_by_host', return_value=[])
-    @mock.patch.object(objects.BandwidthUsage, 'get_by_instance_uuid_and_mac')
+    @mock.patch.object(objects.BandwidthUsageList, 'get_by_uuids')
     @mock.patch.object(db, 'bw_usage_update')
-    def test_poll_bandwidth_usage(self, bw_usage_update, get_by_uuid_mac,
+    def test_poll_bandwidth_usage(self, bw_usage_update, get_by_uuids,
             get_by_host, time, last_completed_audit):
         bw_counters = [{'uuid': uuids.instance, 'mac_address': 'fake-mac',
                         'bw_in': 1, 'bw_out': 2}]
         usage = objects.BandwidthUsage()
+        usage.instance_uuid = uuids.instance
+        usage.mac = 'fake-mac'
         usage.bw_in = 3
         usage.bw_out = 4
         usage.last_ctr_in = 0
         usage.last_ctr_out = 0
         self.flags(bandwidth_poll_interval=1)
-        get_by_uuid_mac.return_value = usage
+        get_by_uuids.return_value = [usage]
         _time = timeutils.utcnow()
         bw_usage_update.return_value = {'uuid': uuids.instance, 'mac': '',
                 'start_period': _time, 'last_refreshed': _time, 'bw_in': 0,
@@ -3019,9 +3116,8 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
         with mock.patch.object(self.compute.driver,
                 'get_all_bw_counters', return_value=bw_counters):
             self.compute._poll_bandwidth_usage(self.context)
-            get_by_uuid_mac.assert_called_once_with(self.context,
-                    uuids.instance, 'fake-mac',
-                    start_period=0, use_slave=True)
+            get_by_uuids.assert_called_once_with(self.context,
+                    [uuids.instance], start_period=0, use_slave=True)
             # NOTE(sdague): bw_usage_update happens at some time in
             # the future, so what last_refreshed is irrelevant.
             bw_usage_update.assert_called_once_with(self.context,
@@ -3030,6 +3126,59 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
                     last_refreshed=mock.ANY,
                     update_cells=False)
 
+    @mock.patch.object(utils, 'last_completed_audit_period',
+            return_value=(1, 2))
+    @mock.patch.object(time, 'time', side_effect=[10, 20, 21])
+    @mock.patch.object(objects.InstanceList, 'get_by_host', return_value=[])
+    @mock.patch.object(objects.BandwidthUsageList, 'get_by_uuids')
+    @mock.patch.object(objects.BandwidthUsage, 'create')
+    def test_poll_bandwidth_usage_previous_period(self, create, get_by_uuids,
+            get_by_host, time, last_completed_audit):
+        bw_counters = [{'uuid': uuids.instance1, 'mac_address': 'mac1',
+                        'bw_in': 10, 'bw_out': 20},
+                       {'uuid': uuids.instance1, 'mac_address': 'mac2',
+                        'bw_in': 5, 'bw_out': 50},
+                       {'uuid': uuids.instance2, 'mac_address': 'mac3',
+                        'bw_in': 7, 'bw_out': 8}]
+
+        def _usage(instance_uuid, mac, bw_in, bw_out, last_ctr_in,
+                   last_ctr_out):
+            return objects.BandwidthUsage(
+                instance_uuid=instance_uuid, mac=mac, bw_in=bw_in,
+                bw_out=bw_out, last_ctr_in=last_ctr_in,
+                last_ctr_out=last_ctr_out)
+
+        get_by_uuids.side_effect = [
+            # Current audit period
+            [_usage(uuids.instance1, 'mac1', 100, 200, 4, 25)],
+            # Previous audit period
+            [_usage(uuids.instance1, 'mac2', 1000, 2000, 3, 30)],
+        ]
+        self.flags(bandwidth_poll_interval=1)
+        with mock.patch.object(self.compute.driver,
+                'get_all_bw_counters', return_value=bw_counters):
+            self.compute._poll_bandwidth_usage(self.context)
+
+        get_by_uuids.assert_has_calls([
+            mock.call(self.context,
+                      sorted([uuids.instance1, uuids.instance2]),
+                      start_period=2, use_slave=True),
+            mock.call(self.context,
+                      sorted([uuids.instance1, uuids.instance2]),
+                      start_period=1, use_slave=True)])
+        self.assertEqual(2, get_by_uuids.call_count)
+        create.assert_has_calls([
+            # The out counter rolled over
+            mock.call(uuids.instance1, 'mac1', 106, 220, 10, 20,
+                      start_period=2, last_refreshed=mock.ANY,
+                      update_cells=False),
+            mock.call(uuids.instance1, 'mac2', 2, 20, 5, 50,
+                      start_period=2, last_refreshed=mock.ANY,
+                      update_cells=False),
+            mock.call(uuids.instance2, 'mac3', 0, 0, 7, 8,
+                      start_period=2, last_refreshed=mock.ANY,
+                      update_cells=False)])
+
     def test_reverts_task_state_instance_not_found(self):
         # Tests that the reverts_task_state decorator in the compute manager
         # will not trace when an InstanceNotFound is raised.
@@ -627,6 +627,64 @@ class TestUpdateAvailableResources(BaseTestCase):
         self.assertTrue(obj_base.obj_equal_prims(expected_resources,
                                                  self.rt.compute_node))
 
+    @mock.patch('nova.objects.InstancePCIRequests.get_by_instance',
+                return_value=objects.InstancePCIRequests(requests=[]))
+    @mock.patch('nova.objects.PciDeviceList.get_by_compute_node',
+                return_value=objects.PciDeviceList())
+    @mock.patch('nova.objects.ComputeNode.get_by_host_and_nodename')
+    @mock.patch('nova.objects.MigrationList.get_in_progress_by_host_and_node')
+    @mock.patch('nova.objects.InstanceList.get_by_host_and_node')
+    def test_claim_during_audit(self, get_mock, migr_mock, get_cn_mock,
+                                pci_mock, instance_pci_mock):
+        self.flags(reserved_host_disk_mb=0,
+                   reserved_host_memory_mb=0)
+        self._setup_rt()
+        get_mock.return_value = []
+        migr_mock.return_value = []
+        get_cn_mock.return_value = _COMPUTE_NODE_FIXTURES[0]
+        # The first audit initialises the compute node
+        self._update_available_resources()
+        get_mock.reset_mock()
+        migr_mock.reset_mock()
+
+        def fake_get_by_host_and_node(*args, **kwargs):
+            if get_mock.call_count == 1:
+                # The instance is claimed once the instances were listed
+                # and before the audit takes the semaphore.
+                self.rt.usage_generation += 1
+                return []
+            return _INSTANCE_FIXTURES
+
+        get_mock.side_effect = fake_get_by_host_and_node
+
+        self._update_available_resources()
+
+        self.assertEqual(2, get_mock.call_count)
+        self.assertEqual(2, migr_mock.call_count)
+        self.assertEqual(128, self.rt.compute_node.memory_mb_used)
+        self.assertEqual(1, self.rt.compute_node.vcpus_used)
+        self.assertEqual(1, self.rt.compute_node.running_vms)
+
+    @mock.patch('nova.rpc.get_notifier')
+    @mock.patch('nova.objects.MigrationList.get_in_progress_by_host_and_node')
+    @mock.patch('nova.objects.InstanceList.get_by_host_and_node')
+    def test_disabled_gathers_nothing(self, get_mock, migr_mock,
+                                      notifier_mock):
+        self._setup_rt()
+        monitor = mock.Mock()
+        self.rt.monitors = [monitor]
+
+        # The compute node could not be initialised
+        with mock.patch.object(self.rt, '_init_compute_node'):
+            self._update_available_resources()
+
+        self.assertTrue(self.rt.disabled)
+        self.assertFalse(get_mock.called)
+        self.assertFalse(migr_mock.called)
+        self.assertFalse(self.driver_mock.get_per_instance_usage.called)
+        self.assertFalse(monitor.populate_metrics.called)
+        self.assertFalse(notifier_mock.called)
+
     @mock.patch('nova.objects.InstancePCIRequests.get_by_instance',
                 return_value=objects.InstancePCIRequests(requests=[]))
     @mock.patch('nova.objects.PciDeviceList.get_by_compute_node',
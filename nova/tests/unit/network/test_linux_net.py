@@ -485,6 +485,72 @@ class LinuxNetworkTestCase(test.NoDBTestCase):
 
         self.driver.update_dhcp(self.context, "eth0", networks[0])
 
+    def _test_update_dhcp_coalesced(self, update, pid=123):
+        self.flags(dnsmasq_coalesce_updates=True)
+        self.stub_out('nova.network.linux_net._dnsmasq_update_requests', {})
+        self.stub_out('nova.network.linux_net._dnsmasq_update_done', {})
+        self.stub_out('nova.network.linux_net._dnsmasq_files', {})
+        with test.nested(
+            mock.patch.object(fileutils, 'ensure_tree'),
+            mock.patch.object(linux_net, 'write_to_file'),
+            mock.patch.object(os, 'chmod'),
+            mock.patch.object(os, 'rename'),
+            mock.patch.object(os.path, 'exists', return_value=True),
+            mock.patch.object(linux_net, '_dnsmasq_pid_for',
+                              return_value=pid),
+            mock.patch.object(linux_net, 'is_pid_cmdline_correct',
+                              return_value=True),
+            mock.patch.object(linux_net, '_start_or_reload_dnsmasq'),
+        ) as (_ensure_tree, mock_write, mock_chmod, mock_rename,
+              _exists, _pid_for, _pid_correct, mock_reload):
+            update(mock_write, mock_rename, mock_reload)
+
+    def test_update_dhcp_coalesced_unchanged(self):
+        def update(mock_write, mock_rename, mock_reload):
+            self.driver.update_dhcp(self.context, "eth0", networks[0])
+            conffile = linux_net._dhcp_file("eth0", 'conf')
+            mock_write.assert_any_call(conffile + '.tmp', mock.ANY)
+            mock_rename.assert_any_call(conffile + '.tmp', conffile)
+            self.assertEqual(2, mock_write.call_count)
+            mock_reload.assert_called_once_with("eth0", networks[0])
+
+            # Nothing changed, neither the files nor dnsmasq are touched
+            mock_write.reset_mock()
+            mock_reload.reset_mock()
+            self.driver.update_dhcp(self.context, "eth0", networks[0])
+            self.assertFalse(mock_write.called)
+            self.assertFalse(mock_reload.called)
+
+        self._test_update_dhcp_coalesced(update)
+
+    def test_update_dhcp_coalesced_not_running(self):
+        def update(mock_write, mock_rename, mock_reload):
+            self.driver.update_dhcp(self.context, "eth0", networks[0])
+            mock_reload.reset_mock()
+            # dnsmasq is started even though the files did not change
+            self.driver.update_dhcp(self.context, "eth0", networks[0])
+            mock_reload.assert_called_once_with("eth0", networks[0])
+
+        self._test_update_dhcp_coalesced(update, pid=None)
+
+    def test_update_dhcp_coalesced_request_covered(self):
+        def update(mock_write, mock_rename, mock_reload):
+            # The second request was made while the first one waited for
+            # the lock, the update run for the first one covers both.
+            linux_net._dnsmasq_update_requests["eth0"] = 2
+            get_by_network = objects.FixedIPList.get_by_network
+            with mock.patch.object(objects.FixedIPList, 'get_by_network',
+                                   side_effect=get_by_network) as mock_get:
+                linux_net._update_dnsmasq(self.context, "eth0",
+                                          networks[0], 1)
+                linux_net._update_dnsmasq(self.context, "eth0",
+                                          networks[0], 2)
+            self.assertEqual(1, mock_get.call_count)
+            self.assertEqual(1, mock_reload.call_count)
+            self.assertEqual(2, linux_net._dnsmasq_update_done["eth0"])
+
+        self._test_update_dhcp_coalesced(update)
+
     def _get_fixedips(self, network, host=None):
         return objects.FixedIPList.get_by_network(self.context,
                                                   network,
@@ -1296,41 +1362,30 @@ class LinuxNetworkTestCase(test.NoDBTestCase):
         self._ovs_vif_port(calls)
 
     def _create_veth_pair(self, calls):
-        with mock.patch.object(utils, 'execute', return_value=('', '')) as ex:
+        with test.nested(
+                mock.patch.object(utils, 'execute', return_value=('', '')),
+                mock.patch.object(utils, 'execute_batch')
+        ) as (ex, ex_batch):
             linux_net._create_veth_pair('fake-dev1', 'fake-dev2')
-            ex.assert_has_calls(calls)
+            ex_batch.assert_called_once_with([
+                ['ip', 'link', 'add', 'fake-dev1', 'type', 'veth',
+                 'peer', 'name', 'fake-dev2'],
+                ['ip', 'link', 'set', 'fake-dev1', 'up'],
+                ['ip', 'link', 'set', 'fake-dev1', 'promisc', 'on'],
+                ['ip', 'link', 'set', 'fake-dev2', 'up'],
+                ['ip', 'link', 'set', 'fake-dev2', 'promisc', 'on']],
+                run_as_root=True)
+            self.assertEqual(calls, ex.mock_calls)
 
     def test_create_veth_pair(self):
-        calls = [
-            mock.call('ip', 'link', 'add', 'fake-dev1', 'type', 'veth',
-                      'peer', 'name', 'fake-dev2', run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev1', 'up',
-                      run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev1', 'promisc', 'on',
-                      run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev2', 'up',
-                      run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev2', 'promisc', 'on',
-                      run_as_root=True)
-        ]
-        self._create_veth_pair(calls)
+        self._create_veth_pair([])
 
     def test_create_veth_pair_with_mtu(self):
         self.flags(network_device_mtu=10000)
         calls = [
-            mock.call('ip', 'link', 'add', 'fake-dev1', 'type', 'veth',
-                      'peer', 'name', 'fake-dev2', run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev1', 'up',
-                      run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev1', 'promisc', 'on',
-                      run_as_root=True),
             mock.call('ip', 'link', 'set', 'fake-dev1', 'mtu',
                       10000, run_as_root=True,
                       check_exit_code=[0, 2, 254]),
-            mock.call('ip', 'link', 'set', 'fake-dev2', 'up',
-                      run_as_root=True),
-            mock.call('ip', 'link', 'set', 'fake-dev2', 'promisc', 'on',
-                      run_as_root=True),
             mock.call('ip', 'link', 'set', 'fake-dev2', 'mtu',
                       10000, run_as_root=True,
                       check_exit_code=[0, 2, 254])
@@ -10,10 +10,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 import six
 
 from nova import objects
 from nova.scheduler.filters import compute_capabilities_filter
+from nova.scheduler.filters import extra_specs_ops
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -121,3 +123,20 @@ class TestComputeCapabilitiesFilter(test.NoDBTestCase):
             especs={'opt1:a': '1', 'capabilities:opt1:b:aa': '2',
                     'trust:trusted_host': 'true'},
             passes=True)
+
+    @mock.patch.object(extra_specs_ops, 'get_matcher',
+                       wraps=extra_specs_ops.get_matcher)
+    def test_compute_filter_extra_specs_compiled_once(self, mock_matcher):
+        spec_obj = objects.RequestSpec(
+            flavor=objects.Flavor(memory_mb=1024,
+                                  extra_specs={'opt1': '1'}))
+        host1 = fakes.FakeHostState('host1', 'node1', {'opt1': 1})
+        host2 = fakes.FakeHostState('host2', 'node2', {'opt1': 2})
+        self.assertTrue(self.filt_cls.host_passes(host1, spec_obj))
+        self.assertFalse(self.filt_cls.host_passes(host2, spec_obj))
+        mock_matcher.assert_called_once_with('1')
+
+        # The flavor changing under the request recompiles the specs
+        spec_obj.flavor.extra_specs = {'opt1': '2'}
+        self.assertFalse(self.filt_cls.host_passes(host1, spec_obj))
+        self.assertTrue(self.filt_cls.host_passes(host2, spec_obj))
@@ -233,3 +233,14 @@ class ExtraSpecsOpsTestCase(test.NoDBTestCase):
             value=str(values),
             req='<all-in> txt aes',
             matches=False)
+
+    def test_get_matcher_reusable(self):
+        matcher = extra_specs_ops.get_matcher('<or> 11 <or> 12')
+        self.assertTrue(matcher('11'))
+        self.assertTrue(matcher('12'))
+        self.assertFalse(matcher('13'))
+        self.assertFalse(matcher(None))
+
+    def test_get_matcher_no_operand(self):
+        matcher = extra_specs_ops.get_matcher('>=')
+        self.assertFalse(matcher('1'))
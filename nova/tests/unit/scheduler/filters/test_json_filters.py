@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from oslo_serialization import jsonutils
 
 from nova import objects
@@ -270,3 +271,17 @@ class TestJsonFilter(test.NoDBTestCase):
             scheduler_hints=dict(
                 query=[jsonutils.dumps(raw)]))
         self.assertTrue(self.filt_cls.host_passes(host, spec_obj))
+
+    @mock.patch.object(jsonutils, 'loads', wraps=jsonutils.loads)
+    def test_json_filter_query_compiled_once_per_request(self, mock_loads):
+        spec_obj = objects.RequestSpec(
+            scheduler_hints=dict(query=[self.json_query]))
+        host1 = fakes.FakeHostState('host1', 'node1',
+                {'free_ram_mb': 1024,
+                 'free_disk_mb': 200 * 1024})
+        host2 = fakes.FakeHostState('host2', 'node2',
+                {'free_ram_mb': 1023,
+                 'free_disk_mb': 200 * 1024})
+        self.assertTrue(self.filt_cls.host_passes(host1, spec_obj))
+        self.assertFalse(self.filt_cls.host_passes(host2, spec_obj))
+        mock_loads.assert_called_once_with(self.json_query)
@@ -13,8 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
 from nova import objects
 from nova.scheduler.filters import utils
+from nova.scheduler import host_manager
 from nova import test
 from nova.tests.unit.scheduler import fakes
 from nova.tests import uuidsentinel as uuids
@@ -61,6 +64,91 @@ class TestUtils(test.NoDBTestCase):
 
         self.assertEqual(set(), values)
 
+    def test_aggregate_metadata_get_by_host_with_view(self):
+        view = host_manager.HostAggregatesView(
+            aggregates=_AGGREGATE_FIXTURES,
+            metadata=host_manager.ReadOnlyDict({'k1': frozenset(['1'])}),
+            values=host_manager.ReadOnlyDict({'k1': frozenset(['1'])}))
+        host_state = fakes.FakeHostState(
+            'fake', 'node', {'aggregates': _AGGREGATE_FIXTURES,
+                             'aggregates_view': view})
+
+        metadata = utils.aggregate_metadata_get_by_host(host_state)
+        # The shared view is returned, and it cannot be changed
+        self.assertIs(view.metadata, metadata)
+        self.assertRaises(TypeError, metadata.__setitem__, 'k2', set(['3']))
+        self.assertRaises(AttributeError, getattr, metadata['k1'], 'add')
+        self.assertEqual(set(['1']),
+                         utils.aggregate_values_from_key(host_state, 'k1'))
+        self.assertEqual(set(),
+                         utils.aggregate_values_from_key(host_state, 'k3'))
+
+    def test_get_compiled_for_request(self):
+        spec_obj = objects.RequestSpec()
+        compile_func = mock.Mock(side_effect=lambda source: source.upper())
+
+        self.assertEqual('FOO', utils.get_compiled_for_request(
+            spec_obj, 'name', 'foo', compile_func))
+        self.assertEqual('FOO', utils.get_compiled_for_request(
+            spec_obj, 'name', 'foo', compile_func))
+        compile_func.assert_called_once_with('foo')
+
+        self.assertEqual('BAR', utils.get_compiled_for_request(
+            spec_obj, 'name', 'bar', compile_func))
+        self.assertEqual(2, compile_func.call_count)
+
+    def test_get_compiled_for_request_source_mutated(self):
+        spec_obj = objects.RequestSpec()
+        source = {'k1': 'v1'}
+        compile_func = mock.Mock(side_effect=lambda source: len(source))
+
+        self.assertEqual(1, utils.get_compiled_for_request(
+            spec_obj, 'name', source, compile_func))
+        source['k2'] = 'v2'
+        self.assertEqual(2, utils.get_compiled_for_request(
+            spec_obj, 'name', source, compile_func))
+
+    def test_build_request_view(self):
+        spec_obj = objects.RequestSpec(
+            instance_uuid=uuids.instance,
+            flavor=objects.Flavor(extra_specs={'hw:numa_nodes': '1'}),
+            image=objects.ImageMeta(properties=objects.ImageMetaProps(
+                hw_architecture='x86_64')),
+            scheduler_hints={'same_host': [uuids.other],
+                             'different_host': [uuids.a, uuids.b]},
+            instance_group=objects.InstanceGroup(policies=['affinity'],
+                                                 hosts=['host1']))
+
+        view = utils.build_request_view(spec_obj)
+
+        self.assertEqual(uuids.instance, view.instance_uuid)
+        self.assertEqual({'hw:numa_nodes': '1'}, view.extra_specs)
+        self.assertEqual({'hw_architecture': 'x86_64'}, view.image_props)
+        self.assertEqual({'same_host': uuids.other,
+                          'different_host': [uuids.a, uuids.b]},
+                         view.scheduler_hints)
+        self.assertEqual(('affinity',), view.group_policies)
+        self.assertEqual(frozenset(['host1']), view.group_hosts)
+
+    def test_build_request_view_unset(self):
+        spec_obj = objects.RequestSpec(
+            image=None, instance_group=objects.InstanceGroup(policies=[]))
+
+        view = utils.build_request_view(spec_obj)
+
+        self.assertEqual(utils.RequestView(None, {}, {}, {}, (), None), view)
+
+    def test_request_view(self):
+        spec_obj = objects.RequestSpec(scheduler_hints={'query': ['foo']})
+
+        with utils.request_view(spec_obj):
+            with mock.patch.object(utils, 'build_request_view') as mock_build:
+                view = utils.get_request_view(spec_obj)
+                self.assertIs(view, utils.get_request_view(spec_obj))
+            self.assertFalse(mock_build.called)
+        self.assertEqual('foo', view.scheduler_hints['query'])
+        self.assertFalse(hasattr(spec_obj, '_filter_request_view'))
+
     def test_aggregate_metadata_get_by_host_no_key(self):
         host_state = fakes.FakeHostState(
             'fake', 'node', {'aggregates': _AGGREGATE_FIXTURES})
@@ -33,7 +33,9 @@ from nova import objects
 from nova.objects import base as obj_base
 from nova.pci import stats as pci_stats
 from nova.scheduler import filters
+from nova.scheduler.filters import utils as filters_utils
 from nova.scheduler import host_manager
+from nova.scheduler import host_state_snapshot
 from nova import test
 from nova.tests import fixtures
 from nova.tests.unit import fake_instance
@@ -176,6 +178,54 @@ class HostManagerTestCase(test.NoDBTestCase):
         self.assertEqual({'fake-host': set([])},
                          self.host_manager.host_aggregates_map)
 
+    def test_get_aggregates_view(self):
+        fake_agg1 = objects.Aggregate(id=1, hosts=['fake-host'],
+                                      metadata={'k1': '1', 'k2': '2,3'})
+        fake_agg2 = objects.Aggregate(id=2, hosts=['fake-host'],
+                                      metadata={'k1': '4'})
+        self.host_manager.update_aggregates([fake_agg1, fake_agg2])
+
+        view = self.host_manager._get_aggregates_view('fake-host')
+        self.assertEqual(set([fake_agg1, fake_agg2]), set(view.aggregates))
+        self.assertEqual({'k1': set(['1', '4']), 'k2': set(['2', '3'])},
+                         view.metadata)
+        self.assertEqual({'k1': set(['1', '4']), 'k2': set(['2,3'])},
+                         view.values)
+        # The view is only computed once
+        self.assertIs(view, self.host_manager._get_aggregates_view(
+            'fake-host'))
+
+    def test_get_aggregates_view_refreshed_on_update(self):
+        fake_agg = objects.Aggregate(id=1, hosts=['fake-host'],
+                                     metadata={'k1': '1'})
+        self.host_manager.update_aggregates([fake_agg])
+        view = self.host_manager._get_aggregates_view('fake-host')
+        self.assertEqual({'k1': set(['1'])}, view.metadata)
+
+        fake_agg = objects.Aggregate(id=1, hosts=['fake-host'],
+                                     metadata={'k1': '2'})
+        self.host_manager.update_aggregates([fake_agg])
+        view = self.host_manager._get_aggregates_view('fake-host')
+        self.assertEqual({'k1': set(['2'])}, view.metadata)
+
+        # Removing the host from the aggregate refreshes its view too
+        fake_agg = objects.Aggregate(id=1, hosts=[], metadata={'k1': '2'})
+        self.host_manager.update_aggregates([fake_agg])
+        view = self.host_manager._get_aggregates_view('fake-host')
+        self.assertEqual([], view.aggregates)
+        self.assertEqual({}, view.metadata)
+
+    def test_get_aggregates_view_refreshed_on_delete(self):
+        fake_agg = objects.Aggregate(id=1, hosts=['fake-host'],
+                                     metadata={'k1': '1'})
+        self.host_manager.update_aggregates([fake_agg])
+        self.host_manager._get_aggregates_view('fake-host')
+
+        self.host_manager.delete_aggregate(fake_agg)
+        view = self.host_manager._get_aggregates_view('fake-host')
+        self.assertEqual([], view.aggregates)
+        self.assertEqual({}, view.metadata)
+
     def test_choose_host_filters_not_found(self):
         self.assertRaises(exception.SchedulerHostFilterNotFound,
                           self.host_manager._choose_host_filters,
@@ -537,6 +587,77 @@ class HostManagerTestCase(test.NoDBTestCase):
         host_state = self.host_manager.host_state_map[('fake', 'fake')]
         self.assertEqual([], host_state.aggregates)
 
+    @mock.patch.object(nova.objects.InstanceList, 'get_by_host')
+    @mock.patch.object(host_manager.HostState, '_update_from_compute_node')
+    @mock.patch.object(objects.ComputeNodeList, 'get_all')
+    @mock.patch.object(objects.ServiceList, 'get_by_binary')
+    def test_get_all_host_states_from_snapshot(self, svc_get_by_binary,
+                                               cn_get_all, update_from_cn,
+                                               mock_get_by_host):
+        fake_inst = objects.Instance(uuid=uuids.instance, host='fake')
+        snapshot = host_state_snapshot.HostStateSnapshot(
+            created_at=0,
+            compute_nodes=[objects.ComputeNode(host='fake',
+                                               hypervisor_hostname='fake')],
+            services=[objects.Service(host='fake')],
+            instances={'fake': {uuids.instance: fake_inst}})
+        self.host_manager._host_state_snapshot_reader = mock.Mock()
+        self.host_manager._host_state_snapshot_reader.load.return_value = (
+            snapshot)
+
+        self.host_manager.get_all_host_states('fake-context')
+
+        self.assertFalse(svc_get_by_binary.called)
+        self.assertFalse(cn_get_all.called)
+        self.assertFalse(mock_get_by_host.called)
+        host_state = self.host_manager.host_state_map[('fake', 'fake')]
+        self.assertEqual({uuids.instance: fake_inst}, host_state.instances)
+
+    @mock.patch.object(nova.objects.InstanceList, 'get_by_host')
+    @mock.patch.object(host_manager.HostState, '_update_from_compute_node')
+    @mock.patch.object(objects.ComputeNodeList, 'get_all')
+    @mock.patch.object(objects.ServiceList, 'get_by_binary')
+    def test_get_all_host_states_stale_snapshot(self, svc_get_by_binary,
+                                                cn_get_all, update_from_cn,
+                                                mock_get_by_host):
+        svc_get_by_binary.return_value = [objects.Service(host='fake')]
+        cn_get_all.return_value = [
+            objects.ComputeNode(host='fake', hypervisor_hostname='fake')]
+        mock_get_by_host.return_value = objects.InstanceList()
+        self.host_manager._host_state_snapshot_reader = mock.Mock()
+        self.host_manager._host_state_snapshot_reader.load.return_value = None
+
+        self.host_manager.get_all_host_states('fake-context')
+
+        svc_get_by_binary.assert_called_once_with(
+            'fake-context', 'nova-compute', include_disabled=True)
+        cn_get_all.assert_called_once_with('fake-context')
+        self.assertIn(('fake', 'fake'), self.host_manager.host_state_map)
+
+    @mock.patch.object(host_state_snapshot, 'write_snapshot')
+    @mock.patch.object(nova.objects.InstanceList, 'get_by_host')
+    @mock.patch.object(objects.ComputeNodeList, 'get_all')
+    @mock.patch.object(objects.ServiceList, 'get_by_binary')
+    def test_write_host_state_snapshot(self, svc_get_by_binary, cn_get_all,
+                                       mock_get_by_host, mock_write):
+        self.flags(scheduler_host_state_snapshot_path='/fake/path')
+        service = objects.Service(host='fake')
+        compute = objects.ComputeNode(host='fake', hypervisor_hostname='fake')
+        orphan = objects.ComputeNode(host='orphan',
+                                     hypervisor_hostname='orphan')
+        fake_inst = objects.Instance(uuid=uuids.instance, host='fake')
+        svc_get_by_binary.return_value = [service]
+        cn_get_all.return_value = [compute, orphan]
+        mock_get_by_host.return_value = objects.InstanceList(
+            objects=[fake_inst])
+
+        self.host_manager.write_host_state_snapshot('fake-context')
+
+        mock_get_by_host.assert_called_once_with('fake-context', 'fake')
+        mock_write.assert_called_once_with(
+            '/fake/path', [compute, orphan], [service],
+            {'fake': {uuids.instance: fake_inst}})
+
     @mock.patch.object(nova.objects.InstanceList, 'get_by_host')
     @mock.patch.object(host_manager.HostState, '_update_from_compute_node')
     @mock.patch.object(objects.ComputeNodeList, 'get_all')
@@ -557,6 +678,7 @@ class HostManagerTestCase(test.NoDBTestCase):
         self.host_manager.get_all_host_states('fake-context')
         host_state = self.host_manager.host_state_map[('fake', 'fake')]
         self.assertEqual([fake_agg], host_state.aggregates)
+        self.assertEqual([fake_agg], host_state.aggregates_view.aggregates)
 
     @mock.patch.object(nova.objects.InstanceList, 'get_by_host')
     @mock.patch.object(host_manager.HostState, '_update_from_compute_node')
@@ -677,6 +799,49 @@ class HostManagerTestCase(test.NoDBTestCase):
         self.assertEqual(len(new_info['instances']), 4)
         self.assertTrue(new_info['updated'])
 
+    def test_update_instance_info_compact(self):
+        self.flags(scheduler_compact_instance_info=True)
+        host_name = 'fake_host'
+        inst1 = objects.Instance(uuid=uuids.instance_1, instance_type_id=1)
+        self.host_manager._instance_info = {
+                host_name: {
+                    'instances': {},
+                    'updated': False,
+                }}
+        update = objects.InstanceList(objects=[inst1])
+        self.host_manager.update_instance_info('fake_context', host_name,
+                                               update)
+        new_info = self.host_manager._instance_info[host_name]
+        self.assertEqual(
+            {uuids.instance_1: host_manager.HostInstance(uuids.instance_1, 1)},
+            new_info['instances'])
+
+    @mock.patch.object(nova.objects.InstanceList, 'get_by_host')
+    @mock.patch.object(objects.ComputeNodeList, 'get_all')
+    @mock.patch.object(objects.ServiceList, 'get_by_binary')
+    def test_get_all_host_states_compact(self, svc_get_by_binary, cn_get_all,
+                                         mock_get_by_host):
+        self.flags(scheduler_compact_instance_info=True)
+        svc_get_by_binary.return_value = [objects.Service(host='fake')]
+        cn_get_all.return_value = [
+            objects.ComputeNode(host='fake', hypervisor_hostname='node1'),
+            objects.ComputeNode(host='fake', hypervisor_hostname='node2')]
+        mock_get_by_host.return_value = objects.InstanceList(objects=[
+            objects.Instance(uuid=uuids.instance, instance_type_id=2)])
+
+        with mock.patch.object(host_manager.HostState,
+                               '_update_from_compute_node'):
+            self.host_manager.get_all_host_states('fake-context')
+        state1 = self.host_manager.host_state_map[('fake', 'node1')]
+        state2 = self.host_manager.host_state_map[('fake', 'node2')]
+        # The nodes of a host share its service dict
+        self.assertIs(state1.service, state2.service)
+        self.assertEqual(
+            {uuids.instance: host_manager.HostInstance(uuids.instance, 2)},
+            state1.instances)
+        self.assertFalse(filters_utils.other_types_on_host(state1, 2))
+        self.assertTrue(filters_utils.other_types_on_host(state1, 3))
+
     def test_update_instance_info_unknown_host(self):
         self.host_manager._recreate_instance_info = mock.MagicMock()
         host_name = 'fake_host'
@@ -880,6 +1045,11 @@ class HostStateTestCase(test.NoDBTestCase):
 
     @mock.patch('nova.utils.synchronized',
                 side_effect=lambda a: lambda f: lambda *args: f(*args))
+    def test_no_instance_dict(self):
+        host = host_manager.HostState("fakehost", "fakenode")
+        self.assertFalse(hasattr(host, '__dict__'))
+        self.assertRaises(AttributeError, setattr, host, 'unknown', 1)
+
     def test_stat_consumption_from_compute_node(self, sync_mock):
         stats = {
             'num_instances': '5',
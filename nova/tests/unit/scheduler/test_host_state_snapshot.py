@@ -0,0 +1,177 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests For the scheduler host state snapshot.
+"""
+
+import os
+
+import fixtures
+import mock
+from oslo_serialization import jsonutils
+
+from nova import objects
+from nova.scheduler import host_manager
+from nova.scheduler import host_state_snapshot
+from nova import test
+from nova.tests import uuidsentinel as uuids
+
+
+class HostStateSnapshotTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(HostStateSnapshotTestCase, self).setUp()
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(tmpdir, 'host_states')
+        self.compute_nodes = [
+            objects.ComputeNode(id=1, host='host1', hypervisor_hostname='n1',
+                                vcpus=4, memory_mb=2048),
+        ]
+        self.services = [
+            objects.Service(id=1, host='host1', binary='nova-compute',
+                            disabled=False),
+        ]
+        self.instances = {
+            'host1': {
+                uuids.instance: objects.Instance(uuid=uuids.instance,
+                                                 host='host1'),
+            },
+        }
+
+    def _write(self):
+        host_state_snapshot.write_snapshot(self.path, self.compute_nodes,
+                                           self.services, self.instances)
+
+    def test_roundtrip(self):
+        self._write()
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        snapshot = reader.load()
+
+        self.assertIsInstance(snapshot.compute_nodes, objects.ComputeNodeList)
+        self.assertEqual(1, len(snapshot.compute_nodes))
+        cn = snapshot.compute_nodes[0]
+        self.assertEqual('host1', cn.host)
+        self.assertEqual(2048, cn.memory_mb)
+        self.assertEqual(['host1'], [svc.host for svc in snapshot.services])
+        self.assertEqual([uuids.instance],
+                         list(snapshot.instances['host1'].keys()))
+        self.assertEqual('host1',
+                         snapshot.instances['host1'][uuids.instance].host)
+
+    def test_roundtrip_compact_instances(self):
+        self.instances['host1'] = {
+            uuids.instance: host_manager.HostInstance(uuids.instance, 3)}
+        self._write()
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        instance = reader.load().instances['host1'][uuids.instance]
+
+        self.assertEqual(uuids.instance, instance.uuid)
+        self.assertEqual(3, instance.instance_type_id)
+
+    def test_load_unchanged_file_is_not_decoded_again(self):
+        self._write()
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        first = reader.load()
+        with mock.patch.object(reader, '_read') as mock_read:
+            second = reader.load()
+        self.assertFalse(mock_read.called)
+        self.assertIs(first, second)
+
+    def test_load_missing_file(self):
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertIsNone(reader.load())
+
+    def test_load_unknown_format(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{"created_at": 0}')
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertIsNone(reader.load())
+
+    def test_load_corrupted_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(host_state_snapshot.SNAPSHOT_MAGIC + b'{"created_at"')
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertIsNone(reader.load())
+
+    def _write_with_compute_node(self, **updates):
+        self._write()
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        data = jsonutils.loads(
+            content[len(host_state_snapshot.SNAPSHOT_MAGIC):])
+        data['compute_nodes'][0].update(updates)
+        with open(self.path, 'wb') as f:
+            f.write(host_state_snapshot.SNAPSHOT_MAGIC)
+            f.write(jsonutils.dump_as_bytes(data))
+
+    def test_load_newer_object_version(self):
+        # Written by a newer scheduler during a rolling upgrade
+        self._write_with_compute_node(**{'nova_object.version': '99.0'})
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertIsNone(reader.load())
+
+    def test_load_unknown_object(self):
+        self._write_with_compute_node(**{'nova_object.name': 'FutureNode'})
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertIsNone(reader.load())
+
+    @mock.patch('time.time')
+    def test_load_stale_snapshot(self, mock_time):
+        mock_time.return_value = 1000.0
+        self._write()
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertIsNotNone(reader.load())
+
+        mock_time.return_value = 1061.0
+        self.assertIsNone(reader.load())
+
+    @mock.patch('time.time')
+    @mock.patch.object(host_manager.HostManager, '_get_computes_and_services',
+                       return_value=([], {}))
+    @mock.patch.object(host_manager.HostManager, '_init_instance_info')
+    @mock.patch.object(host_manager.HostManager, '_init_aggregates')
+    def test_host_manager_out_of_date_snapshot(self, mock_init_agg,
+                                               mock_init_inst, mock_get_db,
+                                               mock_time):
+        self.flags(scheduler_host_state_snapshot_path=self.path,
+                   scheduler_driver_task_period=30)
+        mock_time.return_value = 1000.0
+        self.compute_nodes = []
+        self._write()
+        hm = host_manager.HostManager()
+        # The snapshot is out of date once the writer should have refreshed
+        # it.
+        self.assertEqual(30, hm._host_state_snapshot_reader.max_age)
+
+        mock_time.return_value = 1030.0
+        hm.get_all_host_states('fake-context')
+        self.assertFalse(mock_get_db.called)
+
+        mock_time.return_value = 1031.0
+        hm.get_all_host_states('fake-context')
+        mock_get_db.assert_called_once_with('fake-context')
+
+    def test_write_replaces_snapshot(self):
+        self._write()
+        reader = host_state_snapshot.HostStateSnapshotReader(self.path, 60)
+        self.assertEqual(1, len(reader.load().compute_nodes))
+
+        self.compute_nodes.append(
+            objects.ComputeNode(id=2, host='host2', hypervisor_hostname='n2',
+                                vcpus=4, memory_mb=2048))
+        self._write()
+        self.assertEqual(2, len(reader.load().compute_nodes))
+        self.assertEqual(['host_states'], os.listdir(os.path.dirname(
+            self.path)))
@@ -176,6 +176,21 @@ class SchedulerManagerTestCase(test.NoDBTestCase):
                                               mock.sentinel.host_name,
                                               mock.sentinel.instance_uuids)
 
+    def test_write_host_state_snapshot(self):
+        self.flags(scheduler_host_state_snapshot_path='/fake/path',
+                   scheduler_host_state_snapshot_writer=True)
+        with mock.patch.object(self.manager.driver.host_manager,
+                               'write_host_state_snapshot') as mock_write:
+            self.manager._write_host_state_snapshot(self.context)
+            mock_write.assert_called_once_with(self.context)
+
+    def test_write_host_state_snapshot_not_writer(self):
+        self.flags(scheduler_host_state_snapshot_path='/fake/path')
+        with mock.patch.object(self.manager.driver.host_manager,
+                               'write_host_state_snapshot') as mock_write:
+            self.manager._write_host_state_snapshot(self.context)
+            self.assertFalse(mock_write.called)
+
 
 class SchedulerInitTestCase(test.NoDBTestCase):
     """Test case for base scheduler driver initiation."""
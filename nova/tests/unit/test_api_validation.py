@@ -17,6 +17,7 @@ import re
 
 import fixtures
 from jsonschema import exceptions as jsonschema_exc
+import mock
 import six
 import sys
 
@@ -203,6 +204,62 @@ class MicroversionsSchemaTestCase(APIValidationTestCase):
                                     expected_detail=detail, req=req)
 
 
+class ValidatorCacheTestCase(APIValidationTestCase):
+
+    def setUp(self):
+        super(ValidatorCacheTestCase, self).setUp()
+        self.schema = {
+            'type': 'object',
+            'properties': {
+                'foo': {
+                    'type': 'integer',
+                }
+            },
+            'additionalProperties': False,
+        }
+
+    def test_validators_created_once(self):
+        with mock.patch.object(validators, '_SchemaValidator',
+                               wraps=validators._SchemaValidator) as mock_cls:
+            @validation.schema(self.schema)
+            def post(req, body):
+                return 'Validation succeeded.'
+
+            legacy_req = FakeRequest()
+            legacy_req.legacy_v2 = True
+            for _i in range(3):
+                post(body={'foo': 1}, req=FakeRequest())
+                post(body={'foo': 1, 'bar': 2}, req=legacy_req)
+
+        self.assertEqual([mock.call(self.schema, False),
+                          mock.call(self.schema, True)],
+                         mock_cls.call_args_list)
+
+    def test_schema_extended_after_decoration(self):
+        @validation.schema(self.schema)
+        def post(req, body):
+            return 'Validation succeeded.'
+
+        self.assertEqual('Validation succeeded.',
+                         post(body={'foo': 1}, req=FakeRequest()))
+        # Like the extensions extending the server create schema
+        self.schema['properties']['bar'] = {'type': 'string'}
+        self.assertEqual('Validation succeeded.',
+                         post(body={'foo': 1, 'bar': 'baz'},
+                              req=FakeRequest()))
+        detail = ("Invalid input for field/attribute bar. Value: 2. "
+                  "2 is not of type 'string'")
+        self.check_validation_error(post, body={'foo': 1, 'bar': 2},
+                                    expected_detail=detail)
+
+    def test_validator_class_reused(self):
+        validator = validators._SchemaValidator(self.schema).validator
+        other = validators._SchemaValidator({'type': 'object'}).validator
+        relaxed = validators._SchemaValidator(self.schema, True).validator
+        self.assertIs(type(validator), type(other))
+        self.assertIsNot(type(validator), type(relaxed))
+
+
 class RequiredDisableTestCase(APIValidationTestCase):
 
     def setUp(self):
@@ -26,6 +26,7 @@ from nova import context
 from nova import db
 from nova import objects
 from nova import test
+from nova.tests import uuidsentinel as uuids
 
 CONF = nova.conf.CONF
 
@@ -272,6 +273,50 @@ class AvailabilityZoneTestCases(test.TestCase):
         result = az.get_instance_availability_zone(self.context, fake_inst)
         self.assertEqual('inst-az', result)
 
+    def test_get_instance_availability_zones(self):
+        az.reset_cache()
+        service = self._create_service_with_topic('compute', 'host170')
+        self._add_to_aggregate(service, self.agg)
+        instances = [
+            objects.Instance(uuid=uuids.instance1, host='host170',
+                             availability_zone=None),
+            objects.Instance(uuid=uuids.instance2, host='host170',
+                             availability_zone=self.availability_zone),
+            objects.Instance(uuid=uuids.instance3, host='host171',
+                             availability_zone=None),
+            objects.Instance(uuid=uuids.instance4, host=None,
+                             availability_zone='inst-az'),
+        ]
+
+        with mock.patch.object(az, 'get_host_availability_zones',
+                               wraps=az.get_host_availability_zones
+                               ) as mock_get_azs:
+            azs = az.get_instance_availability_zones(self.context,
+                                                     instances)
+            # The second time, the availability zones are in the cache
+            self.assertEqual(azs, az.get_instance_availability_zones(
+                self.context, instances))
+
+        self.assertEqual({uuids.instance1: self.availability_zone,
+                          uuids.instance2: self.availability_zone,
+                          uuids.instance3: self.default_az,
+                          uuids.instance4: 'inst-az'}, azs)
+        mock_get_azs.assert_called_once_with(mock.ANY,
+                                             set(['host170', 'host171']))
+
+    @mock.patch.object(az._get_cache(), 'get_multi')
+    def test_get_instance_availability_zones_cache_differs(self,
+                                                           cache_get_multi):
+        service = self._create_service_with_topic('compute', 'host170')
+        self._add_to_aggregate(service, self.agg)
+        cache_get_multi.return_value = [self.default_az]
+
+        instance = objects.Instance(uuid=uuids.instance, host='host170',
+                                    availability_zone=self.availability_zone)
+        self.assertEqual(
+            {uuids.instance: self.availability_zone},
+            az.get_instance_availability_zones(self.context, [instance]))
+
     def test_get_instance_availability_zone_no_host_no_az(self):
         """Test get availability zone if neither host nor az is set."""
         fake_inst = objects.Instance(host=None, availability_zone=None)
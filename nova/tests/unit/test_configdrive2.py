@@ -62,6 +62,28 @@ class ConfigDriveTestCase(test.NoDBTestCase):
             if imagefile:
                 fileutils.delete_if_exists(imagefile)
 
+    @mock.patch.object(utils, 'execute')
+    def test_create_configdrive_iso_builtin(self, mock_execute):
+        self.flags(config_drive_format='iso9660',
+                   config_drive_iso9660_writer='builtin')
+        imagefile = None
+
+        try:
+            with configdrive.ConfigDriveBuilder(FakeInstanceMD()) as c:
+                (fd, imagefile) = tempfile.mkstemp(prefix='cd_iso_')
+                os.close(fd)
+                c.make_drive(imagefile)
+
+            self.assertFalse(mock_execute.called)
+            with open(imagefile, 'rb') as f:
+                image = f.read()
+            self.assertEqual(b'\x01CD001', image[16 * 2048:16 * 2048 + 6])
+            self.assertIn(b'This is some content', image)
+
+        finally:
+            if imagefile:
+                fileutils.delete_if_exists(imagefile)
+
     def test_create_configdrive_vfat(self):
         CONF.set_override('config_drive_format', 'vfat')
         imagefile = None
@@ -931,7 +931,7 @@ class MetadataHandlerTestCase(test.TestCase):
             return "foo"
 
         class CallableMD(object):
-            def lookup(self, path_info):
+            def lookup_document(self, path_info):
                 return verify
 
         response = fake_request(self, CallableMD(), "/bar")
@@ -978,6 +978,42 @@ class MetadataHandlerTestCase(test.TestCase):
         response_ctype = response.headers['Content-Type']
         self.assertTrue(response_ctype.startswith("application/json"))
 
+    def test_etag(self):
+        response = fake_request(self, self.mdinst, "/2009-04-04")
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(hashlib.sha256(response.body).hexdigest(),
+                         response.etag)
+
+        response = fake_request(self, self.mdinst, "/2009-04-04",
+                                headers={'If-None-Match':
+                                         '"%s"' % response.etag})
+        self.assertEqual(304, response.status_int)
+        self.assertEqual(b'', response.body)
+
+        response = fake_request(self, self.mdinst, "/2009-04-04",
+                                headers={'If-None-Match': '"stale"'})
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(b'meta-data/\nuser-data', response.body)
+
+    def test_document_rendered_once(self):
+        with mock.patch.object(self.mdinst, 'lookup',
+                               wraps=self.mdinst.lookup) as mock_lookup:
+            for i in range(2):
+                response = fake_request(self, self.mdinst,
+                                        "/2009-04-04/user-data")
+                self.assertEqual(base64.b64decode(self.instance.user_data),
+                                 response.body)
+        mock_lookup.assert_called_once_with("/2009-04-04/user-data")
+
+    def test_document_cached_without_documents(self):
+        # InstanceMetadata objects cached by older code have no _documents
+        del self.mdinst._documents
+        response = fake_request(self, self.mdinst, "/2009-04-04/user-data")
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(base64.b64decode(self.instance.user_data),
+                         response.body)
+        self.assertIn("/2009-04-04/user-data", self.mdinst._documents)
+
     def test_user_data_non_existing_fixed_address(self):
         self.stub_out('nova.network.api.API.get_fixed_ip_by_address',
                       return_non_existing_address)
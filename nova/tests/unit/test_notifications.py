@@ -567,6 +567,92 @@ class NotificationsTestCase(test.TestCase):
         self.assertEqual(0, len(fake_notifier.NOTIFICATIONS))
         self.assertEqual(0, mock_log_exception.call_count)
 
+    def test_send_update_in_background(self):
+        self.flags(instance_update_notification_workers=2)
+        self.stub_out('nova.notifications.base._INSTANCE_UPDATE_NOTIFICATIONS',
+                      notifications._InstanceUpdateNotificationQueue())
+        spawned = []
+        self.stub_out('nova.utils.spawn_n',
+                      lambda func, *args, **kwargs: spawned.append(func))
+
+        old = obj_base.obj_to_primitive(self.instance)
+        old['vm_state'] = None
+        for vm_state in (vm_states.ACTIVE, vm_states.STOPPED,
+                         vm_states.ERROR):
+            self.instance.vm_state = vm_state
+            notifications.send_update(self.context, old, self.instance)
+            old = obj_base.obj_to_primitive(self.instance)
+
+        # Nothing is sent until the greenthread runs. The notifications of
+        # an instance are sent in order by a single greenthread.
+        self.assertEqual(0, len(fake_notifier.NOTIFICATIONS))
+        self.assertEqual(1, len(spawned))
+        spawned[0]()
+
+        # The notifications were built from copies of the instance
+        self.assertEqual([vm_states.ACTIVE, vm_states.STOPPED,
+                          vm_states.ERROR],
+                         [n.payload['state']
+                          for n in fake_notifier.NOTIFICATIONS])
+        queue = notifications._INSTANCE_UPDATE_NOTIFICATIONS
+        self.assertEqual(3, queue.sent)
+        self.assertEqual(0, queue.dropped)
+
+    def test_send_update_in_background_instance_order(self):
+        self.flags(instance_update_notification_workers=2)
+        self.stub_out('nova.notifications.base._INSTANCE_UPDATE_NOTIFICATIONS',
+                      notifications._InstanceUpdateNotificationQueue())
+        spawned = []
+        self.stub_out('nova.utils.spawn_n',
+                      lambda func, *args, **kwargs: spawned.append(func))
+        other_instance = self.instance.obj_clone()
+        other_instance.uuid = uuids.other_instance
+        sent = []
+
+        def _send(context, instance, **kwargs):
+            sent.append((instance.uuid, instance.vm_state))
+            if len(sent) == 1:
+                # The other greenthread runs while the first notification
+                # of the instance is sent, it must not send the next one.
+                self.instance.vm_state = vm_states.STOPPED
+                notifications.send_update(self.context, self.instance,
+                                          self.instance)
+                spawned[1]()
+
+        self.instance.vm_state = vm_states.ACTIVE
+        notifications.send_update(self.context, self.instance, self.instance)
+        notifications.send_update(self.context, other_instance,
+                                  other_instance)
+        self.assertEqual(2, len(spawned))
+        with mock.patch.object(notifications,
+                               '_send_instance_update_notification',
+                               side_effect=_send):
+            spawned[0]()
+
+        self.assertEqual([(self.instance.uuid, vm_states.ACTIVE),
+                          (other_instance.uuid, other_instance.vm_state),
+                          (self.instance.uuid, vm_states.STOPPED)], sent)
+        self.assertEqual(3, notifications._INSTANCE_UPDATE_NOTIFICATIONS.sent)
+
+    @mock.patch.object(notifications.LOG, 'warning')
+    def test_send_update_in_background_queue_full(self, mock_warning):
+        self.flags(instance_update_notification_workers=1,
+                   instance_update_notification_max_pending=1)
+        self.stub_out('nova.notifications.base._INSTANCE_UPDATE_NOTIFICATIONS',
+                      notifications._InstanceUpdateNotificationQueue())
+        spawned = []
+        self.stub_out('nova.utils.spawn_n',
+                      lambda func, *args, **kwargs: spawned.append(func))
+
+        notifications.send_update(self.context, self.instance, self.instance)
+        notifications.send_update(self.context, self.instance, self.instance)
+        spawned[0]()
+
+        self.assertEqual(1, len(fake_notifier.NOTIFICATIONS))
+        queue = notifications._INSTANCE_UPDATE_NOTIFICATIONS
+        self.assertEqual(1, queue.dropped)
+        self.assertEqual(1, mock_warning.call_count)
+
     def _decorated_function(self, arg1, arg2):
         self.decorated_function_called = True
 
@@ -17,6 +17,7 @@
 
 import os.path
 
+import mock
 from oslo_policy import policy as oslo_policy
 from oslo_serialization import jsonutils
 import requests_mock
@@ -156,6 +157,75 @@ class PolicyTestCase(test.NoDBTestCase):
         policy.authorize(admin_context, lowercase_action, self.target)
         policy.authorize(admin_context, uppercase_action, self.target)
 
+    def test_authorize_memoized(self):
+        action = "example:allowed"
+        with mock.patch.object(policy._ENFORCER, 'authorize',
+                               wraps=policy._ENFORCER.authorize) as mock_auth:
+            self.assertTrue(policy.authorize(self.context, action,
+                                             self.target))
+            self.assertTrue(policy.authorize(self.context, action,
+                                             self.target))
+        self.assertEqual(1, mock_auth.call_count)
+
+    def test_authorize_memoized_failure(self):
+        action = "example:denied"
+        with mock.patch.object(policy._ENFORCER, 'authorize',
+                               wraps=policy._ENFORCER.authorize) as mock_auth:
+            self.assertRaises(exception.PolicyNotAuthorized, policy.authorize,
+                              self.context, action, self.target)
+            self.assertRaises(exception.PolicyNotAuthorized, policy.authorize,
+                              self.context, action, self.target)
+            self.assertFalse(policy.authorize(self.context, action,
+                                              self.target, False))
+        self.assertEqual(1, mock_auth.call_count)
+
+    def test_authorize_memoized_set_rules(self):
+        action = "example:allowed"
+        policy.authorize(self.context, action, self.target)
+        policy.set_rules(oslo_policy.Rules.from_dict({action: '!'}))
+        self.assertRaises(exception.PolicyNotAuthorized, policy.authorize,
+                          self.context, action, self.target)
+
+    def test_authorize_memoized_credentials(self):
+        action = "example:lowercase_admin"
+        self.assertRaises(exception.PolicyNotAuthorized, policy.authorize,
+                          self.context, action, self.target)
+        policy.authorize(self.context.elevated(), action, self.target)
+
+    def test_authorize_memoized_elevated(self):
+        action = "example:lowercase_admin"
+        self.assertRaises(exception.PolicyNotAuthorized, policy.authorize,
+                          self.context, action, self.target)
+        elevated = self.context.elevated()
+        self.assertIsNot(self.context._policy_results,
+                         elevated._policy_results)
+
+        with mock.patch.object(policy._ENFORCER, 'authorize',
+                               wraps=policy._ENFORCER.authorize) as mock_auth:
+            self.assertTrue(policy.authorize(elevated, action, self.target))
+            self.assertTrue(policy.authorize(elevated, action, self.target))
+            self.assertRaises(exception.PolicyNotAuthorized, policy.authorize,
+                              self.context, action, self.target)
+        self.assertEqual(1, mock_auth.call_count)
+
+    def test_authorize_memoized_loads_rules_once(self):
+        action = "example:allowed"
+        with mock.patch.object(policy._ENFORCER, 'load_rules',
+                               wraps=policy._ENFORCER.load_rules) as mock_load:
+            policy.authorize(self.context, action, self.target)
+            self.assertEqual(1, mock_load.call_count)
+            policy.authorize(self.context, action, self.target)
+            self.assertEqual(2, mock_load.call_count)
+
+    def test_authorize_not_memoized_target(self):
+        action = "example:allowed"
+        target = {'instance': {'project_id': 'fake'}}
+        with mock.patch.object(policy._ENFORCER, 'authorize',
+                               wraps=policy._ENFORCER.authorize) as mock_auth:
+            policy.authorize(self.context, action, target)
+            policy.authorize(self.context, action, target)
+        self.assertEqual(2, mock_auth.call_count)
+
 
 class IsAdminCheckTestCase(test.NoDBTestCase):
     def setUp(self):
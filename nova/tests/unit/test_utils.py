@@ -263,6 +263,121 @@ class GenericUtilsTestCase(test.NoDBTestCase):
             utils.ssh_execute('remotehost', 'ls', '-l')
         mock_method.assert_called_once_with(*expected_args)
 
+    @mock.patch.object(processutils, 'execute')
+    def test_execute_batch(self, mock_execute):
+        mock_execute.side_effect = [('out1', ''), ('out2', 'err2')]
+        results = utils.execute_batch([['ip', 'link'], ['ls', '-l']],
+                                      check_exit_code=[0, 1])
+        self.assertEqual([('out1', ''), ('out2', 'err2')], results)
+        self.assertEqual([mock.call('ip', 'link', check_exit_code=[0, 1]),
+                          mock.call('ls', '-l', check_exit_code=[0, 1])],
+                         mock_execute.mock_calls)
+
+    @mock.patch.object(utils.RootwrapProcessHelper, 'execute')
+    def test_execute_batch_root_ip_batch(self, mock_execute):
+        self.flags(use_rootwrap_daemon=False)
+        mock_execute.side_effect = [('', ''), ('out', 'err'), ('', '')]
+        results = utils.execute_batch([
+            ['brctl', 'addbr', 'br0'],
+            ['ip', 'link', 'add', 'veth0', 'type', 'veth', 'peer', 'name',
+             'veth1'],
+            ['ip', 'link', 'set', 'veth0', 'mtu', 1500],
+            ['brctl', 'addif', 'br0', 'veth0']], run_as_root=True)
+
+        self.assertEqual([('', ''), ('', ''), ('out', 'err'), ('', '')],
+                         results)
+        self.assertEqual([
+            mock.call('brctl', 'addbr', 'br0', run_as_root=True),
+            mock.call('ip', '-batch', '-',
+                      process_input='link add veth0 type veth peer name '
+                                    'veth1\nlink set veth0 mtu 1500\n',
+                      run_as_root=True),
+            mock.call('brctl', 'addif', 'br0', 'veth0', run_as_root=True)],
+            mock_execute.mock_calls)
+
+    @mock.patch.object(utils.RootwrapProcessHelper, 'execute',
+                       return_value=('', ''))
+    def test_execute_batch_root_not_batchable(self, mock_execute):
+        self.flags(use_rootwrap_daemon=False)
+        cmds = [['ip', 'link', 'set', 'a', 'up'],
+                ['ip', 'link', 'set', 'b', 'up']]
+        for kwargs in ({'check_exit_code': [0, 2, 254]},
+                       {'check_exit_code': [False]},
+                       {'check_exit_code': 0},
+                       {'process_input': 'foo'},
+                       {'attempts': 3}):
+            mock_execute.reset_mock()
+            utils.execute_batch(cmds, run_as_root=True, **kwargs)
+            self.assertEqual(
+                [mock.call(*cmd, run_as_root=True, **kwargs)
+                 for cmd in cmds],
+                mock_execute.mock_calls)
+
+        mock_execute.reset_mock()
+        cmds = [['ip', 'link', 'set', 'a', 'alias', 'with space'],
+                ['ip', 'link', 'set', 'b', 'up']]
+        utils.execute_batch(cmds, run_as_root=True)
+        self.assertEqual(2, mock_execute.call_count)
+
+    @mock.patch.object(utils.RootwrapProcessHelper, 'execute',
+                       return_value=('', ''))
+    def test_execute_batch_root_check_exit_code_false(self, mock_execute):
+        self.flags(use_rootwrap_daemon=False)
+        cmds = [['ip', 'link', 'set', 'a', 'up'],
+                ['ip', 'link', 'set', 'b', 'up']]
+        utils.execute_batch(cmds, run_as_root=True, check_exit_code=False)
+        # A tolerated failure must not stop the next commands, so each one
+        # runs on its own rather than as a line of 'ip -batch'.
+        self.assertEqual(
+            [mock.call('ip', 'link', 'set', 'a', 'up', run_as_root=True,
+                       check_exit_code=False),
+             mock.call('ip', 'link', 'set', 'b', 'up', run_as_root=True,
+                       check_exit_code=False)],
+            mock_execute.mock_calls)
+
+    @mock.patch.object(utils.RootwrapProcessHelper, 'execute',
+                       return_value=('', ''))
+    def test_execute_batch_root_check_exit_code_default(self, mock_execute):
+        self.flags(use_rootwrap_daemon=False)
+        cmds = [['ip', 'link', 'set', 'a', 'up'],
+                ['ip', 'link', 'set', 'b', 'up']]
+        for check_exit_code in ([0], True):
+            mock_execute.reset_mock()
+            utils.execute_batch(cmds, run_as_root=True,
+                                check_exit_code=check_exit_code)
+            mock_execute.assert_called_once_with(
+                'ip', '-batch', '-', run_as_root=True,
+                check_exit_code=check_exit_code,
+                process_input='link set a up\nlink set b up\n')
+
+    @mock.patch.object(utils.RootwrapProcessHelper, 'execute')
+    def test_execute_batch_root_fails(self, mock_execute):
+        self.flags(use_rootwrap_daemon=False)
+        mock_execute.side_effect = processutils.ProcessExecutionError
+        self.assertRaises(processutils.ProcessExecutionError,
+                          utils.execute_batch,
+                          [['brctl', 'addbr', 'br0'],
+                           ['brctl', 'stp', 'br0', 'off']],
+                          run_as_root=True)
+        mock_execute.assert_called_once_with('brctl', 'addbr', 'br0',
+                                             run_as_root=True)
+
+    @mock.patch('oslo_rootwrap.client.Client')
+    def test_execute_batch_root_daemon(self, mock_client):
+        self.flags(use_rootwrap_daemon=True)
+        client = mock_client.return_value
+        client.execute.return_value = (0, 'out', '')
+        utils.RootwrapDaemonHelper._clients.clear()
+        self.addCleanup(utils.RootwrapDaemonHelper._clients.clear)
+
+        results = utils.execute_batch([['ip', 'link', 'set', 'a', 'up'],
+                                       ['ip', 'link', 'set', 'b', 'up']],
+                                      run_as_root=True)
+
+        self.assertEqual([('', ''), ('out', '')], results)
+        client.execute.assert_called_once_with(
+            ['ip', '-batch', '-'], 'link set a up\nlink set b up\n')
+
 
 class TestCachedFile(test.NoDBTestCase):
     @mock.patch('os.path.getmtime', return_value=1)
@@ -72,3 +72,38 @@ class TestWeigher(test.NoDBTestCase):
         self.assertEqual(1, len(weighed_host))
         self.assertEqual('host1', weighed_host[0].obj.host)
         self.assertFalse(mock_weigh.called)
+
+    def _get_hosts(self):
+        host_values = [
+            ('host1', 'node1', {'free_ram_mb': 512}),
+            ('host2', 'node2', {'free_ram_mb': 1024}),
+            ('host3', 'node3', {'free_ram_mb': 1024}),
+            ('host4', 'node4', {'free_ram_mb': 8192}),
+            ('host5', 'node5', {'free_ram_mb': 256}),
+        ]
+        return [fakes.FakeHostState(host, node, values)
+                for host, node, values in host_values]
+
+    def test_limit(self):
+        weight_handler = scheduler_weights.HostWeightHandler()
+        hostinfo = self._get_hosts()
+
+        weighed_hosts = weight_handler.get_weighed_objects(
+            [ram.RAMWeigher()], hostinfo, {}, limit=2)
+        # host2 and host3 have the same weight, host2 comes first in the
+        # list so it wins as it would with a full sort.
+        self.assertEqual(['host4', 'host2'],
+                         [wh.obj.host for wh in weighed_hosts])
+
+    def test_limit_matches_full_sort(self):
+        weight_handler = scheduler_weights.HostWeightHandler()
+        hostinfo = self._get_hosts()
+
+        all_hosts = weight_handler.get_weighed_objects(
+            [ram.RAMWeigher()], hostinfo, {})
+        for limit in range(1, len(hostinfo) + 2):
+            weighed_hosts = weight_handler.get_weighed_objects(
+                [ram.RAMWeigher()], hostinfo, {}, limit=limit)
+            self.assertEqual(
+                [(wh.obj.host, wh.weight) for wh in all_hosts[:limit]],
+                [(wh.obj.host, wh.weight) for wh in weighed_hosts])
@@ -785,6 +785,75 @@ class IronicDriverTestCase(test.NoDBTestCase):
         self.assertEqual(hardware.InstanceInfo(state=nova_states.NOSTATE),
                          result)
 
+    @mock.patch.object(FAKE_CLIENT.node, 'get_by_instance_uuid')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_get_info_from_node_cache(self, mock_list, mock_gbiu):
+        self.flags(node_cache_max_age=60, group='ironic')
+        node = ironic_utils.get_test_node(
+            instance_uuid=self.instance_uuid,
+            properties={'memory_mb': 512, 'cpus': 2},
+            power_state=ironic_states.POWER_OFF)
+        mock_list.return_value = [node]
+        self.driver.get_available_nodes()
+
+        instance = fake_instance.fake_instance_obj(
+            self.ctx, uuid=self.instance_uuid, node=node.uuid)
+        result = self.driver.get_info(instance)
+        self.assertEqual(nova_states.SHUTDOWN, result.state)
+        self.assertFalse(mock_gbiu.called)
+
+    @mock.patch.object(FAKE_CLIENT.node, 'get_by_instance_uuid')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_get_info_node_cache_disabled(self, mock_list, mock_gbiu):
+        node = ironic_utils.get_test_node(
+            instance_uuid=self.instance_uuid,
+            properties={'memory_mb': 512, 'cpus': 2},
+            power_state=ironic_states.POWER_OFF)
+        mock_list.return_value = [node]
+        mock_gbiu.return_value = node
+        self.driver.get_available_nodes()
+
+        instance = fake_instance.fake_instance_obj(
+            self.ctx, uuid=self.instance_uuid, node=node.uuid)
+        self.driver.get_info(instance)
+        mock_gbiu.assert_called_once_with(instance.uuid,
+                                          fields=ironic_driver._NODE_FIELDS)
+
+    @mock.patch.object(FAKE_CLIENT.node, 'get_by_instance_uuid')
+    @mock.patch.object(FAKE_CLIENT.node, 'list')
+    def test_get_info_changed_node_not_from_cache(self, mock_list, mock_gbiu):
+        self.flags(node_cache_max_age=60, group='ironic')
+        properties = {'memory_mb': 512, 'cpus': 2}
+        cached = ironic_utils.get_test_node(
+            instance_uuid=self.instance_uuid, properties=properties,
+            power_state=ironic_states.POWER_OFF)
+        current = ironic_utils.get_test_node(
+            instance_uuid=self.instance_uuid, properties=properties,
+            power_state=ironic_states.POWER_ON)
+        mock_list.return_value = [cached]
+        mock_gbiu.return_value = current
+        self.driver.get_available_nodes()
+
+        instance = fake_instance.fake_instance_obj(
+            self.ctx, uuid=self.instance_uuid, node=cached.uuid)
+        # The driver powered the node on after the cache was refreshed
+        self.assertRaises(loopingcall.LoopingCallDone,
+                          self.driver._wait_for_power_state,
+                          instance, 'power on')
+        mock_gbiu.reset_mock()
+
+        result = self.driver.get_info(instance)
+        self.assertEqual(nova_states.RUNNING, result.state)
+        self.assertTrue(mock_gbiu.called)
+
+        # Until the next refresh of the cache
+        mock_list.return_value = [current]
+        self.driver.get_available_nodes()
+        mock_gbiu.reset_mock()
+        result = self.driver.get_info(instance)
+        self.assertEqual(nova_states.RUNNING, result.state)
+        self.assertFalse(mock_gbiu.called)
+
     @mock.patch.object(FAKE_CLIENT, 'node')
     def test_macs_for_instance(self, mock_node):
         node = ironic_utils.get_test_node()
@@ -262,7 +262,26 @@ class RbdTestCase(test.NoDBTestCase):
             mock_connect_from_rados.assert_called_once_with(None)
             self.assertFalse(mock_disconnect_from_rados.called)
 
-        mock_disconnect_from_rados.assert_called_once_with(None, None)
+        mock_disconnect_from_rados.assert_called_once_with(None, None,
+                                                           broken=False)
+
+    @mock.patch.object(rbd_utils.RBDDriver, '_disconnect_from_rados')
+    @mock.patch.object(rbd_utils.RBDDriver, '_connect_to_rados')
+    @mock.patch.object(rbd_utils, 'rbd')
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_rbd_volume_proxy_rados_error(self, mock_rados, mock_rbd,
+                                          mock_connect_from_rados,
+                                          mock_disconnect_from_rados):
+        mock_rados.Error = test.TestingException
+        mock_connect_from_rados.return_value = (None, None)
+
+        def _use_volume():
+            with rbd_utils.RBDVolumeProxy(self.driver, self.volume_name):
+                raise test.TestingException()
+
+        self.assertRaises(test.TestingException, _use_volume)
+        mock_disconnect_from_rados.assert_called_once_with(None, None,
+                                                           broken=True)
 
     @mock.patch.object(rbd_utils, 'rbd')
     @mock.patch.object(rbd_utils, 'rados')
@@ -291,6 +310,136 @@ class RbdTestCase(test.NoDBTestCase):
         mock_rados.Rados.open_ioctx.assert_called_once_with(self.rbd_pool)
         mock_rados.Rados.shutdown.assert_called_once_with()
 
+    @mock.patch.object(rbd_utils, '_connection_pool',
+                       new_callable=rbd_utils._RadosConnectionPool)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_connect_to_rados_persistent(self, mock_rados, mock_pool):
+        self.flags(images_rbd_persistent_connections=True, group='libvirt')
+        cluster = mock_rados.Rados.return_value
+
+        client, ioctx = self.driver._connect_to_rados()
+        self.driver._disconnect_from_rados(client, ioctx)
+        client2, ioctx2 = self.driver._connect_to_rados()
+
+        self.assertIs(client, client2)
+        self.assertIs(ioctx, ioctx2)
+        mock_rados.Rados.assert_called_once_with(rados_id=None, conffile='')
+        cluster.connect.assert_called_once_with()
+        cluster.open_ioctx.assert_called_once_with(self.rbd_pool)
+        self.assertFalse(cluster.shutdown.called)
+        self.assertFalse(ioctx.close.called)
+
+    @mock.patch.object(rbd_utils, '_connection_pool',
+                       new_callable=rbd_utils._RadosConnectionPool)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_connect_to_rados_persistent_concurrent(self, mock_rados,
+                                                    mock_pool):
+        self.flags(images_rbd_persistent_connections=True, group='libvirt')
+        cluster = mock_rados.Rados.return_value
+        cluster.open_ioctx.side_effect = [mock.sentinel.ioctx1,
+                                          mock.sentinel.ioctx2,
+                                          mock.sentinel.ioctx3]
+
+        client1, ioctx1 = self.driver._connect_to_rados()
+        client2, ioctx2 = self.driver._connect_to_rados()
+        client3, ioctx3 = self.driver._connect_to_rados('alt_pool')
+
+        # The cluster connection is shared, but each user gets its own ioctx
+        mock_rados.Rados.assert_called_once_with(rados_id=None, conffile='')
+        self.assertIs(client1, client2)
+        self.assertIs(client1, client3)
+        self.assertEqual(mock.sentinel.ioctx1, ioctx1)
+        self.assertEqual(mock.sentinel.ioctx2, ioctx2)
+        self.assertEqual(mock.sentinel.ioctx3, ioctx3)
+        cluster.open_ioctx.assert_has_calls([mock.call(self.rbd_pool),
+                                             mock.call(self.rbd_pool),
+                                             mock.call('alt_pool')])
+
+    @mock.patch.object(rbd_utils, '_connection_pool',
+                       new_callable=rbd_utils._RadosConnectionPool)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_connect_to_rados_persistent_error(self, mock_rados, mock_pool):
+        self.flags(images_rbd_persistent_connections=True, group='libvirt')
+        mock_rados.Error = test.TestingException
+        cluster = mock_rados.Rados.return_value
+        cluster.connect.side_effect = [test.TestingException, None]
+
+        self.assertRaises(test.TestingException,
+                          self.driver._connect_to_rados)
+        cluster.shutdown.assert_called_once_with()
+
+        # The failed connection is not kept in the pool
+        self.driver._connect_to_rados()
+        self.assertEqual(2, mock_rados.Rados.call_count)
+
+    @mock.patch.object(rbd_utils, '_connection_pool',
+                       new_callable=rbd_utils._RadosConnectionPool)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_connect_to_rados_persistent_connect_unlocked(self, mock_rados,
+                                                          mock_pool):
+        self.flags(images_rbd_persistent_connections=True, group='libvirt')
+        cluster = mock_rados.Rados.return_value
+
+        def _connect():
+            # A slow connection must not block the other RBD users
+            self.assertFalse(mock_pool._lock.locked())
+
+        cluster.connect.side_effect = _connect
+
+        self.driver._connect_to_rados()
+        cluster.connect.assert_called_once_with()
+
+    @mock.patch.object(rbd_utils, '_connection_pool',
+                       new_callable=rbd_utils._RadosConnectionPool)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_disconnect_from_rados_persistent_broken(self, mock_rados,
+                                                     mock_pool):
+        self.flags(images_rbd_persistent_connections=True, group='libvirt')
+        cluster1 = mock.Mock()
+        cluster2 = mock.Mock()
+        mock_rados.Rados.side_effect = [cluster1, cluster2]
+        cluster1.open_ioctx.side_effect = [mock.Mock(), mock.Mock(),
+                                           mock.Mock()]
+
+        client, idle_ioctx = self.driver._connect_to_rados()
+        client, broken_ioctx = self.driver._connect_to_rados()
+        client, in_use_ioctx = self.driver._connect_to_rados()
+        self.assertIs(cluster1, client)
+        self.driver._disconnect_from_rados(client, idle_ioctx)
+
+        self.driver._disconnect_from_rados(client, broken_ioctx, broken=True)
+
+        # The broken connection and the idle ones of its cluster are closed,
+        # and the next user connects again.
+        broken_ioctx.close.assert_called_once_with()
+        idle_ioctx.close.assert_called_once_with()
+        self.assertFalse(in_use_ioctx.close.called)
+        client2, ioctx2 = self.driver._connect_to_rados()
+        self.assertIs(cluster2, client2)
+        self.assertEqual(cluster2.open_ioctx.return_value, ioctx2)
+        self.driver._disconnect_from_rados(client2, ioctx2)
+        # The cluster is shut down once none of its ioctxs is used anymore
+        self.assertFalse(cluster1.shutdown.called)
+        self.driver._disconnect_from_rados(client, in_use_ioctx)
+        in_use_ioctx.close.assert_called_once_with()
+        cluster1.shutdown.assert_called_once_with()
+        self.assertFalse(cluster2.shutdown.called)
+        self.assertFalse(ioctx2.close.called)
+
+    @mock.patch.object(rbd_utils, '_connection_pool',
+                       new_callable=rbd_utils._RadosConnectionPool)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_disconnect_from_rados_persistent_not_pooled(self, mock_rados,
+                                                         mock_pool):
+        client = mock.Mock()
+        ioctx = mock.Mock()
+        self.flags(images_rbd_persistent_connections=True, group='libvirt')
+
+        self.driver._disconnect_from_rados(client, ioctx)
+
+        ioctx.close.assert_called_once_with()
+        client.shutdown.assert_called_once_with()
+
     def test_ceph_args_none(self):
         self.driver.rbd_user = None
         self.driver.ceph_conf = None
@@ -331,6 +480,7 @@ class RbdTestCase(test.NoDBTestCase):
                                     task_state=None)
 
         rbd = mock_rbd.RBD.return_value
+        del mock_rados.ReadOpCtx
         rbd.list.return_value = ['%s_test' % uuids.instance, '111_test']
 
         client = mock_client.return_value
@@ -351,6 +501,7 @@ class RbdTestCase(test.NoDBTestCase):
         setattr(mock_rbd, exception_name, test.TestingException)
         rbd = mock_rbd.RBD.return_value
         rbd.remove.side_effect = test.TestingException
+        del mock_rados.ReadOpCtx
         rbd.list.return_value = ['%s_test' % uuids.instance, '111_test']
 
         client = mock_client.return_value
@@ -382,6 +533,7 @@ class RbdTestCase(test.NoDBTestCase):
         setattr(mock_rbd, 'ImageHasSnapshots', test.TestingException)
         rbd = mock_rbd.RBD.return_value
         rbd.remove.side_effect = [test.TestingException, None]
+        del mock_rados.ReadOpCtx
         rbd.list.return_value = ['%s_test' % uuids.instance, '111_test']
         proxy = mock_proxy.return_value
         proxy.__enter__.return_value = proxy
@@ -406,6 +558,7 @@ class RbdTestCase(test.NoDBTestCase):
                                     task_state=task_states.RESIZE_REVERTING)
 
         rbd = mock_rbd.RBD.return_value
+        del mock_rados.ReadOpCtx
         rbd.list.return_value = ['%s_test' % uuids.instance, '111_test',
                                  '%s_test_disk.local' % uuids.instance]
 
@@ -417,6 +570,64 @@ class RbdTestCase(test.NoDBTestCase):
         client.__enter__.assert_called_once_with()
         client.__exit__.assert_called_once_with(None, None, None)
 
+    @mock.patch.object(rbd_utils, 'rbd')
+    @mock.patch.object(rbd_utils, 'rados')
+    @mock.patch.object(rbd_utils, 'RADOSClient')
+    def test_cleanup_volumes_rbd_directory(self, mock_client, mock_rados,
+                                           mock_rbd):
+        instance = objects.Instance(id=1, uuid=uuids.instance,
+                                    task_state=None)
+        rbd = mock_rbd.RBD.return_value
+        client = mock_client.return_value
+        client.ioctx.get_omap_vals.return_value = (
+            iter([('name_%s_disk' % uuids.instance, ''),
+                  ('name_%s_disk.local' % uuids.instance, '')]), 0)
+
+        self.driver.cleanup_volumes(instance)
+
+        read_op = mock_rados.ReadOpCtx.return_value.__enter__.return_value
+        client.ioctx.get_omap_vals.assert_called_once_with(
+            read_op, '', 'name_%s' % uuids.instance,
+            rbd_utils.RBD_DIRECTORY_PAGE_SIZE)
+        client.ioctx.operate_read_op.assert_called_once_with(
+            read_op, 'rbd_directory')
+        self.assertFalse(rbd.list.called)
+        rbd.remove.assert_has_calls([
+            mock.call(client.ioctx, '%s_disk' % uuids.instance),
+            mock.call(client.ioctx, '%s_disk.local' % uuids.instance)])
+        self.assertEqual(2, rbd.remove.call_count)
+
+    @mock.patch.object(rbd_utils, 'RBD_DIRECTORY_PAGE_SIZE', 2)
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_list_volumes_by_prefix_pages(self, mock_rados):
+        client = mock.Mock()
+        client.ioctx.get_omap_vals.side_effect = [
+            (iter([('name_abc_disk', ''), ('name_abc_disk.eph0', '')]), 0),
+            (iter([('name_abc_disk.local', '')]), 0)]
+
+        volumes = self.driver._list_volumes_by_prefix(client, 'abc')
+
+        self.assertEqual(['abc_disk', 'abc_disk.eph0', 'abc_disk.local'],
+                         volumes)
+        read_op = mock_rados.ReadOpCtx.return_value.__enter__.return_value
+        client.ioctx.get_omap_vals.assert_has_calls([
+            mock.call(read_op, '', 'name_abc', 2),
+            mock.call(read_op, 'name_abc_disk.eph0', 'name_abc', 2)])
+
+    @mock.patch.object(rbd_utils, 'rbd')
+    @mock.patch.object(rbd_utils, 'rados')
+    def test_list_volumes_by_prefix_no_directory(self, mock_rados, mock_rbd):
+        mock_rados.Error = test.TestingException
+        client = mock.Mock()
+        client.ioctx.operate_read_op.side_effect = test.TestingException
+        mock_rbd.RBD.return_value.list.return_value = ['abc_disk',
+                                                       'def_disk']
+
+        volumes = self.driver._list_volumes_by_prefix(client, 'abc')
+
+        self.assertEqual(['abc_disk'], volumes)
+        mock_rbd.RBD.return_value.list.assert_called_once_with(client.ioctx)
+
     @mock.patch.object(rbd_utils, 'rbd')
     @mock.patch.object(rbd_utils, 'rados')
     @mock.patch.object(rbd_utils, 'RADOSClient')
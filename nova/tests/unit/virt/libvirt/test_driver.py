@@ -5715,6 +5715,47 @@ class LibvirtConnTestCase(test.NoDBTestCase):
         self.assertEqual(conf.cpu.cores, 2)
         self.assertEqual(conf.cpu.threads, 1)
 
+    @mock.patch.object(hardware, 'get_best_cpu_topology',
+                       wraps=hardware.get_best_cpu_topology)
+    def test_get_guest_cpu_topology_cached(self, mock_best):
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), True)
+        flavor = objects.Flavor(vcpus=8,
+                                extra_specs={'hw:cpu_max_sockets': '4'})
+        image_meta = objects.ImageMeta.from_dict(self.test_image_meta)
+
+        topology = drvr._get_guest_cpu_topology(flavor, image_meta, None)
+        self.assertEqual((4, 2, 1), (topology.sockets, topology.cores,
+                                     topology.threads))
+        topology.sockets = 1
+        topology = drvr._get_guest_cpu_topology(flavor, image_meta, None)
+        self.assertEqual((4, 2, 1), (topology.sockets, topology.cores,
+                                     topology.threads))
+        self.assertEqual(1, mock_best.call_count)
+
+        # Other extra specs do not matter
+        flavor.extra_specs['hw:watchdog_action'] = 'reset'
+        drvr._get_guest_cpu_topology(flavor, image_meta, None)
+        self.assertEqual(1, mock_best.call_count)
+
+        image_meta = objects.ImageMeta.from_dict(
+            {'disk_format': 'raw',
+             'properties': {'hw_cpu_max_sockets': 2}})
+        topology = drvr._get_guest_cpu_topology(flavor, image_meta, None)
+        self.assertEqual((2, 4, 1), (topology.sockets, topology.cores,
+                                     topology.threads))
+        self.assertEqual(2, mock_best.call_count)
+
+        numa_topology = objects.InstanceNUMATopology(cells=[
+            objects.InstanceNUMACell(
+                id=0, cpuset=set(range(8)), memory=1024,
+                cpu_topology=objects.VirtCPUTopology(sockets=1, cores=4,
+                                                     threads=2))])
+        topology = drvr._get_guest_cpu_topology(flavor, image_meta,
+                                                numa_topology)
+        self.assertEqual((2, 2, 2), (topology.sockets, topology.cores,
+                                     topology.threads))
+        self.assertEqual(3, mock_best.call_count)
+
     def test_get_guest_memory_balloon_config_by_default(self):
         drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), True)
         instance_ref = objects.Instance(**self.test_instance)
@@ -17119,14 +17160,20 @@ class LibvirtVolumeUsageTestCase(test.NoDBTestCase):
                      {'volume_id': 2,
                       'device_name': 'vda'}]
 
-    def test_get_all_volume_usage(self):
-        def fake_block_stats(instance_name, disk):
-            return (169, 688640, 0, 0, -1)
+    @mock.patch.object(host.Host, 'get_guest')
+    def test_get_all_volume_usage(self, mock_get_guest):
+        mock_domain = mock_get_guest.return_value._domain
+        mock_domain.blockStats.return_value = (169, 688640, 0, 0, -1)
 
-        self.stubs.Set(self.drvr, 'block_stats', fake_block_stats)
         vol_usage = self.drvr.get_all_volume_usage(self.c,
               [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
 
+        # The domain is looked up once for both volumes
+        mock_get_guest.assert_called_once_with(self.ins_ref)
+        mock_domain.blockStats.assert_has_calls([mock.call('vde'),
+                                                 mock.call('vda')],
+                                                any_order=True)
+
         expected_usage = [{'volume': 1,
                            'instance': self.ins_ref,
                            'rd_bytes': 688640, 'wr_req': 0,
@@ -17146,6 +17193,23 @@ class LibvirtVolumeUsageTestCase(test.NoDBTestCase):
               [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
         self.assertEqual(vol_usage, [])
 
+    @mock.patch.object(host.Host, 'get_guest')
+    def test_get_all_volume_usage_volume_detached(self, mock_get_guest):
+        def fake_block_stats(disk):
+            if disk == 'vde':
+                raise fakelibvirt.libvirtError('invalid path')
+            return (169, 688640, 0, 0, -1)
+
+        mock_domain = mock_get_guest.return_value._domain
+        mock_domain.blockStats.side_effect = fake_block_stats
+        vol_usage = self.drvr.get_all_volume_usage(self.c,
+              [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
+
+        self.assertEqual([{'volume': 2,
+                           'instance': self.ins_ref,
+                           'rd_bytes': 688640, 'wr_req': 0,
+                           'rd_req': 169, 'wr_bytes': 0}], vol_usage)
+
 
 class LibvirtNonblockingTestCase(test.NoDBTestCase):
     """Test libvirtd calls are nonblocking."""
@@ -181,6 +181,7 @@ class HostTestCase(test.NoDBTestCase):
         hostimpl._init_events_pipe()
         fake_dom_xml = """
                 <domain type='kvm'>
+                  <name>instance-0000000a</name>
                   <uuid>cef19ce0-0ca2-11df-855d-b19fbce37686</uuid>
                   <devices>
                     <disk type='file'>
@@ -618,6 +619,122 @@ class HostTestCase(test.NoDBTestCase):
         self.assertEqual(dom0, result[0]._domain)
         self.assertEqual(dom1, result[1]._domain)
 
+    def _enable_domain_cache(self):
+        self.flags(domain_cache_ttl=60, group='libvirt')
+        self.host._domain_events_registered = True
+
+    def test_domain_cache_disabled_by_default(self):
+        self.host._domain_events_registered = True
+        self.assertFalse(self.host._domain_cache_enabled())
+
+    def test_domain_cache_disabled_without_events(self):
+        self.flags(domain_cache_ttl=60, group='libvirt')
+        self.host._domain_events_registered = False
+        self.assertFalse(self.host._domain_cache_enabled())
+
+    @mock.patch.object(fakelibvirt.Connection, "listAllDomains")
+    def test_list_instance_domains_cached(self, mock_list_all):
+        self._enable_domain_cache()
+        vm1 = FakeVirtDomain(id=3, name="instance00000001")
+        vm2 = FakeVirtDomain(name="instance00000002")
+
+        def fake_list_all(flags):
+            if flags == fakelibvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE:
+                return [vm1]
+            return [vm2]
+
+        mock_list_all.side_effect = fake_list_all
+
+        doms = self.host.list_instance_domains()
+        self.assertEqual([vm1], doms)
+        self.assertEqual(2, mock_list_all.call_count)
+
+        doms = self.host.list_instance_domains(only_running=False)
+        self.assertEqual(set([vm1, vm2]), set(doms))
+        # Served from the cache
+        self.assertEqual(2, mock_list_all.call_count)
+
+    @mock.patch.object(fakelibvirt.Connection, "listAllDomains")
+    @mock.patch.object(host.time, "time")
+    def test_list_instance_domains_cache_ttl(self, mock_time, mock_list_all):
+        self._enable_domain_cache()
+        mock_list_all.return_value = []
+        mock_time.return_value = 1000
+
+        self.host.list_instance_domains()
+        self.assertEqual(2, mock_list_all.call_count)
+
+        mock_time.return_value = 1059
+        self.host.list_instance_domains()
+        self.assertEqual(2, mock_list_all.call_count)
+
+        mock_time.return_value = 1060
+        self.host.list_instance_domains()
+        self.assertEqual(4, mock_list_all.call_count)
+
+    @mock.patch.object(fakelibvirt.Connection, "listAllDomains")
+    def test_domain_cache_events(self, mock_list_all):
+        self._enable_domain_cache()
+        mock_list_all.return_value = []
+        self.host.list_instance_domains()
+        self.assertEqual(2, mock_list_all.call_count)
+
+        vm1 = FakeVirtDomain(id=3, name="instance00000001")
+        self.host._update_domain_cache(host._DomainCacheUpdate(
+            vm1.name(), vm1, fakelibvirt.VIR_DOMAIN_EVENT_STARTED))
+        self.assertEqual([vm1], self.host.list_instance_domains())
+
+        self.host._update_domain_cache(host._DomainCacheUpdate(
+            vm1.name(), vm1, fakelibvirt.VIR_DOMAIN_EVENT_UNDEFINED))
+        self.assertEqual([], self.host.list_instance_domains())
+        self.assertEqual(2, mock_list_all.call_count)
+
+        # A stopped domain may or may not still be defined, so the next
+        # listing has to go back to libvirtd.
+        self.host._update_domain_cache(host._DomainCacheUpdate(
+            vm1.name(), vm1, fakelibvirt.VIR_DOMAIN_EVENT_STOPPED))
+        self.host.list_instance_domains()
+        self.assertEqual(4, mock_list_all.call_count)
+
+    @mock.patch.object(fakelibvirt.Connection, "listAllDomains")
+    def test_domain_cache_refresh_races_event(self, mock_list_all):
+        self._enable_domain_cache()
+        vm1 = FakeVirtDomain(id=3, name="instance00000001")
+
+        def fake_list_all(flags):
+            # An event dispatched while the listing is in progress
+            self.host._update_domain_cache(host._DomainCacheUpdate(
+                vm1.name(), vm1, fakelibvirt.VIR_DOMAIN_EVENT_STARTED))
+            return []
+
+        mock_list_all.side_effect = fake_list_all
+        self.host.list_instance_domains()
+        self.assertTrue(self.host._domain_cache_expired())
+
+    @mock.patch.object(host.Host, "_get_domain_by_name")
+    def test_get_domain_cached(self, fake_get_domain):
+        self._enable_domain_cache()
+        self.host._domain_cache_expiry = float('inf')
+        instance = objects.Instance(id="124")
+        dom = FakeVirtDomain(id=3, name=instance.name)
+
+        self.host._update_domain_cache(host._DomainCacheUpdate(
+            dom.name(), dom, fakelibvirt.VIR_DOMAIN_EVENT_STARTED))
+        self.assertEqual(dom, self.host.get_domain(instance))
+        self.assertFalse(fake_get_domain.called)
+
+        self.host._update_domain_cache(host._DomainCacheUpdate(
+            dom.name(), dom, fakelibvirt.VIR_DOMAIN_EVENT_UNDEFINED))
+        self.assertEqual(fake_get_domain.return_value,
+                         self.host.get_domain(instance))
+        fake_get_domain.assert_called_once_with(instance.name)
+
+    def test_domain_cache_invalidated_on_new_connection(self):
+        self.host._domain_cache = {'foo': mock.sentinel.dom}
+        self.host.get_connection()
+        self.assertEqual({}, self.host._domain_cache)
+        self.assertTrue(self.host._domain_events_registered)
+
     def test_cpu_features_bug_1217630(self):
         self.host.get_connection()
 
@@ -0,0 +1,139 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import struct
+
+import six
+
+from nova import test
+from nova.virt import iso9660
+
+
+SECTOR = iso9660.SECTOR_SIZE
+
+
+class _ImageReader(object):
+    """Just enough of an ISO 9660 reader to check what the writer did."""
+
+    def __init__(self, image):
+        self.image = image
+
+    def descriptor(self, index):
+        offset = (iso9660.FIRST_DESCRIPTOR_SECTOR + index) * SECTOR
+        return self.image[offset:offset + SECTOR]
+
+    @staticmethod
+    def _parse_record(record):
+        extent = struct.unpack('<I', record[2:6])[0]
+        size = struct.unpack('<I', record[10:14])[0]
+        flags = six.indexbytes(record, 25)
+        name_len = six.indexbytes(record, 32)
+        return extent, size, flags, record[33:33 + name_len]
+
+    def listdir(self, extent, size):
+        entries = {}
+        data = self.image[extent * SECTOR:extent * SECTOR + size]
+        offset = 0
+        while offset < len(data):
+            length = six.indexbytes(data, offset)
+            if length == 0:
+                # Padding up to the next sector
+                offset += SECTOR - offset % SECTOR
+                continue
+            extent_, size_, flags, name = self._parse_record(
+                data[offset:offset + length])
+            entries[name] = (extent_, size_, flags)
+            offset += length
+        return entries
+
+    def read(self, path, joliet):
+        descriptor = self.descriptor(1 if joliet else 0)
+        extent, size, _flags, _name = self._parse_record(descriptor[156:190])
+        for part in path.split('/'):
+            entries = self.listdir(extent, size)
+            if joliet:
+                name = part.encode('utf-16-be')
+            else:
+                name = part.encode('ascii')
+                if (name + b';1') in entries:
+                    name += b';1'
+            extent, size, _flags = entries[name]
+        return self.image[extent * SECTOR:extent * SECTOR + size]
+
+
+class ISO9660WriterTestCase(test.NoDBTestCase):
+
+    def _write(self, files, **kwargs):
+        writer = iso9660.ISO9660Writer('config-2', **kwargs)
+        for path, data in files:
+            writer.add_file(path, data)
+        output = six.BytesIO()
+        writer.write(output)
+        image = output.getvalue()
+        self.assertEqual(0, len(image) % SECTOR)
+        return _ImageReader(image)
+
+    def test_volume_descriptors(self):
+        reader = self._write([('hello', b'world')], publisher='nova')
+
+        primary = reader.descriptor(0)
+        self.assertEqual(b'\x01CD001\x01', primary[:7])
+        self.assertEqual(b'config-2'.ljust(32), primary[40:72])
+        self.assertEqual(b'nova'.ljust(128), primary[318:446])
+        total_sectors = struct.unpack('<I', primary[80:84])[0]
+        self.assertEqual(len(reader.image) // SECTOR, total_sectors)
+
+        joliet = reader.descriptor(1)
+        self.assertEqual(b'\x02CD001\x01', joliet[:7])
+        self.assertEqual(iso9660.JOLIET_ESCAPE_SEQUENCE, joliet[88:91])
+        self.assertEqual(u'config-2'.encode('utf-16-be'), joliet[40:56])
+
+        self.assertEqual(b'\xffCD001\x01', reader.descriptor(2)[:7])
+
+    def test_files(self):
+        files = [
+            ('openstack/latest/meta_data.json', b'{"uuid": "fake"}'),
+            ('openstack/latest/user_data', b'x' * (SECTOR * 2 + 1)),
+            ('openstack/content/0000', b''),
+            ('ec2/2009-04-04/meta-data.json', u'{"hostname": "\xe9"}'),
+        ]
+        reader = self._write(files)
+
+        for path, data in files:
+            if isinstance(data, six.text_type):
+                data = data.encode('utf-8')
+            self.assertEqual(data, reader.read(path, joliet=True))
+        self.assertEqual(b'{"uuid": "fake"}',
+                         reader.read('openstack/latest/meta_data.json',
+                                     joliet=False))
+        # '-' is not a valid ISO 9660 character
+        self.assertEqual(b'{"hostname": "\xc3\xa9"}',
+                         reader.read('ec2/2009_04_04/meta_data.json',
+                                     joliet=False))
+
+    def test_directory_spanning_sectors(self):
+        files = [('content/%04d' % i, b'%d' % i) for i in range(200)]
+        reader = self._write(files)
+
+        for path, data in files:
+            self.assertEqual(data, reader.read(path, joliet=True))
+
+    def test_add_file_twice(self):
+        writer = iso9660.ISO9660Writer('config-2')
+        writer.add_file('a/b', b'')
+        self.assertRaises(ValueError, writer.add_file, 'a/b', b'')
+        self.assertRaises(ValueError, writer.add_file, 'a/b/c', b'')
+
+    def test_add_file_too_deep(self):
+        writer = iso9660.ISO9660Writer('config-2')
+        self.assertRaises(ValueError, writer.add_file, '/'.join('a' * 9),
+                          b'')
@@ -20,6 +20,8 @@ A fake VMware VI API implementation.
 """
 
 import collections
+import copy
+import re
 import sys
 
 from oslo_log import log as logging
@@ -45,6 +47,8 @@ _db_content = {}
 _array_types = {}
 _vim_map = {}
 
+_EXTRA_CONFIG_PROPERTY = re.compile(r'^config\.extraConfig\["(.*)"\]$')
+
 LOG = logging.getLogger(__name__)
 
 
@@ -1108,6 +1112,27 @@ def _get_vm_mdo(vm_ref):
     return _db_content.get("VirtualMachine")[vm_ref]
 
 
+def _get_property_value(mdo, prop_name):
+    """Gets a property of a managed object, or None if it is not set."""
+    match = _EXTRA_CONFIG_PROPERTY.match(prop_name)
+    if match:
+        extra_config = mdo.get('config.extraConfig').OptionValue or []
+        for optval in extra_config:
+            if optval.key == match.group(1):
+                return optval
+        return None
+    try:
+        return mdo.get(prop_name)
+    except exception.NovaException:
+        return None
+
+
+def _same_value(a, b):
+    if a is None or b is None:
+        return a is b
+    return a == b
+
+
 def _merge_extraconfig(existing, changes):
     """Imposes the changes in extraConfig over the existing extraConfig."""
     existing = existing or []
@@ -1221,6 +1246,7 @@ class FakeVim(object):
         contents and the cookies for the session.
         """
         self._session = None
+        self._property_collectors = {}
         self.client = FakeClient()
         self.client.factory = FakeFactory()
 
@@ -1559,6 +1585,87 @@ class FakeVim(object):
                 continue
         return lst_ret_objs
 
+    def _create_property_collector(self, method, *args, **kwargs):
+        """Creates a property collector."""
+        collector = ManagedObjectReference(
+            "PropertyCollector", uuidutils.generate_uuid())
+        self._property_collectors[collector.value] = {'filters': [],
+                                                      'version': 0}
+        return collector
+
+    def _create_filter(self, method, collector, spec=None,
+                       partialUpdates=False):
+        """Creates a property filter on all the objects of a type, like
+        the ones of vim_util.get_objects.
+        """
+        filter_ref = ManagedObjectReference(
+            "PropertyFilter", uuidutils.generate_uuid())
+        # The last state of each object sent by WaitForUpdatesEx
+        self._property_collectors[collector.value]['filters'].append(
+            (filter_ref, spec.propSet[0], {}))
+        return filter_ref
+
+    def _wait_for_updates(self, method, collector, version=None,
+                          options=None):
+        """Returns what changed in the objects of the filters since the
+        previous call, without waiting, or None if nothing changed.
+        """
+        state = self._property_collectors[collector.value]
+        filter_updates = []
+        for filter_ref, prop_spec, sent in state['filters']:
+            current = {}
+            for mdo in _db_content[prop_spec.type].values():
+                current[mdo.obj.value] = (mdo.obj, dict(
+                    (prop_name,
+                     copy.deepcopy(_get_property_value(mdo, prop_name)))
+                    for prop_name in prop_spec.pathSet))
+
+            object_updates = []
+            for key, (obj, props) in six.iteritems(current):
+                old = sent.get(key)
+                object_update = DataObject('ns0:ObjectUpdate')
+                object_update.kind = 'enter' if old is None else 'modify'
+                object_update.obj = obj
+                object_update.changeSet = []
+                for prop_name, val in six.iteritems(props):
+                    if old is None:
+                        if val is None:
+                            continue
+                    elif _same_value(old[1][prop_name], val):
+                        continue
+                    change = DataObject('ns0:PropertyChange')
+                    change.name = prop_name
+                    if val is None:
+                        change.op = 'remove'
+                    else:
+                        change.op = 'assign'
+                        change.val = val
+                    object_update.changeSet.append(change)
+                if old is None or object_update.changeSet:
+                    object_updates.append(object_update)
+            for key in set(sent) - set(current):
+                object_update = DataObject('ns0:ObjectUpdate')
+                object_update.kind = 'leave'
+                object_update.obj = sent[key][0]
+                object_updates.append(object_update)
+
+            sent.clear()
+            sent.update(current)
+            if object_updates:
+                filter_update = DataObject('ns0:PropertyFilterUpdate')
+                filter_update.filter = filter_ref
+                filter_update.objectSet = object_updates
+                filter_updates.append(filter_update)
+
+        if not filter_updates:
+            return None
+        state['version'] += 1
+        update_set = DataObject('ns0:UpdateSet')
+        update_set.version = str(state['version'])
+        update_set.filterSet = filter_updates
+        update_set.truncated = False
+        return update_set
+
     def _add_port_group(self, method, *args, **kwargs):
         """Adds a port group to the host system."""
         _host_sk = list(_db_content["HostSystem"].keys())[0]
@@ -1661,6 +1768,15 @@ class FakeVim(object):
         elif attr_name == "CancelRetrievePropertiesEx":
             return lambda *args, **kwargs: self._retrieve_properties_cancel(
                                                 attr_name, *args, **kwargs)
+        elif attr_name == "CreatePropertyCollector":
+            return lambda *args, **kwargs: self._create_property_collector(
+                                                attr_name, *args, **kwargs)
+        elif attr_name == "CreateFilter":
+            return lambda *args, **kwargs: self._create_filter(
+                                                attr_name, *args, **kwargs)
+        elif attr_name == "WaitForUpdatesEx":
+            return lambda *args, **kwargs: self._wait_for_updates(
+                                                attr_name, *args, **kwargs)
         elif attr_name == "AddPortGroup":
             return lambda *args, **kwargs: self._add_port_group(attr_name,
                                                 *args, **kwargs)
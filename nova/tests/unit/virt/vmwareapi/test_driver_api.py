@@ -144,6 +144,19 @@ class VMwareSessionTestCase(test.NoDBTestCase):
             session._call_method(module, 'fira')
             fake_invoke.assert_called_once_with(module, 'fira')
 
+    @mock.patch.object(vm_util, 'vm_property_cache_mark_changed')
+    def test_wait_for_task(self, mock_mark_changed):
+        with test.nested(
+                mock.patch.object(driver.VMwareAPISession, '_create_session',
+                                  _fake_create_session),
+                mock.patch.object(driver.VMwareAPISession, 'wait_for_task',
+                                  return_value='fake-info'),
+        ) as (fake_create, fake_wait):
+            session = driver.VMwareAPISession()
+            self.assertEqual('fake-info', session._wait_for_task('fake-task'))
+            fake_wait.assert_called_once_with('fake-task')
+        mock_mark_changed.assert_called_once_with()
+
 
 class VMwareAPIVMTestCase(test.NoDBTestCase):
     """Unit tests for Vmware API connection calls."""
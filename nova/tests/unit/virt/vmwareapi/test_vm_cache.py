@@ -0,0 +1,111 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_utils import uuidutils
+
+from nova import test
+from nova.tests.unit.virt.vmwareapi import fake
+from nova.tests.unit.virt.vmwareapi import stubs
+from nova.virt.vmwareapi import driver
+from nova.virt.vmwareapi import vm_cache
+
+
+class VMPropertyCacheTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(VMPropertyCacheTestCase, self).setUp()
+        fake.reset()
+        stubs.set_stubs(self)
+        self.flags(vm_cache_max_age=60, group='vmware')
+        self.session = driver.VMwareAPISession()
+        self.uuid = uuidutils.generate_uuid()
+        self.vm_ref = fake.create_vm(uuid=self.uuid, name='vm-1')
+        self.cache = vm_cache.VMPropertyCache(self.session)
+
+    def _set_property(self, name, value):
+        fake._get_object(self.vm_ref).set(name, value)
+
+    def test_find_vm_ref(self):
+        other_ref = fake.create_vm(name='vm-2')
+        self.assertEqual(self.vm_ref, self.cache.find_vm_ref(self.uuid))
+        self.assertEqual(other_ref,
+                         self.cache.find_vm_ref('missing', name='vm-2'))
+        self.assertIsNone(self.cache.find_vm_ref('missing'))
+
+    def test_get_properties(self):
+        props = self.cache.get_properties(self.vm_ref)
+        self.assertEqual('poweredOff', props[vm_cache.POWER_STATE])
+        self.assertEqual('vm-1', props[vm_cache.NAME])
+        self.assertEqual(128, props[vm_cache.MEMORY_MB])
+
+    def test_lookups_use_local_copy(self):
+        self.cache.get_properties(self.vm_ref)
+        self._set_property('runtime.powerState', 'poweredOn')
+        with mock.patch.object(self.session, '_call_method') as mock_call:
+            props = self.cache.get_properties(self.vm_ref)
+        self.assertFalse(mock_call.called)
+        self.assertEqual('poweredOff', props[vm_cache.POWER_STATE])
+
+    def test_mark_changed(self):
+        self.cache.get_properties(self.vm_ref)
+        self._set_property('runtime.powerState', 'poweredOn')
+        self.cache.mark_changed()
+        props = self.cache.get_properties(self.vm_ref)
+        self.assertEqual('poweredOn', props[vm_cache.POWER_STATE])
+
+    @mock.patch('time.time')
+    def test_max_age(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.get_properties(self.vm_ref)
+        self._set_property('runtime.powerState', 'poweredOn')
+
+        mock_time.return_value = 1061
+        props = self.cache.get_properties(self.vm_ref)
+        self.assertEqual('poweredOn', props[vm_cache.POWER_STATE])
+
+    def test_only_changes_are_sent(self):
+        self.cache.get_properties(self.vm_ref)
+        self._set_property('runtime.powerState', 'suspended')
+        self.cache.mark_changed()
+        with mock.patch.object(self.cache, '_apply',
+                               wraps=self.cache._apply) as mock_apply:
+            self.cache.get_properties(self.vm_ref)
+        object_update = mock_apply.call_args[0][0]
+        self.assertEqual('modify', object_update.kind)
+        self.assertEqual([vm_cache.POWER_STATE],
+                         [change.name for change in object_update.changeSet])
+
+    def test_deleted_vm(self):
+        self.cache.get_properties(self.vm_ref)
+        del fake._db_content['VirtualMachine'][self.vm_ref]
+        self.cache.mark_changed()
+        self.assertIsNone(self.cache.get_properties(self.vm_ref))
+        self.assertIsNone(self.cache.find_vm_ref(self.uuid))
+
+    def test_update_failure_reloads(self):
+        self.cache.get_properties(self.vm_ref)
+        self.cache.mark_changed()
+        with mock.patch.object(self.session, '_call_method',
+                               side_effect=test.TestingException):
+            # The callers query vCenter when nothing is found
+            self.assertIsNone(self.cache.get_properties(self.vm_ref))
+            self.assertIsNone(self.cache.find_vm_ref(self.uuid))
+        with mock.patch.object(self.session, '_call_method',
+                               wraps=self.session._call_method) as mock_call:
+            props = self.cache.get_properties(self.vm_ref)
+        self.assertEqual('poweredOff', props[vm_cache.POWER_STATE])
+        self.assertEqual('CreatePropertyCollector',
+                         mock_call.call_args_list[0][0][1])
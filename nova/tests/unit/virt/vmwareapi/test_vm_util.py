@@ -482,6 +482,52 @@ class VMwareVMUtilTestCase(test.NoDBTestCase):
                           vm_util.get_vnc_port,
                           fake.FakeObjectRetrievalSession(fake_vms))
 
+    @mock.patch.object(driver.VMwareAPISession, 'vim', stubs.fake_vim_prop)
+    def test_get_vm_state_from_vm_property_cache(self):
+        self.flags(vm_cache_max_age=60, group='vmware')
+        self.addCleanup(vm_util.vm_property_cache_reset)
+        session = driver.VMwareAPISession()
+        vm_ref = fake.create_vm(uuid=self._instance.uuid)
+
+        self.assertEqual('poweredOff',
+                         vm_util.get_vm_state(session, self._instance))
+        fake._get_object(vm_ref).set('runtime.powerState', 'poweredOn')
+        with mock.patch.object(session, '_call_method') as mock_call:
+            self.assertEqual('poweredOff',
+                             vm_util.get_vm_state(session, self._instance))
+        self.assertFalse(mock_call.called)
+
+        vm_util.vm_property_cache_mark_changed()
+        self.assertEqual('poweredOn',
+                         vm_util.get_vm_state(session, self._instance))
+
+    @mock.patch.object(driver.VMwareAPISession, 'vim', stubs.fake_vim_prop)
+    def test_get_vnc_port_ignores_vm_property_cache(self):
+        self.flags(vm_cache_max_age=60, group='vmware')
+        self.flags(vnc_port=5900, group='vmware')
+        self.addCleanup(vm_util.vm_property_cache_reset)
+        session = driver.VMwareAPISession()
+        fake.create_vm(uuid=self._instance.uuid)
+        vm_util.get_vm_state(session, self._instance)
+        fake.create_vm(extraConfig=[
+            fake.OptionValue(key='RemoteDisplay.vnc.port', value='5900')])
+
+        # The port allocated since the cache was updated is not reused
+        self.assertEqual(5901, vm_util.get_vnc_port(session))
+
+    @mock.patch.object(driver.VMwareAPISession, 'vim', stubs.fake_vim_prop)
+    def test_get_vm_state_vm_property_cache_failure(self):
+        self.flags(vm_cache_max_age=60, group='vmware')
+        self.addCleanup(vm_util.vm_property_cache_reset)
+        session = driver.VMwareAPISession()
+        fake.create_vm(uuid=self._instance.uuid)
+        cache = vm_util._get_vm_property_cache(session)
+
+        with mock.patch.object(cache, '_create_collector',
+                               side_effect=test.TestingException):
+            self.assertEqual('poweredOff',
+                             vm_util.get_vm_state(session, self._instance))
+
     def test_get_cluster_ref_by_name_none(self):
         fake_objects = fake.FakeRetrieveResult()
         ref = vm_util.get_cluster_ref_by_name(
@@ -168,6 +168,56 @@ def _get_rootwrap_helper():
         return RootwrapProcessHelper()
 
 
+# Arguments which 'ip -batch' would not read back as a single argument
+_IP_BATCH_UNSAFE_ARG = re.compile(r'[\s"\'\\#]')
+
+
+def _ip_batchable(cmd, kwargs):
+    """Whether cmd can be run as a line of an 'ip -batch' run.
+
+    Only commands whose failures are all errors and which are not retried
+    can be grouped, as 'ip' stops at the first failing line of a batch and
+    does not report the exit code of that line.
+    """
+    if len(cmd) < 2 or cmd[0] != 'ip' or str(cmd[1]).startswith('-'):
+        return False
+    if (kwargs.get('process_input') is not None or
+            kwargs.get('attempts', 1) > 1):
+        # A retry would run the lines which succeeded again
+        return False
+    if 'check_exit_code' in kwargs:
+        # NOTE: Not compared with ==, as False == 0. Only the default, which
+        # fails on any non-zero exit code, is accepted.
+        check_exit_code = kwargs['check_exit_code']
+        if not (check_exit_code is True or
+                (isinstance(check_exit_code, list) and
+                 len(check_exit_code) == 1 and
+                 type(check_exit_code[0]) is int and
+                 check_exit_code[0] == 0)):
+            return False
+    return not any(arg == '' or _IP_BATCH_UNSAFE_ARG.search(arg)
+                   for arg in map(str, cmd))
+
+
+def _group_ip_commands(commands, kwargs):
+    """Groups consecutive 'ip' commands which can be run by one process.
+
+    Yields lists of commands, a list has more than one command only if they
+    can be run by a single 'ip -batch'.
+    """
+    group = []
+    for cmd in commands:
+        if _ip_batchable(cmd, kwargs):
+            group.append(cmd)
+            continue
+        if group:
+            yield group
+            group = []
+        yield [cmd]
+    if group:
+        yield group
+
+
 class RootwrapProcessHelper(object):
     def trycmd(self, *cmd, **kwargs):
         kwargs['root_helper'] = get_root_helper()
@@ -177,6 +227,23 @@ class RootwrapProcessHelper(object):
         kwargs['root_helper'] = get_root_helper()
         return processutils.execute(*cmd, **kwargs)
 
+    def execute_batch(self, commands, **kwargs):
+        """Runs privileged commands in order, see utils.execute_batch()."""
+        results = []
+        for group in _group_ip_commands(commands, kwargs):
+            if len(group) == 1:
+                results.append(self.execute(*group[0], **kwargs))
+                continue
+            # Consecutive 'ip' commands are run by a single 'ip -batch'
+            # process, rather than each forking its own privileged helper.
+            lines = ''.join(' '.join(str(arg) for arg in cmd[1:]) + '\n'
+                            for cmd in group)
+            batch_kwargs = dict(kwargs, process_input=lines)
+            out, err = self.execute('ip', '-batch', '-', **batch_kwargs)
+            results.extend([('', '')] * (len(group) - 1))
+            results.append((out, err))
+        return results
+
 
 class RootwrapDaemonHelper(RootwrapProcessHelper):
     _clients = {}
@@ -296,6 +363,28 @@ def execute(*cmd, **kwargs):
     return processutils.execute(*cmd, **kwargs)
 
 
+def execute_batch(commands, **kwargs):
+    """Runs several commands in order, with the same execute() kwargs.
+
+    :param commands: list of commands, each a list of arguments
+    :returns: list of the (stdout, stderr) of each command. Consecutive 'ip'
+              commands may run as a single 'ip -batch' process, in which case
+              the output of the batch is returned for the last of them and
+              the others have empty output.
+    :raises: ProcessExecutionError once a command fails, the commands after
+             it are not run. When the failing command ran as part of an
+             'ip -batch' process, the error is the one of that whole process:
+             its cmd is 'ip -batch -' and its stderr names the failing line,
+             and the commands of the batch before that line were run.
+
+    Privileged commands all go through the same rootwrap helper, which is
+    the rootwrap daemon if use_rootwrap_daemon is set.
+    """
+    if kwargs.get('run_as_root'):
+        return _get_rootwrap_helper().execute_batch(commands, **kwargs)
+    return [processutils.execute(*cmd, **kwargs) for cmd in commands]
+
+
 def ssh_execute(dest, *cmd, **kwargs):
     """Convenience wrapper to execute ssh command."""
     ssh_cmd = ['ssh', '-o', 'BatchMode=yes']
@@ -16,7 +16,6 @@
 """Config Drive v2 helper."""
 
 import os
-import shutil
 
 from oslo_utils import fileutils
 from oslo_utils import units
@@ -26,6 +25,7 @@ from nova import exception
 from nova.objects import fields
 from nova import utils
 from nova import version
+from nova.virt import iso9660
 
 CONF = nova.conf.CONF
 
@@ -69,12 +69,15 @@ class ConfigDriveBuilder(object):
         for data in self.mdfiles:
             self._add_file(basedir, data[0], data[1])
 
-    def _make_iso9660(self, path, tmpdir):
-        publisher = "%(product)s %(version)s" % {
+    def _get_publisher(self):
+        return "%(product)s %(version)s" % {
             'product': version.product_string(),
             'version': version.version_string_with_package()
             }
 
+    def _make_iso9660(self, path, tmpdir):
+        publisher = self._get_publisher()
+
         utils.execute(CONF.mkisofs_cmd,
                       '-o', path,
                       '-ldots',
@@ -91,7 +94,16 @@ class ConfigDriveBuilder(object):
                       attempts=1,
                       run_as_root=False)
 
-    def _make_vfat(self, path, tmpdir):
+    def _write_iso9660(self, path):
+        """Writes the ISO 9660 image straight from the metadata in memory."""
+        writer = iso9660.ISO9660Writer('config-2',
+                                       publisher=self._get_publisher())
+        for (mdpath, data) in self.mdfiles:
+            writer.add_file(mdpath, data)
+        with open(path, 'wb') as f:
+            writer.write(f)
+
+    def _make_vfat(self, path):
         # NOTE(mikal): This is a little horrible, but I couldn't find an
         # equivalent to genisoimage for vfat filesystems.
         with open(path, 'wb') as f:
@@ -113,12 +125,9 @@ class ConfigDriveBuilder(object):
                                                            error=err)
                 mounted = True
 
-                # NOTE(mikal): I can't just use shutils.copytree here,
-                # because the destination directory already
-                # exists. This is annoying.
-                for ent in os.listdir(tmpdir):
-                    shutil.copytree(os.path.join(tmpdir, ent),
-                                    os.path.join(mountdir, ent))
+                # The files are written straight to the mounted filesystem,
+                # there is no need to stage them in another directory first.
+                self._write_md_files(mountdir)
 
             finally:
                 if mounted:
@@ -131,16 +140,18 @@ class ConfigDriveBuilder(object):
 
         :raises ProcessExecuteError if a helper process has failed.
         """
-        with utils.tempdir() as tmpdir:
-            self._write_md_files(tmpdir)
-
-            if CONF.config_drive_format == 'iso9660':
-                self._make_iso9660(path, tmpdir)
-            elif CONF.config_drive_format == 'vfat':
-                self._make_vfat(path, tmpdir)
+        if CONF.config_drive_format == 'iso9660':
+            if CONF.config_drive_iso9660_writer == 'builtin':
+                self._write_iso9660(path)
             else:
-                raise exception.ConfigDriveUnknownFormat(
-                    format=CONF.config_drive_format)
+                with utils.tempdir() as tmpdir:
+                    self._write_md_files(tmpdir)
+                    self._make_iso9660(path, tmpdir)
+        elif CONF.config_drive_format == 'vfat':
+            self._make_vfat(path)
+        else:
+            raise exception.ConfigDriveUnknownFormat(
+                format=CONF.config_drive_format)
 
     def cleanup(self):
         if self.imagefile:
@@ -143,6 +143,9 @@ class IronicDriver(virt_driver.ComputeDriver):
             default='nova.virt.firewall.NoopFirewallDriver')
         self.node_cache = {}
         self.node_cache_time = 0
+        # UUIDs of the nodes this driver changed the state of since the
+        # node cache was last refreshed, see _get_node_for_instance()
+        self._changed_nodes = set()
 
         self.ironicclient = client_wrapper.IronicClientWrapper()
 
@@ -163,6 +166,23 @@ class IronicDriver(virt_driver.ComputeDriver):
         except ironic.exc.NotFound:
             raise exception.InstanceNotFound(instance_id=instance.uuid)
 
+    def _get_node_for_instance(self, instance):
+        """Get the node associated with the instance, from the node cache
+        when possible.
+
+        The cached node is only used if the cache is no older than
+        CONF.ironic.node_cache_max_age and this driver did not change the
+        node since the cache was refreshed, otherwise the node is looked
+        up in Ironic.
+        """
+        max_age = CONF.ironic.node_cache_max_age
+        if max_age and time.time() - self.node_cache_time <= max_age:
+            node = self.node_cache.get(instance.node)
+            if (node is not None and node.uuid not in self._changed_nodes and
+                    node.instance_uuid == instance.uuid):
+                return node
+        return self._validate_instance_and_node(instance)
+
     def _node_resources_unavailable(self, node_obj):
         """Determine whether the node's resources are in an acceptable state.
 
@@ -385,6 +405,7 @@ class IronicDriver(virt_driver.ComputeDriver):
                 _("Instance %s provisioning was aborted") % instance.uuid)
 
         node = self._validate_instance_and_node(instance)
+        self._changed_nodes.add(node.uuid)
         if node.provision_state == ironic_states.ACTIVE:
             # job is done
             LOG.debug("Ironic node %(node)s is now ACTIVE",
@@ -412,6 +433,7 @@ class IronicDriver(virt_driver.ComputeDriver):
     def _wait_for_power_state(self, instance, message):
         """Wait for the node to complete a power state change."""
         node = self._validate_instance_and_node(instance)
+        self._changed_nodes.add(node.uuid)
 
         if node.target_power_state == ironic_states.NOSTATE:
             raise loopingcall.LoopingCallDone()
@@ -517,6 +539,9 @@ class IronicDriver(virt_driver.ComputeDriver):
             return False
 
     def _refresh_cache(self):
+        # Nodes changed while the list is fetched may be listed with their
+        # previous state, a new set is started to keep track of them.
+        self._changed_nodes = set()
         # NOTE(lucasagomes): limit == 0 is an indicator to continue
         # pagination until there're no more values to be returned.
         node_cache = {}
@@ -584,7 +609,7 @@ class IronicDriver(virt_driver.ComputeDriver):
         :returns: a InstanceInfo object
         """
         try:
-            node = self._validate_instance_and_node(instance)
+            node = self._get_node_for_instance(instance)
         except exception.InstanceNotFound:
             return hardware.InstanceInfo(
                 state=map_power_state(ironic_states.NOSTATE))
@@ -805,6 +830,7 @@ class IronicDriver(virt_driver.ComputeDriver):
                 LOG.debug("Instance already removed from Ironic",
                           instance=instance)
                 raise loopingcall.LoopingCallDone()
+            self._changed_nodes.add(node.uuid)
             if node.provision_state in (ironic_states.NOSTATE,
                                         ironic_states.CLEANING,
                                         ironic_states.CLEANWAIT,
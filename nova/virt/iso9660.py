@@ -0,0 +1,359 @@
+# Copyright 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Minimal ISO 9660 image writer with Joliet extensions.
+
+This builds read-only images of a small set of in-memory files, such as
+config drives, without staging the files on disk or running genisoimage.
+The primary volume uses relaxed ISO 9660 names, like genisoimage does with
+'-l -allow-lowercase -allow-multidot', and the Joliet volume carries the
+real names which are used by both Linux and Windows guests.
+"""
+
+import re
+import struct
+import time
+
+import six
+
+SECTOR_SIZE = 2048
+# Sectors 0 to 15 are the system area, the volume descriptors follow.
+FIRST_DESCRIPTOR_SECTOR = 16
+
+MAX_ISO_NAME = 31
+MAX_JOLIET_NAME = 64
+MAX_DEPTH = 8
+
+# UCS-2 level 3
+JOLIET_ESCAPE_SEQUENCE = b'%/E'
+
+_INVALID_ISO_CHARS = re.compile(r'[^A-Za-z0-9_.]')
+
+FLAG_DIRECTORY = 0x02
+
+
+def _both_16(value):
+    return struct.pack('<H', value) + struct.pack('>H', value)
+
+
+def _both_32(value):
+    return struct.pack('<I', value) + struct.pack('>I', value)
+
+
+def _sectors(size):
+    return (size + SECTOR_SIZE - 1) // SECTOR_SIZE
+
+
+def _pad(data, size, fill=b' '):
+    return data[:size] + fill * (size - len(data[:size]))
+
+
+def _record_date(tm):
+    """7 byte date used in directory records, in UTC."""
+    return struct.pack('7B', tm.tm_year - 1900, tm.tm_mon, tm.tm_mday,
+                       tm.tm_hour, tm.tm_min, tm.tm_sec, 0)
+
+
+def _volume_date(tm):
+    """17 byte date used in volume descriptors, in UTC."""
+    if tm is None:
+        return b'0' * 16 + b'\x00'
+    return time.strftime('%Y%m%d%H%M%S00', tm).encode('ascii') + b'\x00'
+
+
+class _Node(object):
+    def __init__(self, name, parent=None, data=None):
+        self.name = name
+        self.parent = parent
+        self.data = data
+        self.children = {}
+        # Set while laying out the image
+        self.iso_name = None
+        self.joliet_name = None
+        self.extent = 0
+        self.iso_extent = 0
+        self.iso_size = 0
+        self.joliet_extent = 0
+        self.joliet_size = 0
+        self.number = 0
+
+    @property
+    def is_dir(self):
+        return self.data is None
+
+
+class ISO9660Writer(object):
+    """Builds an ISO 9660 image from files added with add_file().
+
+    The image is only laid out and written by write(), so files can be
+    added in any order.
+    """
+
+    def __init__(self, volume_id, publisher='', application='',
+                 system_id='LINUX'):
+        self.volume_id = volume_id
+        self.publisher = publisher
+        self.application = application
+        self.system_id = system_id
+        self.root = _Node('')
+        self._tm = time.gmtime()
+
+    def add_file(self, path, data):
+        """Adds a file to the image.
+
+        :param path: '/' separated path of the file in the image
+        :param data: content of the file, as bytes
+        """
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        parts = [part for part in path.split('/') if part]
+        if not parts:
+            raise ValueError('Invalid file path %r' % path)
+        if len(parts) > MAX_DEPTH:
+            raise ValueError('%s is nested too deeply for ISO 9660' % path)
+
+        node = self.root
+        for part in parts[:-1]:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Node(part, parent=node)
+            elif not child.is_dir:
+                raise ValueError('%s is a file in %s' % (part, path))
+            node = child
+        if parts[-1] in node.children:
+            raise ValueError('%s was already added' % path)
+        node.children[parts[-1]] = _Node(parts[-1], parent=node, data=data)
+
+    # Layout
+
+    def _directories(self):
+        """Returns the directories in path table order, breadth first with
+        the children of each directory sorted by name.
+        """
+        dirs = [self.root]
+        for node in dirs:
+            dirs.extend(child for child in self._sorted_children(node)
+                        if child.is_dir)
+        return dirs
+
+    @staticmethod
+    def _sorted_children(node):
+        return [node.children[name] for name in sorted(node.children)]
+
+    @staticmethod
+    def _assign_names(node):
+        used = set()
+        for child in ISO9660Writer._sorted_children(node):
+            iso_name = _INVALID_ISO_CHARS.sub('_', child.name)[:MAX_ISO_NAME]
+            count = 0
+            while iso_name.upper() in used:
+                count += 1
+                suffix = '_%d' % count
+                iso_name = (iso_name[:MAX_ISO_NAME - len(suffix)] + suffix)
+            used.add(iso_name.upper())
+
+            if not child.is_dir:
+                iso_name += ';1'
+            child.iso_name = iso_name.encode('ascii')
+            child.joliet_name = child.name[:MAX_JOLIET_NAME].encode(
+                'utf-16-be')
+
+    @staticmethod
+    def _dir_records_size(node, joliet):
+        # '.' and '..' records are 34 bytes each
+        sizes = [34, 34]
+        for child in ISO9660Writer._sorted_children(node):
+            name = child.joliet_name if joliet else child.iso_name
+            sizes.append(33 + len(name) + (len(name) + 1) % 2)
+        total = 0
+        for size in sizes:
+            # Records cannot span a sector boundary
+            if total % SECTOR_SIZE + size > SECTOR_SIZE:
+                total += SECTOR_SIZE - total % SECTOR_SIZE
+            total += size
+        return _sectors(total) * SECTOR_SIZE
+
+    @staticmethod
+    def _path_table_size(dirs, joliet):
+        size = 0
+        for node in dirs:
+            name_len = 1 if node is dirs[0] else len(
+                node.joliet_name if joliet else node.iso_name)
+            size += 8 + name_len + name_len % 2
+        return size
+
+    def _layout(self):
+        dirs = self._directories()
+        for number, node in enumerate(dirs, 1):
+            node.number = number
+            self._assign_names(node)
+
+        self.iso_path_table_size = self._path_table_size(dirs, False)
+        self.joliet_path_table_size = self._path_table_size(dirs, True)
+
+        # Primary, supplementary and terminator descriptors
+        sector = FIRST_DESCRIPTOR_SECTOR + 3
+        self.iso_l_table = sector
+        sector += _sectors(self.iso_path_table_size)
+        self.iso_m_table = sector
+        sector += _sectors(self.iso_path_table_size)
+        self.joliet_l_table = sector
+        sector += _sectors(self.joliet_path_table_size)
+        self.joliet_m_table = sector
+        sector += _sectors(self.joliet_path_table_size)
+
+        for node in dirs:
+            node.iso_size = self._dir_records_size(node, False)
+            node.iso_extent = sector
+            sector += node.iso_size // SECTOR_SIZE
+        for node in dirs:
+            node.joliet_size = self._dir_records_size(node, True)
+            node.joliet_extent = sector
+            sector += node.joliet_size // SECTOR_SIZE
+
+        files = []
+        for node in dirs:
+            for child in self._sorted_children(node):
+                if not child.is_dir:
+                    child.extent = sector if child.data else 0
+                    sector += _sectors(len(child.data))
+                    files.append(child)
+
+        self.total_sectors = sector
+        return dirs, files
+
+    # Serialization
+
+    def _dir_record(self, node, identifier, joliet):
+        if node.is_dir:
+            extent = node.joliet_extent if joliet else node.iso_extent
+            size = node.joliet_size if joliet else node.iso_size
+            flags = FLAG_DIRECTORY
+        else:
+            extent = node.extent
+            size = len(node.data)
+            flags = 0
+        length = 33 + len(identifier) + (len(identifier) + 1) % 2
+        record = (struct.pack('BB', length, 0) +
+                  _both_32(extent) + _both_32(size) +
+                  _record_date(self._tm) +
+                  struct.pack('BBB', flags, 0, 0) +
+                  _both_16(1) +
+                  struct.pack('B', len(identifier)) + identifier)
+        return _pad(record, length, b'\x00')
+
+    def _dir_records(self, node, joliet):
+        records = [self._dir_record(node, b'\x00', joliet),
+                   self._dir_record(node.parent or node, b'\x01', joliet)]
+        for child in self._sorted_children(node):
+            records.append(self._dir_record(
+                child, child.joliet_name if joliet else child.iso_name,
+                joliet))
+
+        data = b''
+        for record in records:
+            if len(data) % SECTOR_SIZE + len(record) > SECTOR_SIZE:
+                data += b'\x00' * (SECTOR_SIZE - len(data) % SECTOR_SIZE)
+            data += record
+        size = node.joliet_size if joliet else node.iso_size
+        return _pad(data, size, b'\x00')
+
+    @staticmethod
+    def _path_table(dirs, joliet, big_endian):
+        fmt = '>' if big_endian else '<'
+        table = b''
+        for node in dirs:
+            if node.parent is None:
+                identifier = b'\x00'
+                parent_number = 1
+            else:
+                identifier = node.joliet_name if joliet else node.iso_name
+                parent_number = node.parent.number
+            extent = node.joliet_extent if joliet else node.iso_extent
+            table += (struct.pack('BB', len(identifier), 0) +
+                      struct.pack(fmt + 'IH', extent, parent_number) +
+                      identifier + b'\x00' * (len(identifier) % 2))
+        return table
+
+    def _text(self, value, size, joliet):
+        if joliet:
+            # UCS-2 spaces, the odd sized fields end with a null byte
+            text = value.encode('utf-16-be')[:size - size % 2]
+            text += b'\x00 ' * ((size - len(text)) // 2)
+            return _pad(text, size, b'\x00')
+        return _pad(value.encode('ascii', 'replace'), size)
+
+    def _volume_descriptor(self, joliet):
+        if joliet:
+            path_table_size = self.joliet_path_table_size
+            l_table, m_table = self.joliet_l_table, self.joliet_m_table
+        else:
+            path_table_size = self.iso_path_table_size
+            l_table, m_table = self.iso_l_table, self.iso_m_table
+
+        escape = JOLIET_ESCAPE_SEQUENCE if joliet else b''
+        created = _volume_date(self._tm)
+        descriptor = (
+            struct.pack('B', 2 if joliet else 1) + b'CD001' +
+            struct.pack('BB', 1, 0) +
+            self._text(self.system_id, 32, joliet) +
+            self._text(self.volume_id, 32, joliet) +
+            b'\x00' * 8 +
+            _both_32(self.total_sectors) +
+            _pad(escape, 32, b'\x00') +
+            _both_16(1) + _both_16(1) + _both_16(SECTOR_SIZE) +
+            _both_32(path_table_size) +
+            struct.pack('<II', l_table, 0) +
+            struct.pack('>II', m_table, 0) +
+            self._dir_record(self.root, b'\x00', joliet) +
+            self._text('', 128, joliet) +
+            self._text(self.publisher, 128, joliet) +
+            self._text('', 128, joliet) +
+            self._text(self.application, 128, joliet) +
+            self._text('', 37, joliet) * 3 +
+            created + created + _volume_date(None) + created +
+            struct.pack('BB', 1, 0))
+        return _pad(descriptor, SECTOR_SIZE, b'\x00')
+
+    @staticmethod
+    def _terminator():
+        return _pad(struct.pack('B', 255) + b'CD001' + struct.pack('B', 1),
+                    SECTOR_SIZE, b'\x00')
+
+    def write(self, fileobj):
+        """Writes the image to a file object opened for binary writing."""
+        dirs, files = self._layout()
+
+        fileobj.write(b'\x00' * SECTOR_SIZE * FIRST_DESCRIPTOR_SECTOR)
+        fileobj.write(self._volume_descriptor(False))
+        fileobj.write(self._volume_descriptor(True))
+        fileobj.write(self._terminator())
+
+        for joliet, size in ((False, self.iso_path_table_size),
+                             (True, self.joliet_path_table_size)):
+            for big_endian in (False, True):
+                table = self._path_table(dirs, joliet, big_endian)
+                fileobj.write(_pad(table, _sectors(size) * SECTOR_SIZE,
+                                   b'\x00'))
+
+        for joliet in (False, True):
+            for node in dirs:
+                fileobj.write(self._dir_records(node, joliet))
+
+        for node in files:
+            fileobj.write(node.data)
+            remainder = len(node.data) % SECTOR_SIZE
+            if remainder:
+                fileobj.write(b'\x00' * (SECTOR_SIZE - remainder))
@@ -141,6 +141,11 @@ DISABLE_REASON_UNDEFINED = None
 # Guest config console string
 CONSOLE = "console=tty0 console=ttyS0"
 
+# Image properties the guest CPU topology depends on
+_IMAGE_CPU_TOPOLOGY_PROPS = ('hw_cpu_sockets', 'hw_cpu_cores',
+                             'hw_cpu_threads', 'hw_cpu_max_sockets',
+                             'hw_cpu_max_cores', 'hw_cpu_max_threads')
+
 GuestNumaConfig = collections.namedtuple(
     'GuestNumaConfig', ['cpuset', 'cputune', 'numaconfig', 'numatune'])
 
@@ -344,6 +349,10 @@ class LibvirtDriver(driver.ComputeDriver):
         self._fc_wwpns = None
         self._caps = None
         self._supported_perf_events = []
+        # The best guest CPU topology only depends on the flavor and image
+        # CPU properties and on the threads of the NUMA cells, keep the
+        # result around for the next guests of the same shape.
+        self._cpu_topologies = {}
         self.firewall_driver = firewall.load_driver(
             DEFAULT_FIREWALL_DRIVER,
             host=self._host)
@@ -3401,8 +3410,8 @@ class LibvirtDriver(driver.ComputeDriver):
         if cpu is None:
             return None
 
-        topology = hardware.get_best_cpu_topology(
-                flavor, image_meta, numa_topology=instance_numa_topology)
+        topology = self._get_guest_cpu_topology(flavor, image_meta,
+                                                instance_numa_topology)
 
         cpu.sockets = topology.sockets
         cpu.cores = topology.cores
@@ -3411,6 +3420,36 @@ class LibvirtDriver(driver.ComputeDriver):
 
         return cpu
 
+    def _get_guest_cpu_topology(self, flavor, image_meta,
+                                instance_numa_topology):
+        """Returns the best CPU topology for a guest.
+
+        Looking for the best topology goes through all the topologies
+        possible for the number of vCPUs, so the result is kept per
+        combination of the inputs it depends on.
+        """
+        extra_specs = flavor.extra_specs
+        props = image_meta.properties
+        cell_threads = None
+        if instance_numa_topology:
+            cell_threads = tuple(cell.cpu_topology.threads
+                                 for cell in instance_numa_topology.cells
+                                 if cell.cpu_topology)
+        key = (flavor.vcpus,
+               tuple(sorted((name, value)
+                            for name, value in six.iteritems(extra_specs)
+                            if name.startswith('hw:cpu_'))),
+               tuple(props.get(name) for name in _IMAGE_CPU_TOPOLOGY_PROPS),
+               cell_threads)
+        topology = self._cpu_topologies.get(key)
+        if topology is None:
+            topology = hardware.get_best_cpu_topology(
+                flavor, image_meta, numa_topology=instance_numa_topology)
+            self._cpu_topologies[key] = topology
+        return objects.VirtCPUTopology(sockets=topology.sockets,
+                                       cores=topology.cores,
+                                       threads=topology.threads)
+
     def _get_guest_disk_config(self, instance, name, disk_mapping, inst_type,
                                image_type=None):
         if CONF.libvirt.hw_disk_discard:
@@ -4657,21 +4696,24 @@ class LibvirtDriver(driver.ComputeDriver):
     def _get_guest_xml(self, context, instance, network_info, disk_info,
                        image_meta, rescue=None,
                        block_device_info=None, write_to_disk=False):
-        # NOTE(danms): Stringifying a NetworkInfo will take a lock. Do
-        # this ahead of time so that we don't acquire it while also
-        # holding the logging lock.
-        network_info_str = str(network_info)
-        msg = ('Start _get_guest_xml '
-               'network_info=%(network_info)s '
-               'disk_info=%(disk_info)s '
-               'image_meta=%(image_meta)s rescue=%(rescue)s '
-               'block_device_info=%(block_device_info)s' %
-               {'network_info': network_info_str, 'disk_info': disk_info,
-                'image_meta': image_meta, 'rescue': rescue,
-                'block_device_info': block_device_info})
-        # NOTE(mriedem): block_device_info can contain auth_password so we
-        # need to sanitize the password in the message.
-        LOG.debug(strutils.mask_password(msg), instance=instance)
+        # Building and sanitizing the message costs more than building the
+        # configuration of small guests, only do it when it is logged.
+        if LOG.isEnabledFor(logging.DEBUG):
+            # NOTE(danms): Stringifying a NetworkInfo will take a lock. Do
+            # this ahead of time so that we don't acquire it while also
+            # holding the logging lock.
+            network_info_str = str(network_info)
+            msg = ('Start _get_guest_xml '
+                   'network_info=%(network_info)s '
+                   'disk_info=%(disk_info)s '
+                   'image_meta=%(image_meta)s rescue=%(rescue)s '
+                   'block_device_info=%(block_device_info)s' %
+                   {'network_info': network_info_str, 'disk_info': disk_info,
+                    'image_meta': image_meta, 'rescue': rescue,
+                    'block_device_info': block_device_info})
+            # NOTE(mriedem): block_device_info can contain auth_password so
+            # we need to sanitize the password in the message.
+            LOG.debug(strutils.mask_password(msg), instance=instance)
         conf = self._get_guest_config(instance, network_info, image_meta,
                                       disk_info, rescue, block_device_info,
                                       context)
@@ -5246,16 +5288,22 @@ class LibvirtDriver(driver.ComputeDriver):
 
         for instance_bdms in compute_host_bdms:
             instance = instance_bdms['instance']
-
+            mountpoints = {}
             for bdm in instance_bdms['instance_bdms']:
                 mountpoint = bdm['device_name']
                 if mountpoint.startswith('/dev/'):
                     mountpoint = mountpoint[5:]
-                volume_id = bdm['volume_id']
+                mountpoints[bdm['volume_id']] = mountpoint
+            if not mountpoints:
+                continue
 
-                LOG.debug("Trying to get stats for the volume %s",
-                          volume_id, instance=instance)
-                vol_stats = self.block_stats(instance, mountpoint)
+            # The domain is looked up once for all the volumes of the
+            # instance.
+            all_stats = self._get_block_stats(instance,
+                                              set(mountpoints.values()))
+            for bdm in instance_bdms['instance_bdms']:
+                volume_id = bdm['volume_id']
+                vol_stats = all_stats.get(mountpoints[volume_id])
 
                 if vol_stats:
                     stats = dict(volume=volume_id,
@@ -5273,28 +5321,38 @@ class LibvirtDriver(driver.ComputeDriver):
 
         return vol_usage
 
-    def block_stats(self, instance, disk_id):
-        """Note that this function takes an instance name."""
+    def _get_block_stats(self, instance, disk_ids):
+        """Return the block stats of several disks of an instance, keyed by
+        disk, looking up the domain once. Disks without stats are left out.
+        """
         try:
             guest = self._host.get_guest(instance)
-
-            # TODO(sahid): We are converting all calls from a
-            # virDomain object to use nova.virt.libvirt.Guest.
-            # We should be able to remove domain at the end.
-            domain = guest._domain
-            return domain.blockStats(disk_id)
-        except libvirt.libvirtError as e:
-            errcode = e.get_error_code()
-            LOG.info(_LI('Getting block stats failed, device might have '
-                         'been detached. Instance=%(instance_name)s '
-                         'Disk=%(disk)s Code=%(errcode)s Error=%(e)s'),
-                     {'instance_name': instance.name, 'disk': disk_id,
-                      'errcode': errcode, 'e': e},
-                     instance=instance)
         except exception.InstanceNotFound:
             LOG.info(_LI('Could not find domain in libvirt for instance %s. '
                          'Cannot get block stats for device'), instance.name,
                      instance=instance)
+            return {}
+
+        all_stats = {}
+        for disk_id in disk_ids:
+            try:
+                # TODO(sahid): We are converting all calls from a
+                # virDomain object to use nova.virt.libvirt.Guest.
+                # We should be able to remove domain at the end.
+                all_stats[disk_id] = guest._domain.blockStats(disk_id)
+            except libvirt.libvirtError as e:
+                errcode = e.get_error_code()
+                LOG.info(_LI('Getting block stats failed, device might have '
+                             'been detached. Instance=%(instance_name)s '
+                             'Disk=%(disk)s Code=%(errcode)s Error=%(e)s'),
+                         {'instance_name': instance.name, 'disk': disk_id,
+                          'errcode': errcode, 'e': e},
+                         instance=instance)
+        return all_stats
+
+    def block_stats(self, instance, disk_id):
+        """Note that this function takes an instance name."""
+        return self._get_block_stats(instance, [disk_id]).get(disk_id)
 
     def get_console_pool_info(self, console_type):
         # TODO(mdragon): console proxy should be implemented for libvirt,
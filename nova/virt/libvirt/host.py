@@ -27,11 +27,13 @@ the raw libvirt API. These APIs are then used by all
 the other libvirt related classes
 """
 
+import collections
 import operator
 import os
 import socket
 import sys
 import threading
+import time
 
 from eventlet import greenio
 from eventlet import greenthread
@@ -73,6 +75,11 @@ CONF = nova.conf.CONF
 HV_DRIVER_QEMU = "QEMU"
 HV_DRIVER_XEN = "Xen"
 
+# Update queued by the native event thread for the domain cache, see
+# Host._update_domain_cache().
+_DomainCacheUpdate = collections.namedtuple('_DomainCacheUpdate',
+                                            ['name', 'dom', 'event'])
+
 
 class Host(object):
 
@@ -103,6 +110,15 @@ class Host(object):
         #                STOPPED lifecycle event some seconds.
         self._lifecycle_delay = 15
 
+        # In-memory cache of domain handles keyed by domain name, kept
+        # current from lifecycle events and reconciled against libvirtd
+        # every CONF.libvirt.domain_cache_ttl seconds.
+        self._domain_events_registered = False
+        self._domain_cache = {}
+        self._domain_cache_active = set()
+        self._domain_cache_expiry = 0
+        self._domain_cache_generation = 0
+
     def _native_thread(self):
         """Receives async events coming in from libvirtd.
 
@@ -153,6 +169,10 @@ class Host(object):
         elif event == libvirt.VIR_DOMAIN_EVENT_RESUMED:
             transition = virtevent.EVENT_LIFECYCLE_RESUMED
 
+        # Queue the cache update first so that lifecycle event handlers
+        # already see the new state of the domain.
+        self._queue_event(_DomainCacheUpdate(dom.name(), dom, event))
+
         if transition is not None:
             self._queue_event(virtevent.LifecycleEvent(uuid, transition))
 
@@ -247,6 +267,9 @@ class Host(object):
                     # call possibly with delay
                     self._event_emit_delayed(event)
 
+                elif isinstance(event, _DomainCacheUpdate):
+                    self._update_domain_cache(event)
+
                 elif 'conn' in event and 'reason' in event:
                     last_close_event = event
             except native_Queue.Empty:
@@ -261,6 +284,7 @@ class Host(object):
                 reason = str(last_close_event['reason'])
                 msg = _("Connection to libvirt lost: %s") % reason
                 self._wrapped_conn = None
+                self._invalidate_domain_cache()
                 if self._conn_event_handler is not None:
                     self._conn_event_handler(False, msg)
 
@@ -359,6 +383,8 @@ class Host(object):
                 self._conn_event_handler(bool(wrapped_conn), disable_reason)
 
         self._wrapped_conn = wrapped_conn
+        # Domain handles are tied to the connection they were looked up on.
+        self._invalidate_domain_cache()
 
         try:
             LOG.debug("Registering for lifecycle events %s", self)
@@ -367,7 +393,9 @@ class Host(object):
                 libvirt.VIR_DOMAIN_EVENT_ID_LIFECYCLE,
                 self._event_lifecycle_callback,
                 self)
+            self._domain_events_registered = True
         except Exception as e:
+            self._domain_events_registered = False
             LOG.warning(_LW("URI %(uri)s does not support events: %(error)s"),
                      {'uri': self._uri, 'error': e})
 
@@ -487,6 +515,10 @@ class Host(object):
 
         :returns: a libvirt.Domain object
         """
+        if self._domain_cache_enabled() and not self._domain_cache_expired():
+            dom = self._domain_cache.get(instance.name)
+            if dom is not None:
+                return dom
         return self._get_domain_by_name(instance.name)
 
     def get_guest(self, instance):
@@ -577,6 +609,72 @@ class Host(object):
 
         return doms
 
+    def _domain_cache_enabled(self):
+        return (CONF.libvirt.domain_cache_ttl > 0 and
+                self._domain_events_registered and
+                not self._skip_list_all_domains)
+
+    def _domain_cache_expired(self):
+        return time.time() >= self._domain_cache_expiry
+
+    def _invalidate_domain_cache(self):
+        self._domain_cache = {}
+        self._domain_cache_active = set()
+        self._domain_cache_expiry = 0
+        self._domain_cache_generation += 1
+
+    def _update_domain_cache(self, update):
+        """Apply a lifecycle event to the domain cache.
+
+        Events which leave a domain running only refresh its handle.
+        Anything else may have changed whether the domain is still
+        defined, so the entry is dropped and the next listing reconciles
+        the whole cache against libvirtd.
+        """
+        self._domain_cache_generation += 1
+        if update.event in (libvirt.VIR_DOMAIN_EVENT_STARTED,
+                            libvirt.VIR_DOMAIN_EVENT_RESUMED,
+                            libvirt.VIR_DOMAIN_EVENT_SUSPENDED):
+            self._domain_cache[update.name] = update.dom
+            self._domain_cache_active.add(update.name)
+            return
+
+        self._domain_cache.pop(update.name, None)
+        self._domain_cache_active.discard(update.name)
+        if update.event != libvirt.VIR_DOMAIN_EVENT_UNDEFINED:
+            self._domain_cache_expiry = 0
+
+    def _refresh_domain_cache(self):
+        generation = self._domain_cache_generation
+        conn = self.get_connection()
+        active = conn.listAllDomains(libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE)
+        inactive = conn.listAllDomains(
+            libvirt.VIR_CONNECT_LIST_DOMAINS_INACTIVE)
+
+        cache = {}
+        for dom in active + inactive:
+            cache[dom.name()] = dom
+        self._domain_cache = cache
+        self._domain_cache_active = set(dom.name() for dom in active)
+        # NOTE: libvirt calls yield to other greenthreads, so events may
+        # have been dispatched while we were listing. In that case the
+        # listing may already be out of date and is not trusted any
+        # longer than this call.
+        if generation == self._domain_cache_generation:
+            self._domain_cache_expiry = (time.time() +
+                                         CONF.libvirt.domain_cache_ttl)
+        else:
+            self._domain_cache_expiry = 0
+        LOG.debug("Reconciled domain cache: %(active)d active and "
+                  "%(inactive)d inactive domains",
+                  {'active': len(active), 'inactive': len(inactive)})
+
+    def _list_instance_domains_cached(self, only_running=True):
+        if self._domain_cache_expired():
+            self._refresh_domain_cache()
+        return [dom for name, dom in self._domain_cache.items()
+                if not only_running or name in self._domain_cache_active]
+
     def list_guests(self, only_running=True, only_guests=True):
         """Get a list of Guest objects for nova instances
 
@@ -608,7 +706,10 @@ class Host(object):
 
         if not self._skip_list_all_domains:
             try:
-                alldoms = self._list_instance_domains_fast(only_running)
+                if self._domain_cache_enabled():
+                    alldoms = self._list_instance_domains_cached(only_running)
+                else:
+                    alldoms = self._list_instance_domains_fast(only_running)
             except (libvirt.libvirtError, AttributeError) as ex:
                 LOG.info(_LI("Unable to use bulk domain list APIs, "
                              "falling back to slow code path: %(ex)s"),
@@ -14,6 +14,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import threading
+
 from eventlet import tpool
 from six.moves import urllib
 
@@ -31,6 +34,7 @@ from oslo_utils import excutils
 from oslo_utils import units
 
 from nova.compute import task_states
+import nova.conf
 from nova import exception
 from nova.i18n import _
 from nova.i18n import _LE
@@ -38,8 +42,127 @@ from nova.i18n import _LW
 from nova import utils
 from nova.virt.libvirt import utils as libvirt_utils
 
+CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 
+# The RADOS object holding the omap index of the format 2 images of a pool,
+# keyed by 'name_<image name>'.
+RBD_DIRECTORY = 'rbd_directory'
+RBD_DIRECTORY_NAME_PREFIX = 'name_'
+RBD_DIRECTORY_PAGE_SIZE = 1024
+
+
+class _RadosConnectionPool(object):
+    """Connected RADOS cluster handles shared by all the RBDDriver objects of
+    this process, and the idle I/O contexts opened on them.
+
+    Only used when CONF.libvirt.images_rbd_persistent_connections is set.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(rados_id, conffile): connected rados.Rados}
+        self._clusters = {}
+        # {(rados_id, conffile, pool): [idle rados.Ioctx]}
+        self._idle_ioctxs = collections.defaultdict(list)
+        # {id(ioctx): ((rados_id, conffile, pool), rados.Rados)} for the
+        # ioctxs in use
+        self._in_use = {}
+
+    @staticmethod
+    def _connect(rados_id, conffile):
+        client = rados.Rados(rados_id=rados_id, conffile=conffile)
+        try:
+            client.connect()
+        except rados.Error:
+            # shutdown cannot raise an exception
+            client.shutdown()
+            raise
+        return client
+
+    def get(self, rados_id, conffile, pool):
+        key = (rados_id, conffile)
+        with self._lock:
+            idle = self._idle_ioctxs[key + (pool,)]
+            client = self._clusters.get(key)
+            if idle:
+                ioctx = idle.pop()
+                self._in_use[id(ioctx)] = (key + (pool,), client)
+                return client, ioctx
+
+        if client is None:
+            # NOTE: Connecting can take a while, so it is not done while
+            # holding the lock, which would block all the other RBD users.
+            new_client = self._connect(rados_id, conffile)
+            with self._lock:
+                client = self._clusters.setdefault(key, new_client)
+            if client is not new_client:
+                # Another thread connected meanwhile
+                new_client.shutdown()
+
+        try:
+            ioctx = client.open_ioctx(pool)
+        except rados.Error:
+            with excutils.save_and_reraise_exception():
+                self._discard_cluster(key, client)
+        with self._lock:
+            self._in_use[id(ioctx)] = (key + (pool,), client)
+        return client, ioctx
+
+    def _discard_cluster(self, key, client):
+        """Stops handing out a broken cluster handle.
+
+        Its idle ioctxs are closed, and the handle is shut down once none of
+        its ioctxs are in use anymore.
+        """
+        idle = []
+        with self._lock:
+            if self._clusters.get(key) is client:
+                del self._clusters[key]
+                for ioctx_key in list(self._idle_ioctxs):
+                    if ioctx_key[:2] == key:
+                        idle.extend(self._idle_ioctxs.pop(ioctx_key))
+            in_use = any(used_client is client
+                         for _ioctx_key, used_client in self._in_use.values())
+        for ioctx in idle:
+            ioctx.close()
+        if not in_use:
+            client.shutdown()
+
+    def put(self, client, ioctx, broken=False):
+        """Returns an ioctx got from get().
+
+        :param broken: True if using the connection failed with a RADOS
+                       error, in which case it is closed and the cluster
+                       handle is not used anymore instead of being pooled.
+        """
+        with self._lock:
+            in_use = self._in_use.pop(id(ioctx), None)
+            if in_use is not None:
+                ioctx_key, client = in_use
+                retired = self._clusters.get(ioctx_key[:2]) is not client
+                if not broken and not retired:
+                    self._idle_ioctxs[ioctx_key].append(ioctx)
+                    return
+        if in_use is None:
+            # Not a pooled connection, it was made before the pool was
+            # enabled.
+            ioctx.close()
+            client.shutdown()
+            return
+        ioctx.close()
+        if broken:
+            LOG.warning(_LW('Discarding the RADOS connection of %(user)s '
+                            'after an error'), {'user': ioctx_key[0]})
+        self._discard_cluster(ioctx_key[:2], client)
+
+
+_connection_pool = _RadosConnectionPool()
+
+
+def _is_rados_error(value):
+    return value is not None and isinstance(value, rados.Error)
+
 
 class RBDVolumeProxy(object):
     """Context manager for dealing with an existing rbd volume.
@@ -65,7 +188,7 @@ class RBDVolumeProxy(object):
         except rbd.Error:
             with excutils.save_and_reraise_exception():
                 LOG.exception(_LE("error opening rbd image %s"), name)
-                driver._disconnect_from_rados(client, ioctx)
+                driver._disconnect_from_rados(client, ioctx, broken=True)
 
         self.driver = driver
         self.client = client
@@ -78,7 +201,8 @@ class RBDVolumeProxy(object):
         try:
             self.volume.close()
         finally:
-            self.driver._disconnect_from_rados(self.client, self.ioctx)
+            self.driver._disconnect_from_rados(
+                self.client, self.ioctx, broken=_is_rados_error(value))
 
     def __getattr__(self, attrib):
         return getattr(self.volume, attrib)
@@ -94,7 +218,8 @@ class RADOSClient(object):
         return self
 
     def __exit__(self, type_, value, traceback):
-        self.driver._disconnect_from_rados(self.cluster, self.ioctx)
+        self.driver._disconnect_from_rados(
+            self.cluster, self.ioctx, broken=_is_rados_error(value))
 
     @property
     def features(self):
@@ -116,11 +241,15 @@ class RBDDriver(object):
             raise RuntimeError(_('rbd python libraries not found'))
 
     def _connect_to_rados(self, pool=None):
+        pool_to_open = pool or self.pool
+        if CONF.libvirt.images_rbd_persistent_connections:
+            return _connection_pool.get(self.rbd_user, self.ceph_conf,
+                                        pool_to_open.encode('utf-8'))
+
         client = rados.Rados(rados_id=self.rbd_user,
                                   conffile=self.ceph_conf)
         try:
             client.connect()
-            pool_to_open = pool or self.pool
             ioctx = client.open_ioctx(pool_to_open.encode('utf-8'))
             return client, ioctx
         except rados.Error:
@@ -128,7 +257,10 @@ class RBDDriver(object):
             client.shutdown()
             raise
 
-    def _disconnect_from_rados(self, client, ioctx):
+    def _disconnect_from_rados(self, client, ioctx, broken=False):
+        if CONF.libvirt.images_rbd_persistent_connections:
+            _connection_pool.put(client, ioctx, broken=broken)
+            return
         # closing an ioctx cannot raise an exception
         ioctx.close()
         client.shutdown()
@@ -343,6 +475,39 @@ class RBDDriver(object):
             except loopingcall.LoopingCallDone:
                 pass
 
+    def _list_volumes_by_prefix(self, client, prefix):
+        """Returns the names of the volumes of the pool starting with prefix.
+
+        The names are looked up in the pool's rbd directory, which is sorted
+        by name, so this does not need to go through every volume of the
+        pool. Falls back to listing all the volumes if the directory cannot
+        be read, e.g. with an older python-rados or format 1 images only.
+        """
+        if hasattr(rados, 'ReadOpCtx'):
+            key_prefix = RBD_DIRECTORY_NAME_PREFIX + prefix
+            names = []
+            start_after = ''
+            try:
+                while True:
+                    with rados.ReadOpCtx() as read_op:
+                        omap_iter, _ret = client.ioctx.get_omap_vals(
+                            read_op, start_after, key_prefix,
+                            RBD_DIRECTORY_PAGE_SIZE)
+                        client.ioctx.operate_read_op(read_op, RBD_DIRECTORY)
+                        keys = [key for key, _value in omap_iter]
+                    names.extend(key[len(RBD_DIRECTORY_NAME_PREFIX):]
+                                 for key in keys)
+                    if len(keys) < RBD_DIRECTORY_PAGE_SIZE:
+                        return names
+                    start_after = keys[-1]
+            except rados.Error as e:
+                LOG.debug('Unable to look up volumes in %(pool)s by prefix, '
+                          'listing all volumes: %(err)s',
+                          {'pool': self.pool, 'err': e})
+
+        return [volume for volume in rbd.RBD().list(client.ioctx)
+                if volume.startswith(prefix)]
+
     def cleanup_volumes(self, instance):
         with RADOSClient(self, self.pool) as client:
 
@@ -352,12 +517,11 @@ class RBDDriver(object):
                 # and none of this is needed (and is, in fact, harmful) so
                 # filter out non-ephemerals from the list
                 if instance.task_state == task_states.RESIZE_REVERTING:
-                    return (disk.startswith(instance.uuid) and
-                            disk.endswith('disk.local'))
+                    return disk.endswith('disk.local')
                 else:
-                    return disk.startswith(instance.uuid)
+                    return True
 
-            volumes = rbd.RBD().list(client.ioctx)
+            volumes = self._list_volumes_by_prefix(client, instance.uuid)
             for volume in filter(belongs_to_instance, volumes):
                 self._destroy_volume(client, volume)
 
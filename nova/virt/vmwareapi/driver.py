@@ -536,4 +536,8 @@ class VMwareAPISession(api.VMwareAPISession):
         """Return a Deferred that will give the result of the given task.
         The task is polled until it completes.
         """
-        return self.wait_for_task(task_ref)
+        try:
+            return self.wait_for_task(task_ref)
+        finally:
+            # The task may have changed properties of a VM
+            vm_util.vm_property_cache_mark_changed()
@@ -0,0 +1,187 @@
+# Copyright (c) 2016 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Local copy of the virtual machine properties looked up most by the driver.
+"""
+
+import threading
+import time
+
+from oslo_log import log as logging
+from oslo_vmware import vim_util as vutil
+import six
+
+import nova.conf
+from nova.i18n import _LW
+
+CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
+
+NAME = 'name'
+POWER_STATE = 'runtime.powerState'
+INSTANCE_UUID = 'summary.config.instanceUuid'
+NUM_CPU = 'summary.config.numCpu'
+MEMORY_MB = 'summary.config.memorySizeMB'
+NVP_VM_UUID = 'config.extraConfig["nvp.vm-uuid"]'
+
+PROPERTIES = [NAME, POWER_STATE, INSTANCE_UUID, NUM_CPU, MEMORY_MB,
+              NVP_VM_UUID]
+
+
+class VMPropertyCache(object):
+    """Copy of a few properties of all the virtual machines of vCenter.
+
+    The first update creates a property collector with a filter on all the
+    virtual machines, which gets their properties. The later updates only
+    get what changed since the previous one, with WaitForUpdatesEx.
+
+    Lookups update the copy first when it is older than
+    CONF.vmware.vm_cache_max_age, or when mark_changed() was called since
+    the last update. When the update fails, lookups find nothing, so that
+    the callers query vCenter instead.
+
+    The copy may be stale, so it is only meant for read-only lookups, not
+    for allocating resources such as VNC ports.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._lock = threading.Lock()
+        self._collector = None
+        self._version = ''
+        # VM reference value -> (VM reference, {property path: value})
+        self._vms = {}
+        self._updated_at = 0
+        self._changed = True
+
+    def mark_changed(self):
+        """Makes the next lookup update the copy.
+
+        This is called once a task completed, so the changes it made to a
+        virtual machine are seen by the next lookup.
+        """
+        self._changed = True
+
+    def _create_collector(self):
+        vim = self._session.vim
+        client_factory = vim.client.factory
+        collector = self._session._call_method(
+            vim, 'CreatePropertyCollector',
+            vim.service_content.propertyCollector)
+        traversal_spec = vutil.build_recursive_traversal_spec(client_factory)
+        object_spec = vutil.build_object_spec(
+            client_factory, vim.service_content.rootFolder, [traversal_spec])
+        property_spec = vutil.build_property_spec(
+            client_factory, type_='VirtualMachine',
+            properties_to_collect=PROPERTIES)
+        filter_spec = vutil.build_property_filter_spec(
+            client_factory, [property_spec], [object_spec])
+        self._session._call_method(vim, 'CreateFilter', collector,
+                                   spec=filter_spec, partialUpdates=False)
+        return collector
+
+    def _apply(self, object_update):
+        key = object_update.obj.value
+        if object_update.kind == 'leave':
+            self._vms.pop(key, None)
+            return
+        if object_update.kind == 'enter' or key not in self._vms:
+            self._vms[key] = (object_update.obj, {})
+        properties = self._vms[key][1]
+        for change in getattr(object_update, 'changeSet', []):
+            if (change.op in ('remove', 'indirectRemove') or
+                    getattr(change, 'val', None) is None):
+                properties.pop(change.name, None)
+            else:
+                properties[change.name] = change.val
+
+    def _update(self):
+        """Returns whether the copy was updated."""
+        vim = self._session.vim
+        # Set first, tasks completing while waiting for the updates must
+        # trigger another update.
+        self._changed = False
+        try:
+            if self._collector is None:
+                self._collector = self._create_collector()
+            options = vim.client.factory.create('ns0:WaitOptions')
+            options.maxWaitSeconds = 0
+            options.maxObjectUpdates = CONF.vmware.maximum_objects
+            while True:
+                update_set = self._session._call_method(
+                    vim, 'WaitForUpdatesEx', self._collector,
+                    version=self._version, options=options)
+                if not update_set:
+                    break
+                for filter_update in update_set.filterSet:
+                    for object_update in getattr(filter_update,
+                                                 'objectSet', []):
+                        self._apply(object_update)
+                self._version = update_set.version
+                if not getattr(update_set, 'truncated', False):
+                    break
+        except Exception as e:
+            # The collector does not survive the session, start over with a
+            # new one on the next lookup.
+            LOG.warning(_LW("Failed to update the virtual machine properties "
+                            "cache, querying vCenter instead: %s"), e)
+            self._collector = None
+            self._version = ''
+            self._vms = {}
+            self._changed = True
+            return False
+        self._updated_at = time.time()
+        LOG.debug("Virtual machine properties cache updated to version "
+                  "%(version)s, %(count)d virtual machines",
+                  {'version': self._version, 'count': len(self._vms)})
+        return True
+
+    def _get_vms(self):
+        with self._lock:
+            if (self._changed or time.time() - self._updated_at >
+                    CONF.vmware.vm_cache_max_age):
+                if not self._update():
+                    return {}
+            return self._vms
+
+    def find_vm_ref(self, uuid, name=None):
+        """Returns the reference of a virtual machine, or None.
+
+        Like vm_util.get_vm_ref(), the virtual machine is looked up by
+        instance UUID, by nvp.vm-uuid option, by name equal to the UUID and
+        last by name.
+        """
+        # Matches by nvp.vm-uuid option, by UUID name and by name
+        matches = [None] * 3
+        for vm_ref, properties in six.itervalues(self._get_vms()):
+            if properties.get(INSTANCE_UUID) == uuid:
+                return vm_ref
+            nvp_vm_uuid = properties.get(NVP_VM_UUID)
+            if nvp_vm_uuid is not None and nvp_vm_uuid.value == uuid:
+                matches[0] = matches[0] or vm_ref
+            vm_name = properties.get(NAME)
+            if vm_name == uuid:
+                matches[1] = matches[1] or vm_ref
+            elif name is not None and vm_name == name:
+                matches[2] = matches[2] or vm_ref
+        return next((vm_ref for vm_ref in matches if vm_ref is not None),
+                    None)
+
+    def get_properties(self, vm_ref):
+        """Returns the cached properties of a virtual machine, or None."""
+        vm = self._get_vms().get(vm_ref.value)
+        if vm is not None:
+            return dict(vm[1])
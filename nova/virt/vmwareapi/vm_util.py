@@ -37,6 +37,7 @@ from nova.i18n import _, _LE, _LI, _LW
 from nova.network import model as network_model
 from nova.virt.vmwareapi import constants
 from nova.virt.vmwareapi import vim_util
+from nova.virt.vmwareapi import vm_cache
 
 LOG = logging.getLogger(__name__)
 
@@ -56,6 +57,7 @@ _FOLDER_PATH_REF_MAPPING = {}
 # that this is a rescue VM. This is in order to prevent
 # unnecessary communication with the backend.
 _VM_REFS_CACHE = {}
+_VM_PROPERTY_CACHE = None
 
 
 class Limits(object):
@@ -128,6 +130,35 @@ def _vm_ref_cache(id, func, session, data):
     return vm_ref
 
 
+def vm_property_cache_reset():
+    global _VM_PROPERTY_CACHE
+    _VM_PROPERTY_CACHE = None
+
+
+def vm_property_cache_mark_changed():
+    if _VM_PROPERTY_CACHE is not None:
+        _VM_PROPERTY_CACHE.mark_changed()
+
+
+def _get_vm_property_cache(session):
+    """Returns the VM property cache, or None if it is disabled."""
+    global _VM_PROPERTY_CACHE
+    if not CONF.vmware.vm_cache_max_age:
+        return None
+    if _VM_PROPERTY_CACHE is None:
+        _VM_PROPERTY_CACHE = vm_cache.VMPropertyCache(session)
+    return _VM_PROPERTY_CACHE
+
+
+def get_cached_vm_properties(session, vm_ref):
+    """Returns the properties of the VM kept by the VM property cache, or
+    None if the cache is disabled or does not know the VM.
+    """
+    cache = _get_vm_property_cache(session)
+    if cache is not None:
+        return cache.get_properties(vm_ref)
+
+
 def vm_ref_cache_from_instance(func):
     @functools.wraps(func)
     def wrapper(session, instance):
@@ -1006,6 +1037,8 @@ def _get_allocated_vnc_ports(session):
     """Return an integer set of all allocated VNC ports."""
     # TODO(rgerganov): bug #1256944
     # The VNC port should be unique per host, not per vCenter
+    # NOTE: The VM property cache is not used here, a stale copy would hand
+    # out ports that were just allocated.
     vnc_ports = set()
     result = session._call_method(vim_util, "get_objects",
                                   "VirtualMachine", [VNC_CONFIG_KEY])
@@ -1105,7 +1138,11 @@ def _get_vm_ref_from_extraconfig(session, instance_uuid):
 def get_vm_ref(session, instance):
     """Get reference to the VM through uuid or vm name."""
     uuid = instance.uuid
-    vm_ref = (search_vm_ref_by_identifier(session, uuid) or
+    vm_ref = None
+    cache = _get_vm_property_cache(session)
+    if cache is not None:
+        vm_ref = cache.find_vm_ref(uuid, instance.name)
+    vm_ref = (vm_ref or search_vm_ref_by_identifier(session, uuid) or
               _get_vm_ref_from_name(session, instance.name))
     if vm_ref is None:
         raise exception.InstanceNotFound(instance_id=uuid)
@@ -1144,6 +1181,9 @@ def get_host_name_for_vm(session, instance):
 
 def get_vm_state(session, instance):
     vm_ref = get_vm_ref(session, instance)
+    vm_props = get_cached_vm_properties(session, vm_ref)
+    if vm_props and vm_cache.POWER_STATE in vm_props:
+        return vm_props[vm_cache.POWER_STATE]
     vm_state = session._call_method(vutil, "get_object_property",
                                     vm_ref, "runtime.powerState")
     return vm_state
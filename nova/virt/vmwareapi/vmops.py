@@ -1502,13 +1502,14 @@ class VMwareVMOps(object):
         lst_properties = ["summary.config.numCpu",
                     "summary.config.memorySizeMB",
                     "runtime.powerState"]
-        try:
-            vm_props = self._session._call_method(vutil,
-                                                  "get_object_properties_dict",
-                                                  vm_ref,
-                                                  lst_properties)
-        except vexc.ManagedObjectNotFoundException:
-            raise exception.InstanceNotFound(instance_id=instance.uuid)
+        vm_props = vm_util.get_cached_vm_properties(self._session, vm_ref)
+        if not vm_props or 'runtime.powerState' not in vm_props:
+            try:
+                vm_props = self._session._call_method(
+                    vutil, "get_object_properties_dict", vm_ref,
+                    lst_properties)
+            except vexc.ManagedObjectNotFoundException:
+                raise exception.InstanceNotFound(instance_id=instance.uuid)
         max_mem = int(vm_props.get('summary.config.memorySizeMB', 0)) * 1024
         num_cpu = int(vm_props.get('summary.config.numCpu', 0))
         return hardware.InstanceInfo(
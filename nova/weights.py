@@ -18,6 +18,8 @@ Pluggable Weighing support
 """
 
 import abc
+import heapq
+import operator
 
 import six
 
@@ -121,8 +123,13 @@ class BaseWeigher(object):
 class BaseWeightHandler(loadables.BaseLoader):
     object_class = WeighedObject
 
-    def get_weighed_objects(self, weighers, obj_list, weighing_properties):
-        """Return a sorted (descending), normalized list of WeighedObjects."""
+    def get_weighed_objects(self, weighers, obj_list, weighing_properties,
+                            limit=None):
+        """Return a sorted (descending), normalized list of WeighedObjects.
+
+        If limit is set, only the limit heaviest objects are returned, which
+        saves sorting all of them when the caller only needs the top ones.
+        """
         weighed_objs = [self.object_class(obj, 0.0) for obj in obj_list]
 
         if len(weighed_objs) <= 1:
@@ -136,8 +143,13 @@ class BaseWeightHandler(loadables.BaseLoader):
                                 minval=weigher.minval,
                                 maxval=weigher.maxval)
 
-            for i, weight in enumerate(weights):
-                obj = weighed_objs[i]
-                obj.weight += weigher.weight_multiplier() * weight
+            multiplier = weigher.weight_multiplier()
+            for obj, weight in six.moves.zip(weighed_objs, weights):
+                obj.weight += multiplier * weight
 
-        return sorted(weighed_objs, key=lambda x: x.weight, reverse=True)
+        key = operator.attrgetter('weight')
+        if limit is not None and limit < len(weighed_objs):
+            # NOTE: nlargest() keeps the order of objects with equal weights,
+            # so this returns the same objects as sorting and slicing.
+            return heapq.nlargest(limit, weighed_objs, key=key)
+        return sorted(weighed_objs, key=key, reverse=True)
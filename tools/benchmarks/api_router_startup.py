@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measures the time and memory taken to build the v2.1 API router.
+
+The first build includes importing the API extensions, like when an API
+service starts. The next builds show the cost of creating the controllers
+and routes alone. The memory is the growth of the resident set size of the
+process during the first build.
+
+The API extensions are found through their entry points, so nova must be
+installed, for instance with "pip install -e .".
+
+Usage: tools/benchmarks/api_router_startup.py [--iterations N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import resource
+import time
+
+import nova.conf
+from nova import objects
+from nova import rpc
+
+CONF = nova.conf.CONF
+
+
+def _rss_kb():
+    """Returns the current resident set size of the process in KiB."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() // 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+
+    CONF([], project='nova')
+    CONF.set_override('transport_url', 'fake:/')
+    objects.register_all()
+    rpc.init(CONF)
+
+    gc.collect()
+    before = _rss_kb()
+    start = time.time()
+    # Imported here so that the first build includes the imports
+    from nova.api.openstack import compute
+    router = compute.APIRouterV21()
+    first = time.time() - start
+    gc.collect()
+    used = _rss_kb() - before
+
+    start = time.time()
+    for _i in range(args.iterations):
+        compute.APIRouterV21()
+    next_builds = (time.time() - start) / args.iterations
+
+    print('%d extensions loaded' %
+          len(router.loaded_extension_info.get_extensions()))
+    print('first build (with imports): %.1f ms, RSS growth: %d KiB' %
+          (first * 1000, used))
+    print('next builds: %.1f ms' % (next_builds * 1000))
+
+
+if __name__ == '__main__':
+    main()
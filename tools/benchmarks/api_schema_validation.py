@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measures the cost of validating API request bodies against their schema.
+
+For each request body, this times:
+
+* per request: extending the jsonschema validator class and creating the
+  validator for every request, as done before the validators were kept,
+* cached: validating with the validator kept by the schema decorator.
+
+Usage: tools/benchmarks/api_schema_validation.py [--iterations N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from nova.api.openstack.compute.schemas import servers
+from nova.api.validation import validators
+
+# name, schema, request body
+REQUESTS = [
+    ('create', servers.base_create, {
+        'server': {
+            'name': 'server-1',
+            'imageRef': '70a599e0-31e7-49b7-b260-868f441e862b',
+            'flavorRef': '1',
+            'metadata': {'group': 'web', 'tier': 'frontend'},
+            'networks': [{'uuid': 'ff608d40-75e9-48cb-b745-77bb55b5eaf2',
+                          'fixed_ip': '10.0.0.4'}],
+            'OS-DCF:diskConfig': 'AUTO',
+            'accessIPv4': '192.168.0.3',
+        }}),
+    ('update', servers.base_update, {
+        'server': {'name': 'server-2', 'accessIPv6': '2001:db8::3'}}),
+    ('reboot', servers.reboot, {'reboot': {'type': 'HARD'}}),
+    ('resize', servers.base_resize, {'resize': {'flavorRef': '2'}}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    print('%-8s %18s %18s' % ('request', 'per request (us)', 'cached (us)'))
+    for name, schema, body in REQUESTS:
+        schema_validator = validators._SchemaValidator(schema)
+
+        def per_request():
+            validators._SchemaValidator._validator_classes.clear()
+            validators._SchemaValidator(schema).validate(body)
+
+        def cached():
+            schema_validator.validate(body)
+
+        results = [timeit.timeit(func, number=args.iterations) /
+                   args.iterations * 1e6
+                   for func in (per_request, cached)]
+        print('%-8s %18.1f %18.1f' % ((name,) + tuple(results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measures the cost of generating libvirt guest XML per instance shape.
+
+For each shape, this times:
+
+* topology: choosing the guest CPU topology from scratch, as done for every
+  guest before the libvirt driver kept the result per shape,
+* cached topology: the same through LibvirtDriver._get_guest_cpu_topology(),
+* to_xml: serializing a guest configuration of that shape.
+
+Usage: tools/benchmarks/libvirt_guest_xml.py [--iterations N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from nova import objects
+from nova.tests.unit.virt.libvirt import fakelibvirt
+from nova.virt import fake
+from nova.virt import hardware
+from nova.virt.libvirt import config as vconfig
+from nova.virt.libvirt import driver
+
+# name, vCPUs, flavor extra specs, NUMA cells
+SHAPES = [
+    ('tiny', 1, {}, 0),
+    ('medium', 4, {}, 0),
+    ('large', 16, {'hw:cpu_max_sockets': '2'}, 0),
+    ('xlarge-numa', 64, {'hw:numa_nodes': '2'}, 2),
+]
+
+
+def _numa_topology(vcpus, cells):
+    if not cells:
+        return None
+    per_cell = vcpus // cells
+    return objects.InstanceNUMATopology(cells=[
+        objects.InstanceNUMACell(
+            id=cell, cpuset=set(range(cell * per_cell, (cell + 1) * per_cell)),
+            memory=1024,
+            cpu_topology=objects.VirtCPUTopology(sockets=1,
+                                                 cores=per_cell // 2,
+                                                 threads=2))
+        for cell in range(cells)])
+
+
+def _guest_config(vcpus, topology, cells):
+    guest = vconfig.LibvirtConfigGuest()
+    guest.virt_type = 'kvm'
+    guest.name = 'instance-00000001'
+    guest.uuid = 'b38a3f43-4be2-4046-897f-b67c2f5e0147'
+    guest.memory = 2048 * 1024
+    guest.vcpus = vcpus
+    guest.os_type = 'hvm'
+
+    guest.cpu = vconfig.LibvirtConfigGuestCPU()
+    guest.cpu.mode = 'host-model'
+    guest.cpu.sockets = topology.sockets
+    guest.cpu.cores = topology.cores
+    guest.cpu.threads = topology.threads
+    if cells:
+        guest.cpu.numa = vconfig.LibvirtConfigGuestCPUNUMA()
+        per_cell = vcpus // cells
+        for cell in range(cells):
+            numa_cell = vconfig.LibvirtConfigGuestCPUNUMACell()
+            numa_cell.id = cell
+            numa_cell.cpus = set(range(cell * per_cell,
+                                       (cell + 1) * per_cell))
+            numa_cell.memory = 1024 * 1024
+            guest.cpu.numa.cells.append(numa_cell)
+
+    for dev in ('vda', 'vdb'):
+        disk = vconfig.LibvirtConfigGuestDisk()
+        disk.source_type = 'file'
+        disk.source_path = '/var/lib/nova/instances/fake/disk.%s' % dev
+        disk.driver_name = 'qemu'
+        disk.driver_format = 'qcow2'
+        disk.target_dev = dev
+        disk.target_bus = 'virtio'
+        guest.add_device(disk)
+    interface = vconfig.LibvirtConfigGuestInterface()
+    interface.net_type = 'bridge'
+    interface.mac_addr = 'fa:16:3e:00:00:01'
+    interface.model = 'virtio'
+    interface.source_dev = 'br100'
+    guest.add_device(interface)
+    graphics = vconfig.LibvirtConfigGuestGraphics()
+    graphics.type = 'vnc'
+    graphics.listen = '127.0.0.1'
+    guest.add_device(graphics)
+    return guest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    objects.register_all()
+    driver.libvirt = fakelibvirt
+    drvr = driver.LibvirtDriver(fake.FakeVirtAPI(), True)
+    image_meta = objects.ImageMeta.from_dict({'disk_format': 'raw'})
+
+    print('%-12s %16s %16s %16s' % ('shape', 'topology (us)',
+                                    'cached (us)', 'to_xml (us)'))
+    for name, vcpus, extra_specs, cells in SHAPES:
+        flavor = objects.Flavor(vcpus=vcpus, extra_specs=extra_specs)
+        numa_topology = _numa_topology(vcpus, cells)
+        topology = hardware.get_best_cpu_topology(
+            flavor, image_meta, numa_topology=numa_topology)
+        guest = _guest_config(vcpus, topology, cells)
+
+        def best():
+            hardware.get_best_cpu_topology(flavor, image_meta,
+                                           numa_topology=numa_topology)
+
+        def cached():
+            drvr._get_guest_cpu_topology(flavor, image_meta, numa_topology)
+
+        results = [timeit.timeit(func, number=args.iterations) /
+                   args.iterations * 1e6
+                   for func in (best, cached, guest.to_xml)]
+        print('%-12s %16.1f %16.1f %16.1f' % ((name,) + tuple(results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measures the cost of serializing objects like for an RPC call.
+
+For an Instance with its flavor, NUMA topology, PCI requests, network info
+cache and CPU model, a RequestSpec and a ComputeNode, this times:
+
+* to_primitive: NovaObjectSerializer.serialize_entity(),
+* from_primitive: NovaObjectSerializer.deserialize_entity(),
+* round trip: both, with the JSON encoding done by the RPC driver.
+
+Usage: tools/benchmarks/object_serialization.py [--iterations N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+
+from nova import context
+from nova.network import model as network_model
+from nova import objects
+from nova.objects import base
+from nova.tests.unit import fake_instance
+from nova.tests.unit import fake_network_cache_model
+
+
+def _numa_topology(instance_uuid):
+    return objects.InstanceNUMATopology(instance_uuid=instance_uuid, cells=[
+        objects.InstanceNUMACell(
+            id=cell, cpuset=set(range(cell * 4, cell * 4 + 4)), memory=4096,
+            pagesize=None, cpu_policy='dedicated',
+            cpu_pinning_raw={str(cpu): cpu + 8
+                             for cpu in range(cell * 4, cell * 4 + 4)},
+            cpu_topology=objects.VirtCPUTopology(sockets=1, cores=2,
+                                                 threads=2))
+        for cell in range(2)])
+
+
+def _instance(ctxt):
+    instance = fake_instance.fake_instance_obj(
+        ctxt, uuid=uuidutils.generate_uuid(), vcpus=8, memory_mb=8192,
+        launched_at=timeutils.utcnow(), host='compute1', node='compute1')
+    instance.flavor.extra_specs = {'hw:cpu_policy': 'dedicated',
+                                   'hw:numa_nodes': '2',
+                                   'pci_passthrough:alias': 'nic:1'}
+    instance.metadata = {'group': 'web', 'tier': 'frontend'}
+    instance.system_metadata = {
+        'image_%s' % key: 'value-%s' % key
+        for key in ('min_disk', 'min_ram', 'disk_format', 'container_format',
+                    'hw_disk_bus', 'hw_vif_model', 'os_distro')}
+    instance.numa_topology = _numa_topology(instance.uuid)
+    instance.pci_requests = objects.InstancePCIRequests(
+        instance_uuid=instance.uuid, requests=[
+            objects.InstancePCIRequest(
+                count=1, alias_name='nic', is_new=False, request_id=None,
+                spec=[{'vendor_id': '8086', 'product_id': '1520'}])])
+    instance.info_cache = objects.InstanceInfoCache(
+        instance_uuid=instance.uuid,
+        network_info=network_model.NetworkInfo(
+            [fake_network_cache_model.new_vif(),
+             fake_network_cache_model.new_vif(
+                 {'address': 'bb:bb:bb:bb:bb:bb'})]))
+    instance.vcpu_model = objects.VirtCPUModel(
+        arch='x86_64', vendor='Intel', model='Haswell', mode='host-model',
+        match='exact',
+        topology=objects.VirtCPUTopology(sockets=2, cores=2, threads=2),
+        features=[objects.VirtCPUFeature(policy='require', name=name)
+                  for name in ('vmx', 'ssse3', 'sse4.1', 'sse4.2', 'avx')])
+    return instance
+
+
+def _request_spec(ctxt, instance):
+    image = {'disk_format': 'raw', 'container_format': 'bare',
+             'properties': {'hw_disk_bus': 'virtio'}}
+    filter_properties = {
+        'ignore_hosts': ['compute2'],
+        'retry': {'num_attempts': 1, 'hosts': [['compute2', 'compute2']]},
+        'limits': {'vcpu': 16, 'memory_mb': 16384},
+        'scheduler_hints': {'group': 'a0cf03a5-d921-4877-bb5c-86d26cf818e1'},
+    }
+    return objects.RequestSpec.from_components(
+        ctxt, instance.uuid, image, instance.flavor, instance.numa_topology,
+        instance.pci_requests, filter_properties, None,
+        instance.availability_zone)
+
+
+def _compute_node():
+    return objects.ComputeNode(
+        id=1, host='compute1', hypervisor_hostname='compute1',
+        hypervisor_type='QEMU', hypervisor_version=2005000,
+        host_ip='192.168.0.11', cpu_info='{"arch": "x86_64"}', vcpus=32,
+        vcpus_used=8, memory_mb=262144, memory_mb_used=16384,
+        free_ram_mb=245760, local_gb=2048, local_gb_used=128,
+        free_disk_gb=1920, disk_available_least=1900, numa_topology=None,
+        supported_hv_specs=[
+            objects.HVSpec(arch='x86_64', hv_type='kvm', vm_mode='hvm'),
+            objects.HVSpec(arch='i686', hv_type='kvm', vm_mode='hvm')],
+        pci_device_pools=objects.PciDevicePoolList(objects=[
+            objects.PciDevicePool(product_id='1520', vendor_id='8086',
+                                  numa_node=0, tags={'dev_type': 'type-VF'},
+                                  count=8)]),
+        stats={'num_instances': '8', 'io_workload': '0'}, metrics='[]',
+        cpu_allocation_ratio=16.0, ram_allocation_ratio=1.5,
+        disk_allocation_ratio=1.0, updated_at=timeutils.utcnow(),
+        created_at=timeutils.utcnow(), deleted_at=None, deleted=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    objects.register_all()
+    ctxt = context.RequestContext('fake-user', 'fake-project')
+    serializer = base.NovaObjectSerializer()
+    instance = _instance(ctxt)
+    entities = [('Instance', instance),
+                ('RequestSpec', _request_spec(ctxt, instance)),
+                ('ComputeNode', _compute_node())]
+
+    print('%-12s %8s %18s %20s %16s' % ('object', 'bytes', 'to_primitive (us)',
+                                        'from_primitive (us)',
+                                        'round trip (us)'))
+    for name, entity in entities:
+        primitive = serializer.serialize_entity(ctxt, entity)
+        size = len(jsonutils.dumps(primitive))
+
+        def to_primitive():
+            serializer.serialize_entity(ctxt, entity)
+
+        def from_primitive():
+            serializer.deserialize_entity(ctxt, primitive)
+
+        def round_trip():
+            message = jsonutils.dumps(serializer.serialize_entity(ctxt,
+                                                                  entity))
+            serializer.deserialize_entity(ctxt, jsonutils.loads(message))
+
+        results = [timeit.timeit(func, number=args.iterations) /
+                   args.iterations * 1e6
+                   for func in (to_primitive, from_primitive, round_trip)]
+        print('%-12s %8d %18.1f %20.1f %16.1f' % ((name, size) +
+                                                  tuple(results)))
+
+
+if __name__ == '__main__':
+    main()
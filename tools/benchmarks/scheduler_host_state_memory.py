@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measures the scheduler memory used by host states, per 1000 hosts.
+
+The host states are built like HostManager.get_all_host_states() does, with
+the instances of each host kept either as Instance objects or, as with
+scheduler_compact_instance_info, as compact records. The memory is the
+growth of the resident set size of the process while building them.
+
+Usage: tools/benchmarks/scheduler_host_state_memory.py [--hosts N]
+       [--instances-per-host N] [--compact]
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import resource
+
+from oslo_utils import uuidutils
+
+from nova.compute import vm_states
+import nova.conf
+from nova import objects
+from nova.scheduler import host_manager
+
+CONF = nova.conf.CONF
+
+
+def _rss_kb():
+    """Returns the current resident set size of the process in KiB."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() // 1024
+
+
+def _compute_node(index):
+    return objects.ComputeNode(
+        id=index, host='compute%05d' % index,
+        hypervisor_hostname='compute%05d' % index,
+        hypervisor_type='QEMU', hypervisor_version=2005000,
+        host_ip='192.168.%d.%d' % (index // 250, index % 250 + 1),
+        cpu_info='{"arch": "x86_64"}', vcpus=32, vcpus_used=8,
+        memory_mb=262144, memory_mb_used=16384, free_ram_mb=245760,
+        local_gb=2048, local_gb_used=128, free_disk_gb=1920,
+        disk_available_least=1900, numa_topology=None,
+        supported_hv_specs=[], pci_device_pools=objects.PciDevicePoolList(),
+        stats={'num_instances': '8', 'io_workload': '0'}, metrics='[]',
+        cpu_allocation_ratio=16.0, ram_allocation_ratio=1.5,
+        disk_allocation_ratio=1.0, updated_at=None)
+
+
+def _instance(host):
+    return objects.Instance(
+        uuid=uuidutils.generate_uuid(), host=host, node=host,
+        instance_type_id=1, vm_state=vm_states.ACTIVE, task_state=None,
+        memory_mb=2048, vcpus=2, root_gb=20, ephemeral_gb=0,
+        project_id='6f70656e737461636b20342065766572',
+        user_id='789abcdef0123456789abcdef0123456',
+        display_name='server-%s' % host, hostname='server',
+        image_ref=uuidutils.generate_uuid(), availability_zone='nova')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--instances-per-host', type=int, default=8)
+    parser.add_argument('--compact', action='store_true',
+                        help='Keep compact instance records')
+    args = parser.parse_args()
+
+    objects.register_all()
+    CONF([], project='nova')
+    CONF.set_override('scheduler_compact_instance_info', args.compact)
+
+    computes = [_compute_node(index) for index in range(args.hosts)]
+    service = {'host': 'compute', 'binary': 'nova-compute',
+               'disabled': False, 'forced_down': False}
+
+    gc.collect()
+    before = _rss_kb()
+    states = []
+    for compute in computes:
+        state = host_manager.HostState(compute.host,
+                                       compute.hypervisor_hostname)
+        # The Instance objects are only kept by the host state when the
+        # instances are not compacted, as in the scheduler.
+        inst_dict = {}
+        for _i in range(args.instances_per_host):
+            instance = _instance(compute.host)
+            inst_dict[instance.uuid] = host_manager.compact_instance(
+                instance)
+        state.update(compute, host_manager.ReadOnlyDict(service), [],
+                     inst_dict)
+        states.append(state)
+    gc.collect()
+    used = _rss_kb() - before
+
+    print('%d hosts, %d instances per host, compact instances: %s' %
+          (args.hosts, args.instances_per_host, args.compact))
+    print('RSS growth: %d KiB, %.1f KiB per 1000 hosts' %
+          (used, used * 1000.0 / args.hosts))
+
+
+if __name__ == '__main__':
+    main()